@@ -1,71 +1,40 @@
-#
-# Tello Python3 Control Demo 
-#
-# http://www.ryzerobotics.com/
-#
-# 1/1/2018
-
-import threading 
-import socket
-import sys
-import time
-
-
-host = ''
-port = 9000
-locaddr = (host,port) 
-
-
-# Create a UDP socket
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-
-tello_address = ('192.168.10.1', 8889)
-
-sock.bind(locaddr)
-
-def recv():
-    count = 0
-    while True: 
-        try:
-            data, server = sock.recvfrom(1518)
-            print(data.decode(encoding="utf-8"))
-        except Exception:
-            print ('\nExit . . .\n')
-            break
-
-
-print ('\r\n\r\nTello Python3 Demo.\r\n')
-
-print ('Tello: command takeoff land flip forward back left right \r\n       up down cw ccw speed speed?\r\n')
-
-print ('end -- quit demo.\r\n')
-
-
-#recvThread create
-recvThread = threading.Thread(target=recv)
-recvThread.start()
-
-while True: 
-
-    try:
-        msg = input("");
-
-        if not msg:
-            break  
-
-        if 'end' in msg:
-            print ('...')
-            sock.close()  
-            break
-
-        # Send data
-        msg = msg.encode(encoding="utf-8") 
-        sent = sock.sendto(msg, tello_address)
-    except KeyboardInterrupt:
-        print ('\n . . .\n')
-        sock.close()  
-        break
-
-
-
-
+#
+# Tello Python3 Control Demo
+#
+# http://www.ryzerobotics.com/
+#
+# 1/1/2018
+#
+# Uses the asyncio TelloClient instead of a blocking recvfrom thread.  Every command
+# prints the answer with its round trip time, 'stats' prints the latency histograms.
+#
+# python Tello3.py [tello ip] [tello port]
+
+from pyimagesearch.telloclient import TelloClient, repl
+import asyncio
+import sys
+
+
+host = sys.argv[1] if len(sys.argv) > 1 else '192.168.10.1'
+port = int(sys.argv[2]) if len(sys.argv) > 2 else 8889
+local_port = 9000
+
+
+async def main():
+    async with TelloClient(host=host, port=port, local_port=local_port, retries=0, read_retries=0) as client:
+        await repl(client)
+        print(client.stats())
+
+
+print ('\r\n\r\nTello Python3 Demo.\r\n')
+
+print ('Tello: command takeoff land flip forward back left right \r\n       up down cw ccw speed speed?\r\n')
+
+print ('stats -- round trip latency histograms.\r\n')
+
+print ('end -- quit demo.\r\n')
+
+try:
+    asyncio.run(main())
+except KeyboardInterrupt:
+    print ('\n . . .\n')
@@ -0,0 +1,179 @@
+from pyimagesearch.objcenter import ObjCenter
+from pyimagesearch.framesource import FileFrameSource
+from datetime import datetime
+import numpy as np
+import itertools
+import argparse
+import platform
+import json
+import time
+import cv2
+import sys
+
+"""
+Benchmark ObjCenter.update over a recorded video while sweeping the frame width and the detectMultiScale
+parameters.  For every combination the per frame latency percentiles, frames per second, detection rate and
+center drift between consecutive detections are reported and written to a json file.
+
+--backends compares the face detector backends (haar, lbp, skin) on the same frames, so speed can be traded for
+accuracy per flight.  A backend that cannot be loaded (the LBP cascade is not part of pip OpenCV) is skipped.
+
+Pass --compare with the json file of an earlier run to flag configurations that got slower or detect fewer faces.
+
+python benchmark-detector.py --widths 320 400 --scale-factors 1.05 1.1 1.2 --output bench.json
+python benchmark-detector.py --backends haar lbp skin --widths 400 --scale-factors 1.1 --min-neighbors 5
+"""
+
+
+def load_frames(video, max_frames):
+    frame_source = FileFrameSource(video, realtime=False)
+    frames = []
+    while max_frames is None or len(frames) < max_frames:
+        frame = frame_source.read()
+        if frame is None:
+            break
+        frames.append(frame)
+    frame_source.release()
+    return frames
+
+
+def run_config(frames, cascade, width, scale_factor, min_neighbors, min_size, roi_expand, jitter_limit,
+               backend="haar"):
+    H, W, _ = frames[0].shape
+    height = int(H * width / W)
+    # resize up front, only the detector is timed
+    resized = [cv2.resize(frame, (width, height)) for frame in frames]
+
+    obj_center = ObjCenter(cascade, scale_factor=scale_factor, min_neighbors=min_neighbors,
+                           min_size=(min_size, min_size), roi_expand=roi_expand, backend=backend)
+
+    latencies = np.empty(len(resized))
+    centers = np.full((len(resized), 2), np.nan)
+    roi_scans = 0
+    for i, frame in enumerate(resized):
+        start = time.perf_counter()
+        ((objX, objY), rect, d) = obj_center.update(frame)
+        latencies[i] = time.perf_counter() - start
+        roi_scans += obj_center.last_scan_was_roi
+        if rect is not None:
+            centers[i] = (objX, objY)
+
+    # drift between consecutive detections, scaled to the 400 pixel frame the tracker uses
+    detected = ~np.isnan(centers[:, 0])
+    drift = np.linalg.norm(np.diff(centers, axis=0), axis=1) * (400 / width)
+    drift = drift[~np.isnan(drift)]
+
+    latencies_ms = latencies * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        "backend": backend,
+        "width": width,
+        "scale_factor": scale_factor,
+        "min_neighbors": min_neighbors,
+        "min_size": min_size,
+        "roi_expand": roi_expand,
+        "frames": len(resized),
+        "roi_scan_rate": roi_scans / len(resized),
+        "latency_ms_mean": float(latencies_ms.mean()),
+        "latency_ms_p50": float(p50),
+        "latency_ms_p95": float(p95),
+        "latency_ms_p99": float(p99),
+        "fps": float(1.0 / latencies.mean()),
+        "detection_rate": float(detected.mean()),
+        "drift_px_mean": float(drift.mean()) if len(drift) else None,
+        "drift_px_p95": float(np.percentile(drift, 95)) if len(drift) else None,
+        "jitter_reject_rate": float((drift > jitter_limit).mean()) if len(drift) else None,
+    }
+
+
+def config_key(result):
+    return (result.get("backend", "haar"), result["width"], result["scale_factor"], result["min_neighbors"],
+            result["min_size"], result.get("roi_expand"))
+
+
+def compare(results, baseline_file, tolerance):
+    with open(baseline_file) as f:
+        baseline = {config_key(r): r for r in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        before = baseline.get(config_key(result))
+        if before is None:
+            continue
+        if result["latency_ms_p50"] > before["latency_ms_p50"] * (1 + tolerance):
+            regressions.append(f"{config_key(result)} p50 latency {before['latency_ms_p50']:.2f}ms -> "
+                               f"{result['latency_ms_p50']:.2f}ms")
+        if result["detection_rate"] < before["detection_rate"] - tolerance:
+            regressions.append(f"{config_key(result)} detection rate {before['detection_rate']:.3f} -> "
+                               f"{result['detection_rate']:.3f}")
+    return regressions
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--video", default="video_12-06-2020_08-19-53_PM.mp4", help="recorded video to benchmark on")
+    ap.add_argument("--cascade", default="./haarcascade_frontalface_default.xml", help="Haar cascade xml file")
+    ap.add_argument("--backends", nargs="+", default=["haar"], choices=("haar", "lbp", "skin"),
+                    help="face detector backends to compare")
+    ap.add_argument("--frames", type=int, default=None, help="only use the first N frames of the video")
+    ap.add_argument("--widths", type=int, nargs="+", default=[320, 400])
+    ap.add_argument("--scale-factors", type=float, nargs="+", default=[1.05, 1.1, 1.2])
+    ap.add_argument("--min-neighbors", type=int, nargs="+", default=[5, 9])
+    ap.add_argument("--min-sizes", type=int, nargs="+", default=[30])
+    ap.add_argument("--roi-expands", type=float, nargs="+", default=[None],
+                    help="ROI window size relative to the last face, leave out for full frame scans only")
+    ap.add_argument("--jitter-limit", type=float, default=25, help="drift that the tracker rejects as jitter")
+    ap.add_argument("--output", default=None, help="json file to write the results to")
+    ap.add_argument("--compare", default=None, help="json results of an earlier run to check for regressions")
+    ap.add_argument("--tolerance", type=float, default=0.1,
+                    help="allowed relative latency increase and absolute detection rate decrease")
+    args = ap.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    print(f"Loaded {len(frames)} frames from {args.video}")
+
+    results = []
+    unavailable = set()
+    for backend, width, scale_factor, min_neighbors, min_size, roi_expand in itertools.product(
+            args.backends, args.widths, args.scale_factors, args.min_neighbors, args.min_sizes, args.roi_expands):
+        if backend in unavailable:
+            continue
+        try:
+            result = run_config(frames, args.cascade, width, scale_factor, min_neighbors, min_size, roi_expand,
+                                args.jitter_limit, backend=backend)
+        except IOError as e:
+            print(f"Skipping {backend}: {e}")
+            unavailable.add(backend)
+            continue
+        results.append(result)
+        drift = "n/a" if result["drift_px_mean"] is None else f"{result['drift_px_mean']:.1f}px"
+        print(f"{backend} width={width} scale={scale_factor} neighbors={min_neighbors} min_size={min_size} roi={roi_expand}: "
+              f"p50 {result['latency_ms_p50']:.2f}ms p95 {result['latency_ms_p95']:.2f}ms "
+              f"p99 {result['latency_ms_p99']:.2f}ms fps {result['fps']:.1f} "
+              f"detected {result['detection_rate']:.1%} drift {drift}")
+
+    if args.output:
+        report = {
+            "meta": {
+                "date": datetime.now().isoformat(),
+                "video": args.video,
+                "cascade": args.cascade,
+                "frames": len(frames),
+                "opencv": cv2.__version__,
+                "numpy": np.__version__,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "processor": platform.processor(),
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,87 @@
+from pyimagesearch.detectorpool import SharedDetectorPool
+from pyimagesearch.fleet import FleetSupervisor, connect_tello
+from pyimagesearch.framesource import FileFrameSource
+from pyimagesearch.mocktello import RecordingTello
+from pyimagesearch.telemetry import TelemetryIngester
+import argparse
+import signal
+import time
+import cv2
+
+"""
+Track faces with several Tellos from one ground station.
+
+One supervisor owns every drone connection, runs a small tracking thread per drone and sends all the frames to one
+detector pool sized to the cores of the machine, so adding drones does not add detector processes.  Each drone needs
+its own wifi adapter with its own static address, give the drone's address and the adapter's interface name (see
+connect_tello for the setup, it needs root or CAP_NET_RAW):
+
+python fleet-face-tracking.py --drone 192.168.10.1@wlan0 --drone 192.168.10.1@wlan1 --fly
+
+Without drones the fleet can be replayed from recorded videos, one simulated drone per --replay:
+
+python fleet-face-tracking.py --replay video_12-06-2020_08-19-53_PM.mp4 --replay video_12-06-2020_08-19-53_PM.mp4
+"""
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--drone", action="append", default=[], metavar="ADDRESS[@INTERFACE]",
+                    help="drone to fly, repeat for every drone of the fleet")
+    ap.add_argument("--replay", action="append", default=[], metavar="VIDEO",
+                    help="simulated drone replaying a recorded video, repeat for more")
+    ap.add_argument("--workers", type=int, default=None, help="detector worker processes, default cores - 1")
+    ap.add_argument("--fly", action="store_true", help="take off and follow the faces")
+    ap.add_argument("--max-speed-limit", type=int, default=40, help="maximum rc speed")
+    ap.add_argument("--detector", default="haar", choices=("haar", "lbp", "skin"), help="face detector backend")
+    ap.add_argument("--display", action="store_true", help="show a window per drone")
+    ap.add_argument("--stats-interval", type=float, default=5.0, help="seconds between the stats reports")
+    args = ap.parse_args()
+    if not args.drone and not args.replay:
+        ap.error("give at least one --drone or --replay")
+
+    pool = SharedDetectorPool("./haarcascade_frontalface_default.xml", workers=args.workers, backend=args.detector)
+    fleet = FleetSupervisor(pool)
+    for i, spec in enumerate(args.drone):
+        (address, _, interface) = spec.partition("@")
+        tello = connect_tello(address, interface or None)
+        telemetry = TelemetryIngester(host=tello.local_ip or "0.0.0.0").start()
+        fleet.add_drone(f"tello{i}", tello, telemetry=telemetry, fly=args.fly, max_speed_limit=args.max_speed_limit)
+    for i, video in enumerate(args.replay):
+        frame_source = FileFrameSource(video)
+        # replayed drones always "fly", the RecordingTello logs the rc commands
+        fleet.add_drone(f"replay{i}", RecordingTello(frame_source), frame_source=frame_source, fly=True,
+                        max_speed_limit=args.max_speed_limit)
+
+    # ctrl-c stops the fleet, every drone is landed in stop()
+    signal.signal(signal.SIGINT, lambda signum, frame: fleet.exit_event.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: fleet.exit_event.set())
+
+    start = time.time()
+    print(f"Starting {len(fleet.drones)} drones with {pool.workers} detector workers")
+    fleet.start()
+    print(f"Fleet ready in {time.time() - start:.2f}s")
+
+    next_report = time.time() + args.stats_interval
+    while fleet.running and not fleet.exit_event.is_set():
+        if args.display:
+            for drone in fleet.drones:
+                frame = drone.annotated()
+                if frame is not None:
+                    cv2.imshow(drone.name, frame)
+            if cv2.waitKey(30) & 0xFF == ord("q"):
+                break
+        else:
+            fleet.exit_event.wait(0.1)
+
+        if time.time() >= next_report:
+            next_report += args.stats_interval
+            print(fleet.report())
+
+    fleet.stop()
+    if args.display:
+        cv2.destroyAllWindows()
+    print()
+    print(fleet.report())
+    for drone in fleet.drones:
+        if isinstance(drone.tello, RecordingTello):
+            print(f"{drone.name}: rc commands sent {len(drone.tello.rc_commands)}")
@@ -0,0 +1,88 @@
+from pyimagesearch.flightlog import FlightLogReader
+import numpy as np
+import argparse
+
+"""
+Inspect a binary flight log written by tello_face_tracking.py (or replay-face-tracking.py --flight-log).
+
+The log is memory mapped, only the columns a command needs are read, so multi hour logs can be sliced by time
+without loading them.  Prints a summary of the selected range and can export it to csv.  Every record carries the
+index of the matching frame in the session's constant frame rate video.
+
+python flight-log.py flight_12-06-2020_08-19-53_PM.tlog
+python flight-log.py flight_12-06-2020_08-19-53_PM.tlog --start 30 --end 45 --csv slice.csv
+"""
+
+
+def column_format(dtype):
+    # integers and flags as is, floats with enough digits to read back the exact value,
+    # %.6g would round epoch timestamps to the 1000s
+    if dtype.kind in "biu":
+        return "%d"
+    return "%.9g" if dtype.itemsize <= 4 else "%.17g"
+
+
+def flatten(records, video_frames):
+    # one csv column per scalar, array fields get an index suffix
+    names, columns = ["video_frame"], [video_frames]
+    for name in records.dtype.names:
+        column = records[name]
+        if column.ndim == 1:
+            names.append(name)
+            columns.append(column)
+        else:
+            for i in range(column.shape[1]):
+                names.append(f"{name}_{i}")
+                columns.append(column[:, i])
+    formats = [column_format(c.dtype) for c in columns]
+    return names, formats, np.column_stack([c.astype(np.float64) for c in columns])
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument("log", help="flight log file")
+    ap.add_argument("--start", type=float, default=None, help="seconds after the first frame")
+    ap.add_argument("--end", type=float, default=None, help="seconds after the first frame")
+    ap.add_argument("--csv", default=None, help="export the selected records to this csv file")
+    args = ap.parse_args()
+
+    log = FlightLogReader(args.log)
+    print(f"{args.log}: {len(log)} records in {len(log.block_counts)} blocks")
+    print(f"header: { {k: v for k, v in log.header.items() if k != 'dtype'} }")
+    if not len(log):
+        raise SystemExit
+
+    t0 = float(log.column("frame_time", 0, 1)[0])
+    start, stop = 0, len(log)
+    if args.start is not None or args.end is not None:
+        start, stop = log.between(t0 + (args.start or 0), t0 + args.end if args.end is not None else np.inf)
+
+    frame_time = log.column("frame_time", start, stop)
+    if not len(frame_time):
+        raise SystemExit("no records in that range")
+    duration = frame_time[-1] - frame_time[0]
+    has_rect = log.column("has_rect", start, stop)
+    has_target = log.column("has_target", start, stop)
+    rc = log.column("rc", start, stop)
+    pan_error = log.column("pan_error", start, stop)[has_target]
+    tilt_error = log.column("tilt_error", start, stop)[has_target]
+    video_frames = log.video_frames(start=start, stop=stop)
+
+    print(f"records {start}-{stop}: {frame_time[0] - t0:.2f}s - {frame_time[-1] - t0:.2f}s "
+          f"({duration:.2f}s, {len(frame_time) / duration if duration > 0 else 0:.1f} fps), "
+          f"video frames {video_frames[0]}-{video_frames[-1]}")
+    print(f"detections {has_rect.mean():.1%}, target {has_target.mean():.1%}")
+    if len(pan_error):
+        print(f"pan error mean {np.abs(pan_error).mean():.1f}px max {np.abs(pan_error).max():.0f}px, "
+              f"tilt error mean {np.abs(tilt_error).mean():.1f}px max {np.abs(tilt_error).max():.0f}px")
+    print(f"rc left/right mean {np.abs(rc[:, 0]).mean():.1f} max {np.abs(rc[:, 0]).max()}, "
+          f"up/down mean {np.abs(rc[:, 2]).mean():.1f} max {np.abs(rc[:, 2]).max()}")
+    battery = log.column("bat", start, stop)
+    battery = battery[~np.isnan(battery)]
+    if len(battery):
+        print(f"battery {battery[0]:.0f}% -> {battery[-1]:.0f}%")
+
+    if args.csv:
+        names, formats, table = flatten(log.records(start, stop), video_frames)
+        np.savetxt(args.csv, table, delimiter=",", header=",".join(names), comments="", fmt=formats)
+        print(f"{stop - start} records written to {args.csv}")
@@ -0,0 +1,75 @@
+from pyimagesearch.mission import MissionExecutor, load_mission, format_report
+from pyimagesearch.telemetry import TelemetryIngester
+from pyimagesearch.videorecorder import VideoRecorder
+from pyimagesearch.mocktello import RecordingTello
+import argparse
+import signal
+
+"""
+Fly a scripted mission from a YAML or JSON file.
+
+name: square
+steps:
+  - takeoff
+  - glide: {direction: forward, cm: 100}
+  - rotate: 90
+  - rc: {forward_backward: 30, yaw: 45, seconds: 4}
+  - hover: 1
+  - picture: tello-picture.png
+  - land
+
+Each step may set its own timeout.  A failed or timed out step, or Ctrl-C, lands the drone.  Prints the planned and
+actual duration of every step when the mission is over.
+
+python fly-mission.py square.yaml --record
+python fly-mission.py square.yaml --dry-run
+"""
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument("mission", help="mission file, .yaml/.yml or .json")
+    ap.add_argument("--record", action="store_true", help="record the video of the flight")
+    ap.add_argument("--rc-rate", type=int, default=20, help="rc commands per second in velocity segments")
+    ap.add_argument("--dry-run", action="store_true", help="run against a stand in drone that never flies")
+    args = ap.parse_args()
+
+    mission = load_mission(args.mission)
+    print(f"Mission {mission.name}: {len(mission.steps)} steps, planned {mission.planned:.1f}s")
+
+    telemetry = None
+    if args.dry_run:
+        tello = RecordingTello()
+    else:
+        from djitellopy import Tello
+        telemetry = TelemetryIngester().start()
+        tello = Tello()
+        tello.connect()
+        if telemetry.wait_for_state(timeout=3):
+            print(f"Battery Life Pecentage: {int(telemetry.latest('bat'))}")
+
+    frame_read = None
+    recorder = None
+    needs_video = args.record or any(step.kind == "picture" for step in mission.steps)
+    if needs_video and not args.dry_run:
+        tello.streamon()
+        frame_read = tello.get_frame_read()
+    if args.record and frame_read is not None:
+        recorder = VideoRecorder()
+
+    executor = MissionExecutor(tello, frame_read=frame_read, recorder=recorder, telemetry=telemetry,
+                               rc_rate=args.rc_rate)
+    # Ctrl-C aborts to land instead of leaving the drone in the air
+    signal.signal(signal.SIGINT, lambda signum, frame: executor.abort())
+    results = executor.run(mission)
+    print(format_report(results))
+
+    if recorder is not None:
+        recorder.release()
+        print(f"Video: {', '.join(recorder.stats()['files'])}")
+    if frame_read is not None:
+        tello.streamoff()
+    if telemetry is not None:
+        telemetry.stop()
+    if args.dry_run:
+        print("Commands:", ", ".join(command for (_, command) in tello.commands))
+        print(f"rc commands sent: {len(tello.rc_commands)}")
@@ -1,12 +1,20 @@
 from djitellopy import Tello
+from pyimagesearch.telemetry import TelemetryIngester
 import time
 
+# the drone pushes its state to port 8890 once it is in SDK mode
+telemetry = TelemetryIngester().start()
+
 print("Create Tello object")
 tello = Tello()
 
 print("Connect to Tello Drone")
 tello.connect()
 
-print(f"Battery Life Pecentage: {tello.get_battery()}")
-
+if telemetry.wait_for_state(timeout=3):
+    print(f"Battery Life Pecentage: {int(telemetry.latest('bat'))}")
+else:
+    # no state stream, ask on the command channel
+    print(f"Battery Life Pecentage: {tello.get_battery()}")
 
+telemetry.stop()
@@ -1,46 +1,90 @@
 # simple example demonstrating how to control a Tello using your keyboard.
-# For a more fully featured example see manual-control-pygame.py
 #
-# Use W, A, S, D for moving, E, Q for rotating and R, F for going up and down.
-# When starting the script the Tello will takeoff, pressing ESC makes it land
-#  and the script exit.
+# Hold W, A, S, D for moving, E, Q for rotating and R, F for going up and down.  The drone
+#  moves while a key is held and stops when it is released.  + and - change the speed,
+#  T takes off, L lands, ESC lands and exits.
+#
+# Held keys become rc velocities that a scheduler thread resends 20 times a second, takeoff
+#  and land run on a worker thread, so the video never freezes waiting for the drone to
+#  answer.  The time from a key event to the rc command it produced is shown on screen.
+#
+# python manual-control-opencv.py
+# python manual-control-opencv.py --replay video_12-06-2020_08-19-53_PM.mp4   (no drone)
 
-from djitellopy import Tello
-import cv2, math, time
+from pyimagesearch.manualcontrol import ManualController
+from pyimagesearch.telemetry import TelemetryIngester
+import argparse
+import time
+import cv2
 
-tello = Tello()
-tello.connect()
+ap = argparse.ArgumentParser()
+ap.add_argument("--speed", type=int, default=50, help="rc speed of a held key, 10-100")
+ap.add_argument("--rc-rate", type=int, default=20, help="rc commands per second")
+ap.add_argument("--replay", default=None, help="practice on a recorded video with a stand in drone")
+args = ap.parse_args()
 
-tello.streamon()
-frame_read = tello.get_frame_read()
+telemetry = None
+if args.replay:
+    from pyimagesearch.framesource import FileFrameSource
+    from pyimagesearch.mocktello import RecordingTello
+    frame_source = FileFrameSource(args.replay, loop=True)
+    tello = RecordingTello(frame_source)
+else:
+    from djitellopy import Tello
+    telemetry = TelemetryIngester().start()
+    tello = Tello()
+    tello.connect()
+    tello.streamon()
+    frame_read = tello.get_frame_read()
 
-tello.takeoff()
+controller = ManualController(tello, speed=args.speed, rc_rate=args.rc_rate).start()
 
+frames = 0
+fps = 0.0
+fps_start = time.time()
 while True:
-    # In reality you want to display frames in a seperate thread. Otherwise
-    #  they will freeze while the drone moves.
-    img = frame_read.framew
-    cv2.imshow("drone", img)
+    img = frame_source.read() if args.replay else frame_read.frame
+    if img is not None:
+        img = img.copy()
+        latency = controller.latency.summary()
+        lines = [
+            f"{controller.status}  speed {controller.speed}  rc {controller.setpoint}",
+            f"key to command p50 {latency['p50']:.0f}ms p95 {latency['p95']:.0f}ms  display {fps:.0f} fps",
+        ]
+        if telemetry is not None and telemetry.count:
+            lines.append(f"battery {telemetry.latest('bat'):.0f}%  height {telemetry.latest('h'):.0f}cm")
+        for i, line in enumerate(lines):
+            cv2.putText(img, line, (10, 25 + 25 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2, cv2.LINE_AA)
+        cv2.imshow("drone", img)
+
+        frames += 1
+        if time.time() - fps_start >= 1.0:
+            fps = frames / (time.time() - fps_start)
+            frames = 0
+            fps_start = time.time()
 
-    key = cv2.waitKey(1) & 0xff
+    key = cv2.waitKey(10)
+    key = key & 0xff if key != -1 else -1
     if key == 27: # ESC
         break
-    elif key == ord('w'):
-        tello.move_forward(30)
-    elif key == ord('s'):
-        tello.move_back(30)
-    elif key == ord('a'):
-        tello.move_left(30)
-    elif key == ord('d'):
-        tello.move_right(30)
-    elif key == ord('e'):
-        tello.rotate_clockwise(30)
-    elif key == ord('q'):
-        tello.rotate_counter_clockwise(30)
-    elif key == ord('r'):
-        tello.move_up(30)
-    elif key == ord('f'):
-        tello.move_down(30)
-
-tello.land()
-tello.streamoff()
+    elif key == ord('t'):
+        controller.takeoff()
+    elif key == ord('l'):
+        controller.land()
+    elif key in (ord('+'), ord('=')):
+        controller.change_speed(10)
+    elif key == ord('-'):
+        controller.change_speed(-10)
+
+    controller.update(key)
+
+# wait for the land command, even if a takeoff is still in progress
+controller.land(wait=True)
+controller.stop()
+print(f"Manual control stats: {controller.stats()}")
+cv2.destroyAllWindows()
+if args.replay:
+    frame_source.release()
+else:
+    tello.streamoff()
+    telemetry.stop()
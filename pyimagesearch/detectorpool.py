@@ -0,0 +1,470 @@
+# import necessary packages
+from pyimagesearch.objcenter import ObjCenter
+from pyimagesearch.latency import LatencyHistogram
+from multiprocessing import Process, Queue
+from threading import Thread, Lock
+from queue import Empty
+import numpy as np
+import signal
+import time
+import os
+
+def _detector_worker(worker_id, haarPath, detector_kwargs, in_queue, out_queue):
+	# the parent owns the drone, do not inherit its handlers that land it
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
+	signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+	try:
+		# every worker loads its own cascade, CascadeClassifier objects
+		# cannot be shared between processes
+		obj_center = ObjCenter(haarPath, **detector_kwargs)
+		_detect_loop(worker_id, obj_center, in_queue, out_queue)
+	except Exception as e:
+		# hand the error to the parent instead of dying silently, see _raise_error()
+		out_queue.put((None, -3, worker_id, e, 0.0))
+
+
+def _detect_loop(worker_id, obj_center, in_queue, out_queue):
+	while True:
+		item = in_queue.get()
+		if item is None:
+			break
+
+		# key says which drone the frame came from when the pool is shared,
+		# roi_rect is the face the parent accepted last, see ObjCenter.next_roi()
+		(key, seq, frame, roi_rect) = item
+		start = time.time()
+		if seq == -2:
+			# new detection settings, see DetectorPool.set_quality()
+			obj_center.set_quality(frame)
+			continue
+		if seq < 0:
+			# warm up frame, see DetectorPool.warm_up()
+			obj_center.warm_up(frame.shape)
+			out_queue.put((key, seq, worker_id, np.zeros((0, 4)), time.time() - start))
+			continue
+		rects = obj_center.scan(frame, roi_rect)
+		out_queue.put((key, seq, worker_id, np.asarray(rects).reshape(-1, 4), time.time() - start))
+
+
+def _raise_error(worker_id, error):
+	raise RuntimeError(f"detector worker {worker_id} failed: {error!r}") from error
+
+
+class DetectorPool:
+	"""
+	Runs face detection in a pool of worker processes so a slow detectMultiScale
+	call never stalls the control loop.
+
+	Frames get a sequence number and are handed to the workers round robin.
+	Results come back out of order, only results newer than the last delivered
+	one are passed on (in sequence order), older ones are dropped as stale.
+	With roi_expand the parent picks the ROI of every frame from the last face
+	it accepted and sends it along, the workers only scan.
+	"""
+
+	def __init__(self, haarPath, workers=2, max_in_flight=2, target_filter=None, multi_tracker=None,
+			**detector_kwargs):
+		self.workers = workers
+		self.max_in_flight = max_in_flight
+		self.in_queues = [Queue() for _ in range(workers)]
+		for in_queue in self.in_queues:
+			# frames still queued for a dead worker must not hold up the exit
+			in_queue.cancel_join_thread()
+		self.out_queue = Queue()
+		self.processes = [Process(target=_detector_worker, daemon=True,
+			args=(i, haarPath, detector_kwargs, self.in_queues[i], self.out_queue))
+			for i in range(workers)]
+		for p in self.processes:
+			p.start()
+
+		# keeps the center / jitter bookkeeping (or the target filter and
+		# multi face tracker) and the ROI choice in sequence order
+		roi_kwargs = {name: value for (name, value) in detector_kwargs.items()
+			if name in ("roi_expand", "max_roi_misses", "full_scan_interval")}
+		self.locator = ObjCenter(None, target_filter=target_filter, multi_tracker=multi_tracker, **roi_kwargs)
+		self.timestamps = {}
+		self.rois = {}
+		# frame time of the detection update() located last
+		self.located_time = None
+
+		self.next_seq = 0
+		self.next_worker = 0
+		self.last_delivered = -1
+		self.in_flight = [0] * workers
+		self.submitted = 0
+		self.rejected = 0
+		self.delivered = 0
+		self.stale = 0
+		self.per_worker = [0] * workers
+		self.detect_time = 0.0
+		# smoothed detection time per frame spread over the workers, the frame
+		# period the pool can keep up with.  None until the first result
+		self.detect_load = None
+		self.start_time = time.time()
+
+	def warm_up(self, shape, timeout=10.0):
+		"""
+		Wait until every worker has loaded its detector and run it once on a blank frame.
+		"""
+		blank = np.zeros(shape, dtype=np.uint8)
+		for in_queue in self.in_queues:
+			in_queue.put((None, -1, blank, None))
+		deadline = time.time() + timeout
+		warmed_up = 0
+		while warmed_up < self.workers:
+			try:
+				(_, seq, worker, error, _) = self.out_queue.get(timeout=0.1)
+			except Empty:
+				self._check_workers()
+				if time.time() > deadline:
+					raise TimeoutError("detector workers did not warm up")
+				continue
+			if seq == -3:
+				_raise_error(worker, error)
+			warmed_up += 1
+
+	def _check_workers(self):
+		# a worker that died without reporting, e.g. killed or crashed in OpenCV
+		for worker, process in enumerate(self.processes):
+			if not process.is_alive():
+				raise RuntimeError(f"detector worker {worker} exited with code {process.exitcode}")
+
+	def set_quality(self, settings):
+		# every worker applies the settings before its next frame
+		self.locator.set_quality(settings)
+		for in_queue in self.in_queues:
+			in_queue.put((None, -2, settings, None))
+
+	def submit(self, frame, timestamp=None):
+		"""
+		Queue a frame for detection.  Returns its sequence number, or None when
+		every worker already has max_in_flight frames queued.
+		"""
+		for i in range(self.workers):
+			worker = (self.next_worker + i) % self.workers
+			if self.in_flight[worker] < self.max_in_flight:
+				break
+		else:
+			self.rejected += 1
+			return None
+
+		seq = self.next_seq
+		self.next_seq += 1
+		self.next_worker = (worker + 1) % self.workers
+		self.in_flight[worker] += 1
+		self.submitted += 1
+
+		# the queue pickles in a background thread, so the frame must not
+		# change after it was submitted
+		self.rois[seq] = self.locator.next_roi()
+		self.in_queues[worker].put((None, seq, frame.copy(), self.rois[seq]))
+		self.timestamps[seq] = time.time() if timestamp is None else timestamp
+		return seq
+
+	def results(self, timeout=0):
+		"""
+		Collect finished detections as a list of (seq, rects) in sequence order.
+		"""
+		fresh = []
+		block = timeout > 0
+		while True:
+			try:
+				(_, seq, worker, rects, detect_time) = self.out_queue.get(block=block, timeout=timeout if block else None)
+			except Empty:
+				break
+			block = False
+			if seq == -3:
+				_raise_error(worker, rects)
+
+			self.in_flight[worker] -= 1
+			self.per_worker[worker] += 1
+			self.detect_time += detect_time
+			load = detect_time / self.workers
+			self.detect_load = load if self.detect_load is None else self.detect_load + 0.2 * (load - self.detect_load)
+			fresh.append((seq, rects))
+
+		if not fresh and any(self.in_flight):
+			self._check_workers()
+
+		fresh.sort(key=lambda result: result[0])
+		delivered = []
+		for (seq, rects) in fresh:
+			if seq <= self.last_delivered:
+				# a newer frame was already delivered
+				self.timestamps.pop(seq, None)
+				self.rois.pop(seq, None)
+				self.stale += 1
+				continue
+			self.last_delivered = seq
+			self.delivered += 1
+			delivered.append((seq, rects))
+
+		return delivered
+
+	def update(self, frame, frameCenter=None, timestamp=None):
+		"""
+		Drop in for ObjCenter.update.  Submits the frame and returns the located
+		face of the newest finished detection, or None if none finished yet.
+		With a target filter the prediction is returned while waiting instead.
+		"""
+		self.submit(frame, timestamp)
+		delivered = self.results()
+		if not delivered:
+			if self.locator.target_filter is not None:
+				return (self.locator.estimate(), None, -1)
+			return None
+
+		for (seq, rects) in delivered:
+			self.located_time = self.timestamps.pop(seq, None)
+			self.locator.scanned(self.rois.pop(seq, None), rects)
+			located = self.locator.locate(rects, frameCenter, self.located_time)
+		return located
+
+	@property
+	def queue_depth(self):
+		return sum(self.in_flight)
+
+	def stats(self):
+		elapsed = time.time() - self.start_time
+		completed = sum(self.per_worker)
+		return {
+			"workers": self.workers,
+			"submitted": self.submitted,
+			"rejected": self.rejected,
+			"delivered": self.delivered,
+			"stale": self.stale,
+			"queue_depth": self.queue_depth,
+			"per_worker": list(self.per_worker),
+			"throughput_fps": self.delivered / elapsed if elapsed > 0 else 0.0,
+			"mean_detect_ms": 1000 * self.detect_time / completed if completed else 0.0,
+		}
+
+	def close(self):
+		for q in self.in_queues:
+			q.put(None)
+		for p in self.processes:
+			p.join(timeout=1)
+			if p.is_alive():
+				p.terminate()
+
+
+class SharedDetectorPool:
+	"""
+	One pool of detector worker processes shared by several drones.
+
+	The pool is sized to the cores of the ground station (one worker per core,
+	leaving one for the control loops), not to the number of drones.  Each drone
+	talks to it through its own DetectorChannel, a drop in for DetectorPool.
+	Frames go to the least loaded worker and are tagged with the drone's key.  A
+	router thread hands the results back to the channel they came from.  No
+	drone can hold more than its share of the in flight slots, so one fast
+	camera cannot starve the others.
+	"""
+
+	def __init__(self, haarPath, workers=None, max_in_flight=2, **detector_kwargs):
+		if workers is None:
+			workers = max((os.cpu_count() or 2) - 1, 1)
+		self.workers = workers
+		self.max_in_flight = max_in_flight
+		self.in_queues = [Queue() for _ in range(workers)]
+		for in_queue in self.in_queues:
+			# frames still queued for a dead worker must not hold up the exit
+			in_queue.cancel_join_thread()
+		self.out_queue = Queue()
+		self.processes = [Process(target=_detector_worker, daemon=True,
+			args=(i, haarPath, detector_kwargs, self.in_queues[i], self.out_queue))
+			for i in range(workers)]
+		for p in self.processes:
+			p.start()
+
+		self._lock = Lock()
+		self.channels = {}
+		self.in_flight = [0] * workers
+		self.per_worker = [0] * workers
+		self.detect_time = 0.0
+		self.warmed_up = 0
+		# (worker, exception) of a worker that failed, raised to the drones by
+		# the router's callers
+		self.error = None
+		self.start_time = time.time()
+
+		self._router = Thread(target=self._route, daemon=True)
+		self._router.start()
+
+	def channel(self, key, target_filter=None, multi_tracker=None):
+		channel = DetectorChannel(self, key, target_filter=target_filter, multi_tracker=multi_tracker)
+		with self._lock:
+			self.channels[key] = channel
+		return channel
+
+	def warm_up(self, shape, timeout=10.0):
+		"""
+		Wait until every worker has loaded its detector and run it once on a blank frame.
+		"""
+		blank = np.zeros(shape, dtype=np.uint8)
+		for in_queue in self.in_queues:
+			in_queue.put((None, -1, blank, None))
+		deadline = time.time() + timeout
+		while self.warmed_up < self.workers:
+			self._check_workers()
+			if time.time() > deadline:
+				raise TimeoutError("detector workers did not warm up")
+			time.sleep(0.01)
+
+	def _check_workers(self):
+		if self.error is not None:
+			_raise_error(*self.error)
+		DetectorPool._check_workers(self)
+
+	def _submit(self, channel, frame):
+		# returns the worker the frame went to, or None when there is no free slot for this channel
+		with self._lock:
+			share = max(1, -(-self.workers * self.max_in_flight // len(self.channels)))
+			if channel.in_flight >= share:
+				return None
+			worker = int(np.argmin(self.in_flight))
+			if self.in_flight[worker] >= self.max_in_flight:
+				return None
+			self.in_flight[worker] += 1
+			channel.in_flight += 1
+		return worker
+
+	def _route(self):
+		while True:
+			item = self.out_queue.get()
+			if item is None:
+				break
+			(key, seq, worker, rects, detect_time) = item
+			with self._lock:
+				if seq == -3:
+					self.error = (worker, rects)
+					continue
+				if seq < 0:
+					self.warmed_up += 1
+					continue
+				self.in_flight[worker] -= 1
+				self.per_worker[worker] += 1
+				self.detect_time += detect_time
+				channel = self.channels.get(key)
+				if channel is not None:
+					channel.in_flight -= 1
+					channel._inbox.append((seq, rects))
+
+	@property
+	def queue_depth(self):
+		return sum(self.in_flight)
+
+	def stats(self):
+		elapsed = time.time() - self.start_time
+		completed = sum(self.per_worker)
+		return {
+			"workers": self.workers,
+			"channels": len(self.channels),
+			"queue_depth": self.queue_depth,
+			"per_worker": list(self.per_worker),
+			"throughput_fps": completed / elapsed if elapsed > 0 else 0.0,
+			"mean_detect_ms": 1000 * self.detect_time / completed if completed else 0.0,
+		}
+
+	def close(self):
+		for q in self.in_queues:
+			q.put(None)
+		for p in self.processes:
+			p.join(timeout=1)
+			if p.is_alive():
+				p.terminate()
+		self.out_queue.put(None)
+		self._router.join(timeout=1)
+
+
+class DetectorChannel:
+	"""
+	One drone's view of a SharedDetectorPool, with the same submit / results /
+	update API as DetectorPool.  Sequence numbers, stale result dropping and the
+	center / target filter bookkeeping are kept per drone.
+	"""
+
+	def __init__(self, pool, key, target_filter=None, multi_tracker=None):
+		self.pool = pool
+		self.key = key
+		self.locator = ObjCenter(None, target_filter=target_filter, multi_tracker=multi_tracker)
+		self.timestamps = {}
+		# the shared pool scans full frames, no ROI
+		self.rois = {}
+		self.located_time = None
+		self._submitted_at = {}
+		self._inbox = []
+		self.in_flight = 0
+
+		self.next_seq = 0
+		self.last_delivered = -1
+		self.submitted = 0
+		self.rejected = 0
+		self.delivered = 0
+		self.stale = 0
+		# submit to delivery, queueing and routing included
+		self.latency = LatencyHistogram()
+		self.start_time = time.time()
+
+	def submit(self, frame, timestamp=None):
+		worker = self.pool._submit(self, frame)
+		if worker is None:
+			self.rejected += 1
+			return None
+
+		seq = self.next_seq
+		self.next_seq += 1
+		self.submitted += 1
+		now = time.time()
+		self.timestamps[seq] = now if timestamp is None else timestamp
+		self._submitted_at[seq] = now
+		self.pool.in_queues[worker].put((self.key, seq, frame.copy(), None))
+		return seq
+
+	def results(self, timeout=0):
+		deadline = time.time() + timeout
+		while True:
+			with self.pool._lock:
+				fresh, self._inbox = self._inbox, []
+			if fresh or time.time() >= deadline:
+				break
+			time.sleep(0.001)
+		if not fresh and self.in_flight:
+			self.pool._check_workers()
+
+		fresh.sort(key=lambda result: result[0])
+		now = time.time()
+		delivered = []
+		for (seq, rects) in fresh:
+			submitted_at = self._submitted_at.pop(seq, None)
+			if seq <= self.last_delivered:
+				self.timestamps.pop(seq, None)
+				self.rois.pop(seq, None)
+				self.stale += 1
+				continue
+			self.last_delivered = seq
+			self.delivered += 1
+			if submitted_at is not None:
+				self.latency.record(now - submitted_at)
+			delivered.append((seq, rects))
+		return delivered
+
+	# same submit, collect and locate steps as the private pool
+	update = DetectorPool.update
+
+	def warm_up(self, shape):
+		# the pool warms its workers up once for every drone
+		pass
+
+	def stats(self):
+		elapsed = time.time() - self.start_time
+		return {
+			"submitted": self.submitted,
+			"rejected": self.rejected,
+			"delivered": self.delivered,
+			"stale": self.stale,
+			"in_flight": self.in_flight,
+			"throughput_fps": self.delivered / elapsed if elapsed > 0 else 0.0,
+			"latency_ms": self.latency.summary(),
+		}
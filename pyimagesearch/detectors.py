@@ -0,0 +1,121 @@
+# import necessary packages
+import numpy as np
+import os
+import cv2
+
+# the repo ships its cascades next to the scripts, then the places OpenCV
+# installs them, pip wheels only ship the Haar ones
+_CASCADE_DIRS = [
+	".",
+	os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+	os.path.dirname(os.path.abspath(__file__)),
+	getattr(getattr(cv2, "data", None), "haarcascades", ""),
+	"/usr/share/opencv4/lbpcascades",
+	"/usr/share/opencv/lbpcascades",
+	"/usr/local/share/opencv4/lbpcascades",
+	"/usr/local/share/opencv/lbpcascades",
+	"/opt/homebrew/share/opencv4/lbpcascades",
+]
+
+def find_cascade(names):
+	for directory in _CASCADE_DIRS:
+		for name in names:
+			path = os.path.join(directory, name)
+			if directory and os.path.isfile(path):
+				return path
+	return None
+
+
+class CascadeDetector:
+	"""
+	Face detector backed by an OpenCV cascade classifier.
+	"""
+
+	default_files = ("haarcascade_frontalface_default.xml",)
+
+	def __init__(self, path=None, scale_factor=1.05, min_neighbors=9, min_size=(30, 30)):
+		if path is not None and not os.path.isfile(path):
+			raise IOError(f"{type(self).__name__}: cascade file not found: {path}")
+		if path is None:
+			path = find_cascade(self.default_files)
+		if path is None:
+			raise IOError(f"{type(self).__name__}: cascade file not found, looked for {self.default_files} "
+				f"in {[d for d in _CASCADE_DIRS if d]}")
+		self.path = path
+		self.classifier = cv2.CascadeClassifier(path)
+		if self.classifier.empty():
+			raise IOError(f"{type(self).__name__}: could not load cascade {path}")
+		self.scale_factor = scale_factor
+		self.min_neighbors = min_neighbors
+		self.min_size = tuple(min_size)
+
+	def detect(self, frame):
+		# convert the frame to grayscale
+		gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+		# detect all faces in the input frame
+		return self.classifier.detectMultiScale(gray, scaleFactor=self.scale_factor,
+			minNeighbors=self.min_neighbors, minSize=self.min_size,
+			flags=cv2.CASCADE_SCALE_IMAGE)
+
+
+class HaarDetector(CascadeDetector):
+	"""
+	The original Haar frontal face cascade, the most accurate and slowest backend.
+	"""
+
+	default_files = ("haarcascade_frontalface_default.xml",)
+
+
+class LBPDetector(CascadeDetector):
+	"""
+	OpenCV's LBP frontal face cascade.  It uses integer features, so it is
+	several times faster per frame than Haar, with somewhat more misses.  pip
+	OpenCV does not ship the LBP cascades, so lbpcascade_frontalface_improved.xml
+	from opencv/data/lbpcascades is kept next to the Haar cascade.
+	"""
+
+	default_files = ("lbpcascade_frontalface_improved.xml", "lbpcascade_frontalface.xml")
+
+
+class SkinDetector:
+	"""
+	Coarse, very low latency backend: threshold skin colored pixels in YCrCb,
+	clean the mask up and return the bounding boxes of the largest blobs.  It
+	finds hands and arms as readily as faces, so only use it when the face is
+	the dominant skin colored object in view.
+	"""
+
+	def __init__(self, path=None, scale_factor=None, min_neighbors=None, min_size=(30, 30), max_blobs=3,
+			lower=(0, 133, 77), upper=(255, 173, 127)):
+		# the cascade parameters are accepted so backends can be swapped by name
+		self.min_size = tuple(min_size)
+		self.max_blobs = max_blobs
+		self.lower = np.array(lower, dtype=np.uint8)
+		self.upper = np.array(upper, dtype=np.uint8)
+		self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+
+	def detect(self, frame):
+		ycrcb = cv2.cvtColor(frame, cv2.COLOR_BGR2YCrCb)
+		mask = cv2.inRange(ycrcb, self.lower, self.upper)
+		mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self.kernel)
+
+		(count, _, stats, _) = cv2.connectedComponentsWithStats(mask, connectivity=8)
+		# label 0 is the background, biggest blobs first
+		blobs = sorted(range(1, count), key=lambda i: stats[i, cv2.CC_STAT_AREA], reverse=True)
+		rects = [stats[i, :4] for i in blobs[:self.max_blobs]
+			if stats[i, cv2.CC_STAT_WIDTH] >= self.min_size[0] and stats[i, cv2.CC_STAT_HEIGHT] >= self.min_size[1]]
+		return np.array(rects, dtype=np.int32).reshape(-1, 4)
+
+
+# detector backends by name, see create_detector()
+DETECTORS = {
+	"haar": HaarDetector,
+	"lbp": LBPDetector,
+	"skin": SkinDetector,
+}
+
+def create_detector(name, **kwargs):
+	if name not in DETECTORS:
+		raise ValueError(f"unknown detector backend {name!r}, choose from {sorted(DETECTORS)}")
+	return DETECTORS[name](**kwargs)
@@ -0,0 +1,303 @@
+# import necessary packages
+from pyimagesearch.rcscheduler import RCScheduler
+from pyimagesearch.latency import LatencyHistogram
+from pyimagesearch.overlay import FRAME_META_DTYPE, draw_overlay
+from pyimagesearch.targetfilter import TargetFilter
+from pyimagesearch.pid import PIDBank
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread, Event
+import numpy as np
+import socket
+import time
+import cv2
+
+# Linux only, the socket module has no name for it before Python 3.12
+SO_BINDTODEVICE = getattr(socket, "SO_BINDTODEVICE", 25)
+
+def interface_address(interface):
+	# IPv4 address of a network interface, Linux SIOCGIFADDR
+	import fcntl
+	import struct
+	with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+		request = struct.pack("256s", interface.encode("ascii")[:15])
+		return socket.inet_ntoa(fcntl.ioctl(sock.fileno(), 0x8915, request)[20:24])
+
+
+def connect_tello(address, interface=None):
+	"""
+	Tello for the drone at address, reached through the network interface
+	named interface (e.g. "wlan1").
+
+	Every Tello is an access point on 192.168.10.1 handing out 192.168.10.x,
+	so with one wifi adapter per drone all the adapters share a subnet and
+	binding a socket to an adapter's address does not pick the interface the
+	commands leave through.  The command socket is pinned to the interface
+	with SO_BINDTODEVICE (Linux, needs root or CAP_NET_RAW).  The drone sends
+	its video and state to the address the commands came from, on fixed
+	ports, so the adapters need different addresses (set them statically, the
+	drones' DHCP all hand out the same one) and the video and state sockets
+	are bound to them.  The replies arrive from the same 192.168.10.1 on every
+	interface, so reverse path filtering must be loose (rp_filter=2).
+	"""
+	from djitellopy import Tello
+	import threading
+
+	local_ip = interface_address(interface) if interface else None
+
+	class FleetTello(Tello):
+		VS_UDP_IP = local_ip or Tello.VS_UDP_IP
+
+		def __init__(self):
+			self.address = (address, self.UDP_PORT)
+			self.local_ip = local_ip
+			self.clientSocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+			if interface:
+				self.clientSocket.setsockopt(socket.SOL_SOCKET, SO_BINDTODEVICE, interface.encode("ascii"))
+			self.clientSocket.bind((local_ip or "", self.UDP_PORT))
+			self.response = None
+			self.stream_on = False
+
+			thread = threading.Thread(target=self.run_udp_receiver, daemon=True)
+			thread.start()
+
+	return FleetTello()
+
+
+class FleetDrone:
+	"""
+	One drone of a fleet: its connection, frame source, optional telemetry,
+	PID bank and rc scheduler, and the tracking loop that runs on its own
+	thread.  Detection is done by the fleet's shared pool through channel.  The
+	newest frame and its FRAME_META_DTYPE record are kept for display.
+	"""
+
+	def __init__(self, name, tello, channel, frame_source=None, telemetry=None, fly=False, max_speed_limit=40,
+			rc_rate=20, frame_size=(400, 300)):
+		self.name = name
+		self.tello = tello
+		self.channel = channel
+		self.frame_source = frame_source
+		self.telemetry = telemetry
+		self.fly = fly
+		self.max_speed_limit = max_speed_limit
+		self.rc_rate = rc_rate
+		self.frame_size = frame_size
+
+		self.pid = PIDBank(kP=0.7, kI=0.0001, kD=0.1, axes=2, output_limit=max_speed_limit)
+		self.rc_scheduler = None
+		self.flying = False
+		self.latest = None
+		self._thread = None
+
+		self.frames = 0
+		self.commands = 0
+		self.start_time = None
+		self.end_time = None
+		# frame of a fresh detection to the rc setpoint it produced
+		self.command_latency = LatencyHistogram()
+		self.loop_time = LatencyHistogram()
+
+	def connect(self):
+		# the handshakes of all drones run in parallel, see FleetSupervisor.start()
+		from pyimagesearch.framesource import LiveFrameSource
+		self.tello.connect()
+		self.tello.streamon()
+		if self.frame_source is None:
+			self.frame_source = LiveFrameSource(self.tello)
+
+	def takeoff(self):
+		if self.fly:
+			self.tello.takeoff()
+			self.flying = True
+			self.tello.move_up(70)
+			self.rc_scheduler = RCScheduler(self.tello, rate=self.rc_rate).start()
+
+	def start(self, exit_event):
+		self._thread = Thread(target=self._run, args=(exit_event,), name=f"drone-{self.name}", daemon=True)
+		self._thread.start()
+		return self
+
+	def _run(self, exit_event):
+		(W, H) = self.frame_size
+		centerX = W // 2
+		centerY = H // 2
+		self.pid.initialize()
+		self.start_time = time.time()
+
+		while not exit_event.is_set():
+			loop_start = time.time()
+			image = self.frame_source.read()
+			if image is None:
+				# end of a replayed video
+				break
+			frame = cv2.resize(image, (W, H))
+			frame_time = self.frame_source.frame_time
+
+			meta = np.zeros(1, FRAME_META_DTYPE)[0]
+			meta["frame_time"] = frame_time
+			meta["frame_center"] = (centerX, centerY)
+
+			located = self.channel.update(frame, frameCenter=None, timestamp=frame_time)
+			if located is not None:
+				(center, rect, _) = located
+				if rect is not None:
+					meta["has_rect"] = True
+					meta["rect"] = rect
+				if center is None:
+					self._publish(0, 0, 0, 0, frame_time=frame_time)
+				else:
+					(objX, objY) = center
+					meta["has_target"] = True
+					meta["center"] = (int(objX), int(objY))
+					pan_error = centerX - objX
+					tilt_error = centerY - objY
+					pan_update, tilt_update = self.pid.update((pan_error, tilt_error), now=frame_time)
+					meta["has_pid"] = True
+					meta["pan_error"] = pan_error
+					meta["tilt_error"] = tilt_error
+					meta["pan_output"] = pan_update
+					meta["tilt_output"] = tilt_update
+
+					# face to the right gives a negative error but needs a positive command
+					rc = (int(-pan_update // 3), 0, int(tilt_update // 2), 0)
+					meta["rc"] = rc
+					self._publish(*rc, frame_time=frame_time)
+					if rect is not None:
+						# the detection is of an older frame, predictions between detections do not count
+						self.command_latency.record(time.time() - self.channel.located_time)
+
+			meta["publish_time"] = time.time()
+			self.latest = (frame, meta)
+			self.frames += 1
+			self.loop_time.record(time.time() - loop_start)
+
+		self.end_time = time.time()
+
+	def _publish(self, *rc, frame_time=None):
+		self.commands += 1
+		if self.rc_scheduler is not None:
+			self.rc_scheduler.publish(*rc, frame_time=frame_time)
+
+	def annotated(self):
+		if self.latest is None:
+			return None
+		(frame, meta) = self.latest
+		return draw_overlay(frame.copy(), meta)
+
+	def join(self, timeout=None):
+		if self._thread is not None:
+			self._thread.join(timeout)
+
+	def land(self):
+		if self.rc_scheduler is not None:
+			self.rc_scheduler.stop()
+			self.rc_scheduler = None
+		if self.flying:
+			self.tello.land()
+			self.flying = False
+		self.tello.streamoff()
+		if self.telemetry is not None:
+			self.telemetry.stop()
+
+	def stats(self):
+		end = self.end_time or time.time()
+		elapsed = end - self.start_time if self.start_time else 0.0
+		stats = {
+			"frames": self.frames,
+			"fps": self.frames / elapsed if elapsed > 0 else 0.0,
+			"commands": self.commands,
+			"loop_ms": self.loop_time.summary(),
+			"command_latency_ms": self.command_latency.summary(),
+			"detector": self.channel.stats(),
+		}
+		if self.telemetry is not None and self.telemetry.count:
+			stats["bat"] = float(self.telemetry.latest("bat"))
+		return stats
+
+
+class FleetSupervisor:
+	"""
+	Owns the drones of a fleet and the detector pool they share.
+
+	start() connects all drones in parallel while the pool warms up, takes
+	them off once it is ready and starts one
+	tracking thread per drone.  The threads only read frames, run their PID bank
+	and publish rc setpoints, the detection runs in the pool's worker processes,
+	so the ground station's cores are used by the pool whatever the number of
+	drones.  stop() lands every drone and closes the pool, and stats() reports
+	per drone and aggregate throughput and latency.
+	"""
+
+	def __init__(self, pool, drones=None):
+		self.pool = pool
+		self.drones = [] if drones is None else drones
+		self.exit_event = Event()
+
+	def add_drone(self, name, tello, frame_source=None, telemetry=None, use_target_filter=True, **kwargs):
+		# the drone's channel keeps its own sequence numbers and target filter
+		channel = self.pool.channel(name, target_filter=TargetFilter() if use_target_filter else None)
+		drone = FleetDrone(name, tello, channel, frame_source=frame_source, telemetry=telemetry, **kwargs)
+		self.drones.append(drone)
+		return drone
+
+	def start(self, shape=(300, 400, 3)):
+		with ThreadPoolExecutor(max_workers=len(self.drones) + 1) as executor:
+			warm_up = executor.submit(self.pool.warm_up, shape)
+			handshakes = [executor.submit(drone.connect) for drone in self.drones]
+			for future in handshakes + [warm_up]:
+				future.result()
+			# only take off once the detectors are ready
+			for future in [executor.submit(drone.takeoff) for drone in self.drones]:
+				future.result()
+		for drone in self.drones:
+			drone.start(self.exit_event)
+		return self
+
+	@property
+	def running(self):
+		return any(drone._thread is not None and drone._thread.is_alive() for drone in self.drones)
+
+	def stop(self):
+		self.exit_event.set()
+		for drone in self.drones:
+			drone.join(timeout=2)
+		for drone in self.drones:
+			try:
+				drone.land()
+			except Exception as e:
+				print(f"[fleet] {drone.name}: landing failed: {e}")
+		self.pool.close()
+
+	def stats(self):
+		drones = {drone.name: drone.stats() for drone in self.drones}
+		command_latency = LatencyHistogram()
+		detector_latency = LatencyHistogram()
+		for drone in self.drones:
+			command_latency.merge(drone.command_latency)
+			detector_latency.merge(drone.channel.latency)
+		return {
+			"drones": drones,
+			"aggregate": {
+				"fps": sum(stats["fps"] for stats in drones.values()),
+				"detections_fps": sum(stats["detector"]["throughput_fps"] for stats in drones.values()),
+				"command_latency_ms": command_latency.summary(),
+				"detector_latency_ms": detector_latency.summary(),
+				"pool": self.pool.stats(),
+			},
+		}
+
+	def report(self):
+		stats = self.stats()
+		lines = []
+		for name, drone in stats["drones"].items():
+			detector = drone["detector"]
+			lines.append(f"{name}: {drone['fps']:.1f} fps, detections {detector['throughput_fps']:.1f}/s "
+				f"(rejected {detector['rejected']}, stale {detector['stale']}), "
+				f"detect p50/p95 {detector['latency_ms']['p50']:.1f}/{detector['latency_ms']['p95']:.1f}ms, "
+				f"command p50/p95 {drone['command_latency_ms']['p50']:.1f}/{drone['command_latency_ms']['p95']:.1f}ms")
+		aggregate = stats["aggregate"]
+		pool = aggregate["pool"]
+		lines.append(f"fleet: {aggregate['fps']:.1f} fps, detections {aggregate['detections_fps']:.1f}/s on "
+			f"{pool['workers']} workers {pool['per_worker']} ({pool['mean_detect_ms']:.1f}ms each), "
+			f"detect p50/p95 {aggregate['detector_latency_ms']['p50']:.1f}/{aggregate['detector_latency_ms']['p95']:.1f}ms")
+		return "\n".join(lines)
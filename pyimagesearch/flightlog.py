@@ -0,0 +1,218 @@
+# import necessary packages
+import numpy as np
+import struct
+import json
+import time
+
+# one record per processed frame, telemetry fields are NaN when there is no state stream
+FLIGHT_LOG_DTYPE = np.dtype([
+	("seq", np.int64),			# FrameRing sequence number of the frame
+	("frame_time", np.float64),		# when the frame was read
+	("publish_time", np.float64),		# when it was published, the recorder paces the video by it
+	("has_rect", np.bool_),
+	("rect", np.int32, 4),			# detection x, y, w, h
+	("d", np.float32),			# jitter distance, -1 when undefined
+	("has_target", np.bool_),
+	("center", np.int32, 2),		# followed face center
+	("pan_error", np.float32),
+	("tilt_error", np.float32),
+	("pan_terms", np.float32, 3),		# kP * error, kI * integral, kD * derivative
+	("tilt_terms", np.float32, 3),
+	("pan_output", np.float32),
+	("tilt_output", np.float32),
+	("rc", np.int16, 4),			# left/right, forward/back, up/down, yaw sent
+	("quality", np.int8),			# QualityGovernor level the frame was detected at
+	("bat", np.float32),
+	("h", np.float32),
+	("tof", np.float32),
+	("pitch", np.float32),
+	("roll", np.float32),
+	("yaw", np.float32),
+	("vgx", np.float32),
+	("vgy", np.float32),
+	("vgz", np.float32),
+])
+
+TELEMETRY_FIELDS = ("bat", "h", "tof", "pitch", "roll", "yaw", "vgx", "vgy", "vgz")
+
+_MAGIC = b"TELLOLOG"
+_VERSION = 1
+_FILE_HEADER = struct.Struct("<8sII")	# magic, version, json header length
+_BLOCK_HEADER = struct.Struct("<4sQ")	# block magic, record count
+_BLOCK_MAGIC = b"BLK1"
+
+def _descr(dtype):
+	return [[name, dtype.fields[name][0].base.str, list(dtype.fields[name][0].shape)] for name in dtype.names]
+
+def _dtype(descr):
+	return np.dtype([(name, base, tuple(shape)) for name, base, shape in descr])
+
+
+class FlightLogWriter:
+	"""
+	Appends per frame records to a compact binary flight log.
+
+	The file is a small json header followed by blocks of up to block_size
+	records.  Inside a block every field is stored as one contiguous column,
+	so a reader can memory map a single field of a multi hour log without
+	touching the others.  Records are collected in a preallocated buffer and
+	written a block at a time, so a crash loses at most one block.
+	"""
+
+	def __init__(self, path, dtype=FLIGHT_LOG_DTYPE, block_size=256, **info):
+		self.path = path
+		self.dtype = np.dtype(dtype)
+		self.block_size = block_size
+		self._buffer = np.zeros(block_size, dtype=self.dtype)
+		self._count = 0
+		self.records = 0
+		self.blocks = 0
+
+		# anything that helps link the log to the rest of the flight, e.g. the video prefix and fps
+		header = {"dtype": _descr(self.dtype), "block_size": block_size, "created": time.time()}
+		header.update(info)
+		header = json.dumps(header).encode("utf-8")
+
+		self._file = open(path, "wb")
+		self._file.write(_FILE_HEADER.pack(_MAGIC, _VERSION, len(header)))
+		self._file.write(header)
+		self._file.flush()
+
+	def next_record(self):
+		"""
+		Writable record for the next frame, cleared (telemetry to NaN).  Call commit() when it is filled.
+		"""
+		record = self._buffer[self._count]
+		self._buffer[self._count] = 0
+		for field in TELEMETRY_FIELDS:
+			if field in self.dtype.names:
+				record[field] = np.nan
+		return record
+
+	def commit(self):
+		self._count += 1
+		self.records += 1
+		if self._count == self.block_size:
+			self.flush()
+
+	def flush(self):
+		if self._count == 0:
+			return
+		self._file.write(_BLOCK_HEADER.pack(_BLOCK_MAGIC, self._count))
+		block = self._buffer[:self._count]
+		for name in self.dtype.names:
+			self._file.write(np.ascontiguousarray(block[name]).tobytes())
+		self._file.flush()
+		self._count = 0
+		self.blocks += 1
+
+	def close(self):
+		if self._file is not None:
+			self.flush()
+			self._file.close()
+			self._file = None
+
+
+class FlightLogReader:
+	"""
+	Memory mapped reader for a flight log written by FlightLogWriter.
+
+	Only the block headers are read when the log is opened.  column(name, start,
+	stop) and records(start, stop) gather just the requested range out of the
+	mapping, and a range that lies in a single block comes back without a
+	copy.  between(t0, t1) finds the records of a time range by frame_time.
+	"""
+
+	def __init__(self, path):
+		self.path = path
+		self._map = np.memmap(path, dtype=np.uint8, mode="r")
+
+		magic, version, header_len = _FILE_HEADER.unpack_from(self._map, 0)
+		if magic != _MAGIC:
+			raise ValueError(f"{path} is not a flight log")
+		if version != _VERSION:
+			raise ValueError(f"{path}: unsupported flight log version {version}")
+		offset = _FILE_HEADER.size
+		self.header = json.loads(bytes(self._map[offset:offset + header_len]).decode("utf-8"))
+		self.dtype = _dtype(self.header["dtype"])
+		offset += header_len
+
+		# index: file offset and first record of every block, a torn block at the end is ignored
+		offsets, counts = [], []
+		size = len(self._map)
+		while offset + _BLOCK_HEADER.size <= size:
+			block_magic, count = _BLOCK_HEADER.unpack_from(self._map, offset)
+			end = offset + _BLOCK_HEADER.size + count * self.dtype.itemsize
+			if block_magic != _BLOCK_MAGIC or end > size:
+				break
+			offsets.append(offset + _BLOCK_HEADER.size)
+			counts.append(count)
+			offset = end
+		self.block_offsets = np.array(offsets, dtype=np.int64)
+		self.block_counts = np.array(counts, dtype=np.int64)
+		self.block_starts = np.concatenate(([0], np.cumsum(self.block_counts)))
+
+		# where each field starts inside a block, relative to the block offset, per record
+		self._field_offsets = {}
+		position = 0
+		for name in self.dtype.names:
+			self._field_offsets[name] = position
+			position += self.dtype.fields[name][0].itemsize
+
+	def __len__(self):
+		return int(self.block_starts[-1])
+
+	@property
+	def fields(self):
+		return self.dtype.names
+
+	def _block_column(self, block, name):
+		field = self.dtype.fields[name][0]
+		count = int(self.block_counts[block])
+		offset = int(self.block_offsets[block]) + self._field_offsets[name] * count
+		return np.ndarray((count,) + field.shape, dtype=field.base, buffer=self._map, offset=offset)
+
+	def column(self, name, start=0, stop=None):
+		stop = len(self) if stop is None else min(stop, len(self))
+		if start >= stop:
+			field = self.dtype.fields[name][0]
+			return np.zeros((0,) + field.shape, dtype=field.base)
+
+		first = int(np.searchsorted(self.block_starts, start, side="right")) - 1
+		last = int(np.searchsorted(self.block_starts, stop, side="left")) - 1
+		parts = []
+		for block in range(first, last + 1):
+			begin = max(start - int(self.block_starts[block]), 0)
+			end = min(stop - int(self.block_starts[block]), int(self.block_counts[block]))
+			parts.append(self._block_column(block, name)[begin:end])
+		return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+	def __getitem__(self, name):
+		return self.column(name)
+
+	def records(self, start=0, stop=None):
+		# rows of the range as a structured array (a copy)
+		stop = len(self) if stop is None else min(stop, len(self))
+		out = np.zeros(max(stop - start, 0), dtype=self.dtype)
+		for name in self.dtype.names:
+			out[name] = self.column(name, start, stop)
+		return out
+
+	def between(self, t0, t1, field="frame_time"):
+		# record range (start, stop) with t0 <= field < t1, the time column must be increasing
+		times = self.column(field)
+		return (int(np.searchsorted(times, t0, side="left")), int(np.searchsorted(times, t1, side="left")))
+
+	def video_frames(self, fps=None, start=0, stop=None):
+		"""
+		Index of the matching frame in the constant frame rate video of the flight,
+		counted from the first frame the recorder wrote.
+		"""
+		fps = fps or self.header.get("fps", 30)
+		t0 = self.column("publish_time", 0, 1)
+		publish = self.column("publish_time", start, stop)
+		return ((publish - t0[0]) * fps).astype(np.int64) if len(t0) else np.zeros(0, dtype=np.int64)
+
+	def close(self):
+		# the mapping closes once the last column view is gone
+		self._map = None
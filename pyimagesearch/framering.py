@@ -0,0 +1,235 @@
+# import necessary packages
+from multiprocessing import shared_memory
+import numpy as np
+import time
+
+# what happens when a consumer falls behind the producer
+DROP_OLDEST = "drop_oldest"	# skip the frames the producer already overwrote
+KEEP_LATEST = "keep_latest"	# always jump to the newest frame
+BLOCK = "block"			# the producer waits until the consumer caught up
+POLICIES = (DROP_OLDEST, KEEP_LATEST, BLOCK)
+
+class FrameRing:
+	"""
+	Fixed-slot ring of preallocated H x W x 3 uint8 frames living in shared memory.
+
+	One producer writes frames into the ring, any number of named consumers read
+	them back through their own read cursor.  Frames are never pickled, both sides
+	work on numpy views of the shared block.  What happens to a consumer that falls
+	behind depends on its overflow policy, frames it never sees are counted as dropped.
+
+	With meta_dtype every slot also carries one record of that numpy structured
+	dtype, written by the producer next to the frame (see next_meta()).
+	"""
+
+	def __init__(self, shape=(300, 400, 3), slots=8, consumers=("display",), name=None, poll_interval=0.001,
+			policies=None, block_timeout=1.0, trace_len=0, meta_dtype=None):
+		self.shape = tuple(shape)
+		self.slots = slots
+		self.consumers = tuple(consumers)
+		self.poll_interval = poll_interval
+		self.block_timeout = block_timeout
+		# per slot stage timestamps, see pyimagesearch.tracing
+		self.trace_len = trace_len
+		# per slot metadata record
+		self.meta_dtype = np.dtype(meta_dtype) if meta_dtype is not None else None
+		self._owner = name is None
+
+		self.policies = dict.fromkeys(self.consumers, DROP_OLDEST)
+		self.policies.update(policies or {})
+		for consumer, policy in self.policies.items():
+			if policy not in POLICIES:
+				raise ValueError(f"unknown overflow policy {policy!r} for consumer {consumer!r}")
+		self._blocking = [self._consumer_index(c) for c in self.consumers if self.policies[c] == BLOCK]
+
+		size = self._layout()
+		if self._owner:
+			self._shm = shared_memory.SharedMemory(create=True, size=size)
+		else:
+			# child processes share the resource tracker of the creating
+			# process, so attaching does not take over ownership of the block
+			self._shm = shared_memory.SharedMemory(name=name)
+
+		self._map()
+		if self._owner:
+			self._header[:] = 0
+			self._slot_seq[:] = -1
+			self._slot_time[:] = 0
+			if self._meta is not None:
+				self._meta.fill(0)
+
+	def _layout(self):
+		# header: write sequence, producer blocked count, then cursor /
+		# dropped / received / lag in microseconds per consumer
+		self._header_len = 2 + 4 * len(self.consumers)
+		self._frame_bytes = int(np.prod(self.shape))
+		self._meta_bytes = self.meta_dtype.itemsize if self.meta_dtype is not None else 0
+		return (8 * self._header_len + (16 + 8 * self.trace_len) * self.slots + self._frame_bytes * self.slots
+			+ self._meta_bytes * self.slots)
+
+	def _map(self):
+		buf = self._shm.buf
+		offset = 0
+		self._header = np.ndarray((self._header_len,), dtype=np.int64, buffer=buf, offset=offset)
+		offset += 8 * self._header_len
+		self._slot_seq = np.ndarray((self.slots,), dtype=np.int64, buffer=buf, offset=offset)
+		offset += 8 * self.slots
+		self._slot_time = np.ndarray((self.slots,), dtype=np.float64, buffer=buf, offset=offset)
+		offset += 8 * self.slots
+		self._traces = np.ndarray((self.slots, self.trace_len), dtype=np.float64, buffer=buf, offset=offset)
+		offset += 8 * self.slots * self.trace_len
+		self._frames = np.ndarray((self.slots,) + self.shape, dtype=np.uint8, buffer=buf, offset=offset)
+		offset += self._frame_bytes * self.slots
+		self._meta = None
+		if self.meta_dtype is not None:
+			self._meta = np.ndarray((self.slots,), dtype=self.meta_dtype, buffer=buf, offset=offset)
+
+	def __getstate__(self):
+		# child processes attach to the existing block by name
+		return (self._shm.name, self.shape, self.slots, self.consumers, self.poll_interval, self.policies,
+			self.block_timeout, self.trace_len, self.meta_dtype)
+
+	def __setstate__(self, state):
+		name, shape, slots, consumers, poll_interval, policies, block_timeout, trace_len, meta_dtype = state
+		self.__init__(shape=shape, slots=slots, consumers=consumers, name=name, poll_interval=poll_interval,
+			policies=policies, block_timeout=block_timeout, trace_len=trace_len, meta_dtype=meta_dtype)
+
+	@property
+	def name(self):
+		return self._shm.name
+
+	def _consumer_index(self, consumer):
+		return 2 + 4 * self.consumers.index(consumer)
+
+	def _wait_for_blocking_consumers(self):
+		# the slot about to be written must not be the one a blocking
+		# consumer is reading or has not read yet
+		seq = int(self._header[0])
+		deadline = None
+		for idx in self._blocking:
+			while seq > self._header[idx] + self.slots - 2:
+				if deadline is None:
+					deadline = time.time() + self.block_timeout
+					self._header[1] += 1
+				elif time.time() >= deadline:
+					# a stuck consumer must not stall the producer forever
+					return
+				time.sleep(self.poll_interval)
+
+	def next_slot(self):
+		"""
+		Writable view of the slot the next commit() will publish.  The producer can
+		resize or draw straight into it to avoid an extra copy.
+		"""
+		if self._blocking:
+			self._wait_for_blocking_consumers()
+		return self._frames[int(self._header[0]) % self.slots]
+
+	def next_trace(self):
+		# writable trace of the slot the next commit() will publish
+		return self._traces[int(self._header[0]) % self.slots]
+
+	def trace(self, seq):
+		return self._traces[seq % self.slots]
+
+	def next_meta(self):
+		"""
+		Metadata record of the slot the next commit() will publish, cleared to
+		zeros.  Setting its fields writes straight into shared memory.
+		"""
+		slot = int(self._header[0]) % self.slots
+		self._meta[slot] = 0
+		return self._meta[slot]
+
+	def meta(self, seq):
+		# like the frame view, valid until the producer laps the slot
+		return self._meta[seq % self.slots]
+
+	def commit(self, timestamp=None):
+		seq = int(self._header[0])
+		slot = seq % self.slots
+		self._slot_time[slot] = time.time() if timestamp is None else timestamp
+		self._slot_seq[slot] = seq
+		# publish last so consumers never see a half written slot
+		self._header[0] = seq + 1
+		return seq
+
+	def put(self, frame, timestamp=None):
+		if frame.shape != self.shape:
+			raise ValueError(f"frame shape {frame.shape} does not match ring shape {self.shape}")
+		np.copyto(self.next_slot(), frame)
+		return self.commit(timestamp)
+
+	def get(self, consumer, timeout=None):
+		"""
+		Next frame for the consumer as (frame view, sequence number, timestamp), or
+		None if no frame arrived before the timeout.  The view stays valid until the
+		producer laps it, use valid(seq) to check or copy the frame to keep it.
+		"""
+		idx = self._consumer_index(consumer)
+		deadline = None if timeout is None else time.time() + timeout
+
+		while int(self._header[0]) <= self._header[idx]:
+			if deadline is not None and time.time() >= deadline:
+				return None
+			time.sleep(self.poll_interval)
+
+		cursor = int(self._header[idx])
+		if self.policies[consumer] == KEEP_LATEST:
+			oldest = int(self._header[0]) - 1
+		else:
+			oldest = int(self._header[0]) - (self.slots - 1)
+		if cursor < oldest:
+			self._header[idx + 1] += oldest - cursor
+			cursor = oldest
+
+		slot = cursor % self.slots
+		timestamp = float(self._slot_time[slot])
+		self._header[idx] = cursor + 1
+		self._header[idx + 2] += 1
+		self._header[idx + 3] = int((time.time() - timestamp) * 1e6)
+		return (self._frames[slot], cursor, timestamp)
+
+	def valid(self, seq):
+		# the producer only writes into a slot once it is a full lap ahead
+		return int(self._header[0]) < seq + self.slots
+
+	@property
+	def sent(self):
+		return int(self._header[0])
+
+	def dropped(self, consumer):
+		return int(self._header[self._consumer_index(consumer) + 1])
+
+	def received(self, consumer):
+		return int(self._header[self._consumer_index(consumer) + 2])
+
+	def backlog(self, consumer):
+		# frames published that the consumer has not read yet
+		return self.sent - int(self._header[self._consumer_index(consumer)])
+
+	def lag(self, consumer):
+		# seconds between the last frame read being published and read
+		return self._header[self._consumer_index(consumer) + 3] / 1e6
+
+	@property
+	def producer_blocked(self):
+		return int(self._header[1])
+
+	def stats(self):
+		stats = {"sent": self.sent, "producer_blocked": self.producer_blocked}
+		for consumer in self.consumers:
+			stats[consumer] = {"policy": self.policies[consumer], "received": self.received(consumer),
+				"dropped": self.dropped(consumer), "backlog": self.backlog(consumer),
+				"lag_ms": round(1000 * self.lag(consumer), 2)}
+		return stats
+
+	def close(self):
+		# drop the numpy views before closing the mapping
+		self._header = self._slot_seq = self._slot_time = self._traces = self._frames = self._meta = None
+		self._shm.close()
+
+	def unlink(self):
+		self.close()
+		if self._owner:
+			self._shm.unlink()
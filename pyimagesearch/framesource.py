@@ -0,0 +1,91 @@
+# import necessary packages
+import cv2
+import time
+
+class LiveFrameSource:
+	"""
+	Frames from the Tello video stream.  read() returns the most recent frame
+	decoded by the djitellopy background reader.
+	"""
+
+	def __init__(self, tello):
+		self.frame_read = tello.get_frame_read()
+		self.frame_time = None
+		self.frames_read = 0
+
+	def read(self):
+		frame = self.frame_read.frame
+		self.frame_time = time.time()
+		self.frames_read += 1
+		return frame
+
+	def release(self):
+		self.frame_read.stop()
+
+
+class FileFrameSource:
+	"""
+	Frames from a recorded video file.
+
+	With realtime=True frames are handed out at the native rate of the file: a
+	reader that is faster than the file waits for the next frame, a reader that is
+	slower skips the frames it missed, just like the live stream.  With
+	realtime=False every frame is returned as fast as it can be decoded.
+	"""
+
+	def __init__(self, path, realtime=True, loop=False):
+		self.path = path
+		self.realtime = realtime
+		self.loop = loop
+		self.cap = cv2.VideoCapture(path)
+		if not self.cap.isOpened():
+			raise IOError(f"Unable to open video file: {path}")
+
+		fps = self.cap.get(cv2.CAP_PROP_FPS)
+		self.fps = fps if fps > 0 else 30.0
+		self.frame_time = None
+		self.frames_read = 0
+		self.frames_skipped = 0
+
+		self._start_time = None
+		self._next_index = 0
+
+	def _grab(self):
+		grabbed = self.cap.grab()
+		if not grabbed and self.loop:
+			self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+			grabbed = self.cap.grab()
+		return grabbed
+
+	def read(self):
+		if self.realtime:
+			now = time.time()
+			if self._start_time is None:
+				self._start_time = now
+
+			# frame index that the live stream would be showing right now
+			due = int((now - self._start_time) * self.fps)
+			if due < self._next_index:
+				time.sleep(self._start_time + self._next_index / self.fps - now)
+				due = self._next_index
+
+			while self._next_index < due:
+				if not self._grab():
+					return None
+				self._next_index += 1
+				self.frames_skipped += 1
+
+		if not self._grab():
+			return None
+		self._next_index += 1
+
+		grabbed, frame = self.cap.retrieve()
+		if not grabbed:
+			return None
+
+		self.frame_time = time.time()
+		self.frames_read += 1
+		return frame
+
+	def release(self):
+		self.cap.release()
@@ -0,0 +1,158 @@
+# import necessary packages
+import time
+
+# detector settings from the best quality to the fastest.  width is the detection input
+# width, min_size is in detection pixels and full_scan_interval is how many ROI frames
+# may pass between full frame scans.  Measured with benchmark-detector.py on the bundled
+# video (full 400x300 frames, one core, faces of about 65 pixels in 16 of 130 frames):
+#
+#   level  width  scale  neighbors  min size  detect p50  faces found
+#   0      400    1.05   9          30        172ms       12
+#   1      352    1.05   7          30        136ms       12
+#   2      320    1.05   7          40         76ms       10
+#   3      288    1.05   5          40         59ms       10
+#   4      320    1.1    3          40         37ms       12
+#
+# The width goes first.  min_neighbors does not change the cost, it comes down with the
+# width to keep the faces found, and min_size drops the largest pyramid levels without
+# losing 65 pixel faces.  Below 288 or with scale 1.1 and more neighbors hardly any face is
+# found.  The last level trades the coarser scale steps and more false detections,
+# which the target filter gates, for speed
+QUALITY_LEVELS = (
+	{"width": 400, "scale_factor": 1.05, "min_neighbors": 9, "min_size": (30, 30), "full_scan_interval": 15},
+	{"width": 352, "scale_factor": 1.05, "min_neighbors": 7, "min_size": (30, 30), "full_scan_interval": 20},
+	{"width": 320, "scale_factor": 1.05, "min_neighbors": 7, "min_size": (40, 40), "full_scan_interval": 25},
+	{"width": 288, "scale_factor": 1.05, "min_neighbors": 5, "min_size": (40, 40), "full_scan_interval": 30},
+	{"width": 320, "scale_factor": 1.1, "min_neighbors": 3, "min_size": (40, 40), "full_scan_interval": 45},
+)
+
+class QualityGovernor:
+	"""
+	Feedback governor that trades detection quality for loop rate.
+
+	record() takes the processing time of every control loop iteration (the
+	wait for the next camera frame excluded) and compares the mean over a window
+	of frames with the budget of one period at target_hz.  Over high times the
+	budget, the detector is stepped one level down QUALITY_LEVELS.  The quality
+	is stepped back up only after up_windows windows in a row under low times
+	the budget, and a cooldown follows every change.
+
+	The mean of the last window at every level is kept, and a level measured
+	over budget is not upgraded into again for cost_memory seconds.  When an
+	upgrade is undone within backoff_windows windows, that level's memory is
+	doubled, so the governor does not keep probing a level that is too slow.
+	Every decision is logged and kept in decisions.
+	"""
+
+	def __init__(self, target_hz=15, levels=QUALITY_LEVELS, window=15, high=1.0, low=0.6, up_windows=4,
+			cooldown=1.0, cost_memory=30.0, backoff_windows=2, level=0, log=print):
+		self.target_hz = target_hz
+		self.budget = 1.0 / target_hz
+		self.levels = levels
+		self.window = window
+		self.high = high
+		self.low = low
+		self.up_windows = up_windows
+		self.cooldown = cooldown
+		self.cost_memory = cost_memory
+		self.backoff_windows = backoff_windows
+		self.log = log
+
+		self.level = level
+		self._busy = 0.0
+		self._count = 0
+		self._quiet_windows = 0
+		self._windows_at_level = 0
+		self._upgraded = False
+		self._last_change = 0.0
+		self._level_since = None
+		# (mean loop time, when) of the last window at every level
+		self.costs = [None] * len(levels)
+		self._memory = [cost_memory] * len(levels)
+		self.time_at_level = [0.0] * len(levels)
+		self.decisions = []
+
+	@property
+	def settings(self):
+		return self.levels[self.level]
+
+	def record(self, busy, now=None):
+		"""
+		Account one loop iteration.  Returns the new settings when the level
+		changed, otherwise None.
+		"""
+		now = time.time() if now is None else now
+		if self._level_since is None:
+			self._level_since = now
+		self._busy += busy
+		self._count += 1
+		if self._count < self.window:
+			return None
+
+		mean = self._busy / self._count
+		self._busy = 0.0
+		self._count = 0
+		self.costs[self.level] = (mean, now)
+		self._windows_at_level += 1
+		if now - self._last_change < self.cooldown:
+			return None
+
+		if mean > self.high * self.budget:
+			self._quiet_windows = 0
+			if self.level + 1 < len(self.levels):
+				if self._upgraded and self._windows_at_level <= self.backoff_windows:
+					# the upgrade did not hold, trust the measured cost twice as long
+					self._memory[self.level] = min(self._memory[self.level] * 2, 16 * self.cost_memory)
+				return self._change(self.level + 1, mean, now, "over budget")
+		elif mean < self.low * self.budget:
+			self._quiet_windows += 1
+			if self.level > 0 and self._quiet_windows >= self.up_windows:
+				known = self.costs[self.level - 1]
+				if (known is not None and known[0] > self.high * self.budget
+						and now - known[1] < self._memory[self.level - 1]):
+					# measured over budget not long ago, do not try it yet
+					return None
+				self._quiet_windows = 0
+				return self._change(self.level - 1, mean, now, "headroom")
+		else:
+			self._quiet_windows = 0
+		return None
+
+	def _change(self, level, mean, now, reason):
+		self.time_at_level[self.level] += now - self._level_since
+		decision = {
+			"time": now,
+			"from": self.level,
+			"to": level,
+			"loop_ms": 1000 * mean,
+			"budget_ms": 1000 * self.budget,
+			"reason": reason,
+		}
+		self.decisions.append(decision)
+		self._upgraded = level < self.level
+		self.level = level
+		self._level_since = now
+		self._last_change = now
+		self._windows_at_level = 0
+		if self.log:
+			settings = self.settings
+			self.log(f"[governor] level {decision['from']} -> {level}: loop {decision['loop_ms']:.1f}ms, budget "
+				f"{decision['budget_ms']:.1f}ms ({reason}), width {settings['width']} scale {settings['scale_factor']} "
+				f"neighbors {settings['min_neighbors']} min size {settings['min_size'][0]} "
+				f"full scan every {settings['full_scan_interval']}")
+		return self.settings
+
+	def stats(self, now=None):
+		now = time.time() if now is None else now
+		time_at_level = list(self.time_at_level)
+		if self._level_since is not None:
+			time_at_level[self.level] += now - self._level_since
+		return {
+			"target_hz": self.target_hz,
+			"level": self.level,
+			"changes": len(self.decisions),
+			"downgrades": sum(1 for d in self.decisions if d["to"] > d["from"]),
+			"upgrades": sum(1 for d in self.decisions if d["to"] < d["from"]),
+			"seconds_at_level": [round(t, 2) for t in time_at_level],
+			"loop_ms_at_level": [None if cost is None else round(1000 * cost[0], 1) for cost in self.costs],
+		}
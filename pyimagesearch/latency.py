@@ -0,0 +1,83 @@
+# import necessary packages
+from bisect import bisect_left
+import math
+
+class LatencyHistogram:
+	"""
+	Fixed memory latency histogram with logarithmic bins, from min_value to
+	max_value seconds with bins_per_decade bins per factor of ten.  record() is
+	cheap enough to call for every packet or frame.  Percentiles are reported as
+	the upper edge of the bin they fall into.
+	"""
+
+	def __init__(self, min_value=0.0001, max_value=10.0, bins_per_decade=20):
+		decades = math.log10(max_value / min_value)
+		n = int(math.ceil(decades * bins_per_decade))
+		self.edges = [min_value * 10 ** (i / bins_per_decade) for i in range(n + 1)]
+		# one underflow and one overflow bin around the edges
+		self.counts = [0] * (len(self.edges) + 1)
+		self.count = 0
+		self.total = 0.0
+		self.min = math.inf
+		self.max = 0.0
+
+	def record(self, value):
+		self.counts[bisect_left(self.edges, value)] += 1
+		self.count += 1
+		self.total += value
+		if value < self.min:
+			self.min = value
+		if value > self.max:
+			self.max = value
+
+	def merge(self, other):
+		for i, count in enumerate(other.counts):
+			self.counts[i] += count
+		self.count += other.count
+		self.total += other.total
+		self.min = min(self.min, other.min)
+		self.max = max(self.max, other.max)
+
+	@property
+	def mean(self):
+		return self.total / self.count if self.count else 0.0
+
+	def percentile(self, p):
+		if not self.count:
+			return 0.0
+		target = self.count * p / 100.0
+		seen = 0
+		for i, count in enumerate(self.counts):
+			seen += count
+			if seen >= target and count:
+				if i == 0:
+					return self.min
+				if i >= len(self.edges):
+					return self.max
+				return min(self.edges[i], self.max)
+		return self.max
+
+	def summary(self, scale=1000.0):
+		# milliseconds by default
+		return {
+			"count": self.count,
+			"mean": round(self.mean * scale, 3),
+			"p50": round(self.percentile(50) * scale, 3),
+			"p95": round(self.percentile(95) * scale, 3),
+			"p99": round(self.percentile(99) * scale, 3),
+			"max": round(self.max * scale, 3),
+		}
+
+	def bars(self, width=40):
+		"""
+		Text rendering of the non empty bins, one line per bin.
+		"""
+		lines = []
+		peak = max(self.counts) if self.count else 0
+		for i, count in enumerate(self.counts):
+			if not count:
+				continue
+			upper = self.edges[i] if i < len(self.edges) else math.inf
+			bar = "#" * max(1, int(width * count / peak))
+			lines.append(f"<= {upper * 1000:10.3f}ms {count:8d} {bar}")
+		return "\n".join(lines)
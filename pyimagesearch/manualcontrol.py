@@ -0,0 +1,166 @@
+# import necessary packages
+from pyimagesearch.rcscheduler import RCScheduler
+from pyimagesearch.latency import LatencyHistogram
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import time
+
+# key -> (rc axis, sign), axes are left/right, forward/back, up/down, yaw
+KEY_BINDINGS = {
+	ord("a"): (0, -1), ord("d"): (0, 1),
+	ord("s"): (1, -1), ord("w"): (1, 1),
+	ord("f"): (2, -1), ord("r"): (2, 1),
+	ord("q"): (3, -1), ord("e"): (3, 1),
+}
+
+class HeldKeys:
+	"""
+	Which keys are held down, from the key press events of cv2.waitKey.
+
+	OpenCV reports presses but no releases, so a key counts as held as long as
+	the keyboard auto repeat keeps sending it.  After the first press the OS
+	waits about half a second before repeating, after that it repeats every 30
+	to 50ms.
+	"""
+
+	def __init__(self, first_repeat=0.6, repeat=0.15):
+		self.first_repeat = first_repeat
+		self.repeat = repeat
+		# key -> (first press, last press)
+		self._pressed = {}
+
+	def press(self, key, now=None):
+		now = time.time() if now is None else now
+		(first, _) = self._pressed.get(key, (now, now))
+		new = key not in self._pressed
+		self._pressed[key] = (first, now)
+		return new
+
+	def held(self, now=None):
+		now = time.time() if now is None else now
+		for key, (first, last) in list(self._pressed.items()):
+			timeout = self.first_repeat if last == first else self.repeat
+			if now - last > timeout:
+				del self._pressed[key]
+		return set(self._pressed)
+
+	def release_all(self):
+		self._pressed.clear()
+
+
+class _SendProbe:
+	"""
+	Stands between the RCScheduler and the Tello and timestamps the first send
+	of every new command, for the key to command latency.
+	"""
+
+	def __init__(self, tello, controller):
+		self.tello = tello
+		self.controller = controller
+
+	def send_rc_control(self, *command):
+		self.tello.send_rc_control(*command)
+		self.controller._sent(command, time.time())
+
+
+class ManualController:
+	"""
+	Keyboard flight with continuous rc velocities.
+
+	Held keys map to velocities on the four rc axes (KEY_BINDINGS) at the
+	current speed, and the RCScheduler resends the setpoint at rc_rate on its
+	own thread.  A key press changes the velocity on the next scheduler tick, and
+	letting go stops that axis.  If the display loop stalls, the scheduler
+	watchdog stops the drone.  Takeoff and land run on a worker thread, so
+	nothing in the display loop waits for an acknowledgment.  The time from a
+	key event to the first send of the command it produced is kept in a
+	LatencyHistogram.
+	"""
+
+	def __init__(self, tello, speed=50, rc_rate=20, held_keys=None):
+		self.tello = tello
+		self.speed = speed
+		self.held_keys = held_keys or HeldKeys()
+		self.rc_scheduler = RCScheduler(_SendProbe(tello, self), rate=rc_rate)
+		self._commands = ThreadPoolExecutor(max_workers=1)
+		self._pending = None
+
+		self._lock = Lock()
+		self.setpoint = (0, 0, 0, 0)
+		# key event time of the newest setpoint, until it was sent
+		self._changed_at = None
+		self.latency = LatencyHistogram()
+		self.status = "landed"
+
+	def start(self):
+		self.rc_scheduler.start()
+		return self
+
+	def takeoff(self):
+		# a second takeoff while one is in progress is ignored
+		if self._pending is not None and not self._pending.done():
+			return self._pending
+		return self._command("takeoff", self.tello.takeoff, "flying")
+
+	def land(self, wait=False):
+		"""
+		Always queued, the single worker sends it right after a takeoff in
+		progress.  With wait=True blocks until the drone answered.
+		"""
+		self.held_keys.release_all()
+		future = self._command("land", self.tello.land, "landed")
+		if wait:
+			future.result()
+		return future
+
+	def _command(self, name, call, done_status):
+		self.status = f"{name}..."
+
+		def run():
+			ok = call()
+			self.status = done_status if ok is not False else f"{name} failed"
+
+		self._pending = self._commands.submit(run)
+		return self._pending
+
+	def change_speed(self, delta):
+		self.speed = min(max(self.speed + delta, 10), 100)
+
+	def update(self, key=None, now=None):
+		"""
+		Feed the key cv2.waitKey returned (or -1) once per display loop.
+		Publishes the velocities of the held keys and returns them.
+		"""
+		now = time.time() if now is None else now
+		if key in KEY_BINDINGS:
+			self.held_keys.press(key, now)
+
+		velocities = [0, 0, 0, 0]
+		for held in self.held_keys.held(now):
+			(axis, sign) = KEY_BINDINGS[held]
+			velocities[axis] += sign * self.speed
+		setpoint = tuple(velocities)
+
+		with self._lock:
+			if setpoint != self.setpoint:
+				self.setpoint = setpoint
+				self._changed_at = now
+		# published every loop, which also feeds the scheduler watchdog
+		self.rc_scheduler.publish(*setpoint)
+		return setpoint
+
+	def _sent(self, command, sent_time):
+		with self._lock:
+			if self._changed_at is not None and tuple(command) == self.setpoint:
+				self.latency.record(sent_time - self._changed_at)
+				self._changed_at = None
+
+	def stop(self):
+		self.rc_scheduler.stop()
+		self._commands.shutdown(wait=True)
+
+	def stats(self):
+		return {
+			"key_to_command_ms": self.latency.summary(),
+			"rc": self.rc_scheduler.stats(),
+		}
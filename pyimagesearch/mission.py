@@ -0,0 +1,354 @@
+# import necessary packages
+from pyimagesearch.rcscheduler import RCScheduler, ZERO
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Thread, Event
+import json
+import time
+import cv2
+
+MOVE_DIRECTIONS = ("up", "down", "left", "right", "forward", "back")
+
+# rc axis and sign of each direction for the velocity segments
+_RC_AXES = {"left": (0, -1), "right": (0, 1), "back": (1, -1), "forward": (1, 1), "down": (2, -1), "up": (2, 1)}
+
+# rough durations used as the plan, the Tello moves at about 50 cm/s and turns about 90 deg/s
+TAKEOFF_SECONDS = 5.0
+LAND_SECONDS = 4.0
+MOVE_SPEED = 50.0
+ROTATE_SPEED = 90.0
+COMMAND_OVERHEAD = 1.0
+
+class Step:
+	"""
+	One step of a mission: what to do, the arguments, how long it should take
+	and after how many seconds it is given up.
+	"""
+
+	def __init__(self, kind, planned, timeout=None, **args):
+		self.kind = kind
+		self.args = args
+		self.planned = planned
+		# blocking commands get twice the plan plus the 7 seconds TelloClient waits for an answer
+		self.timeout = timeout if timeout is not None else 2 * planned + 7
+
+	def __repr__(self):
+		if self.kind == "rc":
+			a = self.args
+			return f"rc {a['left_right']} {a['forward_backward']} {a['up_down']} {a['yaw']} for {a['seconds']}s"
+		return " ".join([self.kind] + [str(v) for v in self.args.values()])
+
+
+class Mission:
+	"""
+	Declarative list of steps for a scripted flight.  The builder methods can be
+	chained, or a mission can be loaded from a dict, a YAML or a JSON file:
+
+		Mission("square").takeoff().glide("left", 50).rotate(90).hover(1).land()
+
+		steps:
+		  - takeoff
+		  - glide: {direction: left, cm: 50}
+		  - rotate: 90
+		  - hover: 1
+		  - land
+	"""
+
+	def __init__(self, name="mission"):
+		self.name = name
+		self.steps = []
+
+	def _add(self, step):
+		self.steps.append(step)
+		return self
+
+	def takeoff(self, timeout=None):
+		return self._add(Step("takeoff", TAKEOFF_SECONDS, timeout))
+
+	def land(self, timeout=None):
+		return self._add(Step("land", LAND_SECONDS, timeout))
+
+	def move(self, direction, cm, timeout=None):
+		# stop and go move_* command, the drone brakes and waits for the "ok"
+		if direction not in MOVE_DIRECTIONS:
+			raise ValueError(f"unknown direction {direction!r}, choose from {MOVE_DIRECTIONS}")
+		return self._add(Step("move", COMMAND_OVERHEAD + cm / MOVE_SPEED, timeout, direction=direction, cm=int(cm)))
+
+	def rotate(self, degrees, timeout=None):
+		# positive is clockwise
+		return self._add(Step("rotate", COMMAND_OVERHEAD + abs(degrees) / ROTATE_SPEED, timeout, degrees=int(degrees)))
+
+	def hover(self, seconds, timeout=None):
+		return self._add(Step("hover", seconds, timeout, seconds=seconds))
+
+	def rc(self, left_right=0, forward_backward=0, up_down=0, yaw=0, seconds=1.0, timeout=None):
+		# velocity segment, the velocities are held for seconds through the rc channel
+		return self._add(Step("rc", seconds, timeout if timeout is not None else seconds + 2,
+			left_right=int(left_right), forward_backward=int(forward_backward), up_down=int(up_down), yaw=int(yaw),
+			seconds=seconds))
+
+	def glide(self, direction, cm, speed=MOVE_SPEED, timeout=None):
+		# move as a velocity segment, no stop at the start and the end
+		if direction not in _RC_AXES:
+			raise ValueError(f"unknown direction {direction!r}, choose from {tuple(_RC_AXES)}")
+		velocities = [0, 0, 0, 0]
+		(axis, sign) = _RC_AXES[direction]
+		velocities[axis] = sign * int(speed)
+		return self.rc(*velocities, seconds=cm / speed, timeout=timeout)
+
+	def picture(self, path, timeout=None):
+		return self._add(Step("picture", 0.0, timeout if timeout is not None else 2.0, path=path))
+
+	@property
+	def planned(self):
+		return sum(step.planned for step in self.steps)
+
+	@classmethod
+	def from_dict(cls, spec):
+		"""
+		Steps are either a name ("takeoff", "land") or a one entry mapping from the
+		name to its argument, or to a mapping of its arguments.
+		"""
+		mission = cls(spec.get("name", "mission"))
+		for entry in spec.get("steps", []):
+			if isinstance(entry, str):
+				kind, args = entry, {}
+			elif isinstance(entry, dict) and len(entry) == 1:
+				(kind, args), = entry.items()
+			else:
+				raise ValueError(f"bad mission step {entry!r}")
+
+			builder = getattr(mission, kind, None)
+			if kind.startswith("_") or kind in ("planned", "from_dict") or not callable(builder):
+				raise ValueError(f"unknown mission step {kind!r}")
+			if isinstance(args, dict):
+				builder(**args)
+			elif isinstance(args, (list, tuple)):
+				builder(*args)
+			elif args is None:
+				builder()
+			else:
+				builder(args)
+		return mission
+
+
+def load_mission(path):
+	# YAML needs PyYAML, JSON works without it
+	with open(path) as f:
+		if path.endswith((".yaml", ".yml")):
+			import yaml
+			spec = yaml.safe_load(f)
+		else:
+			spec = json.load(f)
+	return Mission.from_dict(spec)
+
+
+class MissionExecutor:
+	"""
+	Runs a Mission on a Tello.
+
+	Blocking SDK commands are sent through a ThreadedTelloClient, which waits
+	for the drone's real answer.  djitellopy 1.5 gives up after 0.5 seconds
+	and returns False while a takeoff or a move is still going on, so its
+	return value cannot tell success from failure.  For a djitellopy Tello the
+	client is created on the drone's address, stand ins without an SDK link
+	(RecordingTello) are called directly on a worker thread.  The executor
+	waits with the step timeout, so a command that never gets its "ok", or
+	abort() from any thread, ends the mission instead of hanging it.  Velocity
+	segments go through an RCScheduler that holds the setpoint at rc_rate, and
+	back to back segments blend into one another without stopping.  Hover waits
+	are interruptible.  While the mission runs, frames from frame_read are fed
+	to the recorder at fps on a capture thread.  When a step fails, times out or
+	the mission is aborted, the remaining steps are skipped and the drone lands.
+	Every step is reported with its planned and actual duration.
+	"""
+
+	def __init__(self, tello, frame_read=None, recorder=None, telemetry=None, rc_rate=20, fps=30, client=None):
+		self.tello = tello
+		self.client = client
+		self._own_client = False
+		self.frame_read = frame_read
+		self.recorder = recorder
+		self.telemetry = telemetry
+		self.rc_rate = rc_rate
+		self.fps = fps
+
+		self._abort = Event()
+		self._done = Event()
+		self._commands = None
+		self._rc_scheduler = None
+		self._capture = None
+		self.flying = False
+		self.results = []
+
+	def abort(self):
+		self._abort.set()
+
+	def run(self, mission):
+		self.results = []
+		self._done.clear()
+		# a second worker so the abort landing does not queue behind a command that hangs
+		self._commands = ThreadPoolExecutor(max_workers=2)
+		if self.client is None and hasattr(self.tello, "send_control_command"):
+			from pyimagesearch.telloclient import ThreadedTelloClient
+			(host, port) = self.tello.address
+			self.client = ThreadedTelloClient(host=host, port=port)
+			self._own_client = True
+		if self.recorder is not None and self.frame_read is not None:
+			self._capture = Thread(target=self._capture_frames, daemon=True)
+			self._capture.start()
+
+		try:
+			status = "ok"
+			for step in mission.steps:
+				if status != "ok" or self._abort.is_set():
+					self._result(step, 0.0, "skipped")
+					continue
+				status = self._run_step(step)
+		except KeyboardInterrupt:
+			status = "aborted"
+			self._abort.set()
+		finally:
+			self._stop_rc()
+			if self.flying:
+				# abort to land
+				self._run_step(Step("land", LAND_SECONDS), name="land (abort)", abortable=False)
+			self._done.set()
+			if self._capture is not None:
+				self._capture.join()
+			self._commands.shutdown(wait=False)
+			if self._own_client:
+				self.client.close()
+				self.client = None
+				self._own_client = False
+		return self.results
+
+	def _run_step(self, step, name=None, abortable=True):
+		start = time.time()
+		try:
+			if step.kind == "rc":
+				status = self._rc_segment(step)
+			elif step.kind == "picture":
+				# does not stop a velocity segment
+				status = self._picture(step)
+			else:
+				self._stop_rc()
+				if step.kind == "hover":
+					status = "aborted" if self._abort.wait(step.args["seconds"]) else "ok"
+				else:
+					status = self._command(step, abortable)
+		except Exception as e:
+			print(f"[mission] {step} failed: {e}")
+			status = "failed"
+		self._result(step, time.time() - start, status, name)
+		return status
+
+	def _command(self, step, abortable):
+		if step.kind in ("takeoff", "land"):
+			command = step.kind
+			call = getattr(self.tello, step.kind)
+		elif step.kind == "move":
+			command = f"{step.args['direction']} {step.args['cm']}"
+			call = lambda: getattr(self.tello, f"move_{step.args['direction']}")(step.args["cm"])
+		elif step.kind == "rotate":
+			degrees = step.args["degrees"]
+			command = f"cw {degrees}" if degrees >= 0 else f"ccw {-degrees}"
+			if degrees >= 0:
+				call = lambda: self.tello.rotate_clockwise(degrees)
+			else:
+				call = lambda: self.tello.rotate_counter_clockwise(-degrees)
+		else:
+			raise ValueError(f"unknown mission step {step.kind!r}")
+
+		if step.kind == "takeoff":
+			# the drone can be in the air before the "ok" arrives, land it if takeoff times out
+			self.flying = True
+		if self.client is not None:
+			future = self.client.submit(command, timeout=step.timeout, retries=0)
+		else:
+			future = self._commands.submit(call)
+		deadline = time.time() + step.timeout
+		# wait in short slices so abort() is seen while the command is in flight
+		while not future.done():
+			remaining = deadline - time.time()
+			if remaining <= 0:
+				return "timeout"
+			if abortable and self._abort.is_set():
+				return "aborted"
+			wait([future], timeout=min(remaining, 0.05))
+
+		try:
+			answer = future.result()
+		except TimeoutError:
+			return "timeout"
+		# the client returns the answer, "ok" or "error ...", a stand in returns True or False
+		if answer is False or (isinstance(answer, str) and answer.lower() != "ok"):
+			print(f"[mission] {step}: drone answered {answer!r}")
+			return "failed"
+		if step.kind == "land":
+			self.flying = False
+		return "ok"
+
+	def _rc_segment(self, step):
+		if self._rc_scheduler is None:
+			self._rc_scheduler = RCScheduler(self.tello, rate=self.rc_rate).start()
+		setpoint = (step.args["left_right"], step.args["forward_backward"], step.args["up_down"], step.args["yaw"])
+
+		# republish every tick to keep the scheduler watchdog fed
+		end = time.time() + step.args["seconds"]
+		period = 1.0 / self.rc_rate
+		while time.time() < end:
+			self._rc_scheduler.publish(*setpoint)
+			if self._abort.wait(min(period, max(end - time.time(), 0))):
+				return "aborted"
+		return "ok"
+
+	def _stop_rc(self):
+		# stop() sends a zero command, so the next blocking command starts from a hover
+		if self._rc_scheduler is not None:
+			self._rc_scheduler.publish(*ZERO)
+			self._rc_scheduler.stop()
+			self._rc_scheduler = None
+
+	def _picture(self, step):
+		frame = self.frame_read.frame if self.frame_read is not None else None
+		if frame is None:
+			return "failed"
+		return "ok" if cv2.imwrite(step.args["path"], frame) else "failed"
+
+	def _capture_frames(self):
+		period = 1.0 / self.fps
+		next_tick = time.time()
+		while not self._done.is_set():
+			frame = self.frame_read.frame
+			if frame is not None:
+				self.recorder.write(frame, time.time())
+			next_tick += period
+			self._done.wait(max(next_tick - time.time(), 0))
+
+	def _result(self, step, actual, status, name=None):
+		result = {
+			"step": name or repr(step),
+			"planned": step.planned,
+			"actual": actual,
+			"status": status,
+		}
+		if self.telemetry is not None and self.telemetry.count:
+			result["h"] = float(self.telemetry.latest("h"))
+			result["bat"] = float(self.telemetry.latest("bat"))
+		self.results.append(result)
+		print(f"[mission] {result['step']}: {status} in {actual:.2f}s (plan {step.planned:.2f}s)")
+
+
+def format_report(results):
+	lines = [f"{'#':>3}  {'step':<44} {'plan':>7} {'actual':>7} {'delta':>7}  status"]
+	planned = actual = 0.0
+	for i, result in enumerate(results):
+		delta = result["actual"] - result["planned"]
+		if result["status"] != "skipped":
+			planned += result["planned"]
+			actual += result["actual"]
+		extra = f"  h {result['h']:.0f}cm bat {result['bat']:.0f}%" if "h" in result else ""
+		lines.append(f"{i:>3}  {result['step']:<44} {result['planned']:>6.2f}s {result['actual']:>6.2f}s "
+			f"{delta:>+6.2f}s  {result['status']}{extra}")
+	lines.append(f"{'':>3}  {'total':<44} {planned:>6.2f}s {actual:>6.2f}s {actual - planned:>+6.2f}s")
+	return "\n".join(lines)
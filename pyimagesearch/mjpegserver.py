@@ -0,0 +1,189 @@
+# import necessary packages
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Condition, Lock
+import json
+import time
+import cv2
+
+_BOUNDARY = "frame"
+
+_INDEX = b"""<!DOCTYPE html>
+<html>
+<head><title>Drone Face Tracking</title></head>
+<body style="background:#222;color:#ddd;font-family:sans-serif">
+<img src="/stream" style="max-width:100%"><br>
+<form method="post" action="/quit"><button type="submit">Quit</button></form>
+<a href="/stats" style="color:#ddd">stats</a>
+</body>
+</html>
+"""
+
+class MJPEGServer:
+	"""
+	Serves the frames as an MJPEG stream over HTTP, for ground stations without
+	a display.
+
+	publish() JPEG encodes a frame once and swaps it in as the newest frame.
+	It never waits for the clients, and at most max_fps frames a second are
+	encoded.  Every client of /stream gets the newest frame whenever one is
+	published, so a slow client skips frames instead of holding anyone up.
+	A POST to /quit sets the exit event, like pressing q in the window, so it
+	lands the drone.  That is why only the local machine is served by default,
+	give host="0.0.0.0" to watch from the network.  /snapshot.jpg returns the
+	newest frame and /stats the counters.
+	"""
+
+	def __init__(self, host="127.0.0.1", port=8080, quality=80, max_fps=15, exit_event=None):
+		self.quality = quality
+		self.max_fps = max_fps
+		self.exit_event = exit_event
+
+		self._condition = Condition()
+		self._jpeg = None
+		self._seq = 0
+		self._last_encode = 0.0
+		self.encoded = 0
+		self.skipped = 0
+		self.encode_time = 0.0
+		# the handlers run on a thread per client
+		self._clients_lock = Lock()
+		self.clients = 0
+		self.frames_sent = 0
+
+		server = self
+
+		class Handler(_Handler):
+			mjpeg = server
+
+		self.httpd = ThreadingHTTPServer((host, port), Handler)
+		self.httpd.daemon_threads = True
+		self.address = self.httpd.server_address
+		self._thread = Thread(target=self.httpd.serve_forever, daemon=True)
+
+	def start(self):
+		self._thread.start()
+		return self
+
+	def stop(self):
+		self.httpd.shutdown()
+		self.httpd.server_close()
+		with self._condition:
+			# wake the stream handlers so they see the shutdown
+			self._seq += 1
+			self._condition.notify_all()
+
+	def publish(self, frame):
+		"""
+		Encode and publish a frame unless it comes sooner than max_fps allows.
+		Returns True if the frame was published.
+		"""
+		now = time.time()
+		if self.max_fps and now - self._last_encode < 1.0 / self.max_fps:
+			self.skipped += 1
+			return False
+		self._last_encode = now
+
+		start = time.perf_counter()
+		ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+		self.encode_time += time.perf_counter() - start
+		if not ok:
+			return False
+
+		with self._condition:
+			self._jpeg = jpeg.tobytes()
+			self._seq += 1
+			self._condition.notify_all()
+		self.encoded += 1
+		return True
+
+	def wait_frame(self, after_seq, timeout=1.0):
+		# newest frame newer than after_seq as (seq, jpeg), (after_seq, None) on timeout
+		with self._condition:
+			self._condition.wait_for(lambda: self._seq > after_seq and self._jpeg is not None, timeout)
+			if self._seq > after_seq and self._jpeg is not None:
+				return (self._seq, self._jpeg)
+			return (after_seq, None)
+
+	def quit(self):
+		if self.exit_event is not None:
+			self.exit_event.set()
+
+	def stats(self):
+		return {
+			"encoded": self.encoded,
+			"skipped": self.skipped,
+			"encode_ms_mean": 1000 * self.encode_time / self.encoded if self.encoded else 0.0,
+			"clients": self.clients,
+			"frames_sent": self.frames_sent,
+		}
+
+
+class _Handler(BaseHTTPRequestHandler):
+	mjpeg = None
+
+	def log_message(self, format, *args):
+		pass
+
+	def _send(self, status, content_type, body):
+		self.send_response(status)
+		self.send_header("Content-Type", content_type)
+		self.send_header("Content-Length", str(len(body)))
+		self.send_header("Cache-Control", "no-cache")
+		self.end_headers()
+		self.wfile.write(body)
+
+	def do_GET(self):
+		if self.path == "/":
+			self._send(200, "text/html", _INDEX)
+		elif self.path == "/stream":
+			self._stream()
+		elif self.path == "/snapshot.jpg":
+			(_, jpeg) = self.mjpeg.wait_frame(-1, timeout=1.0)
+			if jpeg is None:
+				self._send(503, "text/plain", b"no frame yet\n")
+			else:
+				self._send(200, "image/jpeg", jpeg)
+		elif self.path == "/stats":
+			self._send(200, "application/json", json.dumps(self.mjpeg.stats()).encode("utf-8"))
+		elif self.path == "/quit":
+			# a GET must not land the drone, a link preview or a crawler would
+			self._send(405, "text/plain", b"use POST /quit\n")
+		else:
+			self._send(404, "text/plain", b"not found\n")
+
+	def do_POST(self):
+		if self.path == "/quit":
+			self._quit()
+		else:
+			self._send(404, "text/plain", b"not found\n")
+
+	def _quit(self):
+		self.mjpeg.quit()
+		self._send(200, "text/plain", b"quitting\n")
+
+	def _stream(self):
+		self.send_response(200)
+		self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={_BOUNDARY}")
+		self.send_header("Cache-Control", "no-cache")
+		self.end_headers()
+
+		server = self.mjpeg
+		with server._clients_lock:
+			server.clients += 1
+		seq = 0
+		try:
+			while server.exit_event is None or not server.exit_event.is_set():
+				(seq, jpeg) = server.wait_frame(seq)
+				if jpeg is None:
+					continue
+				self.wfile.write(f"--{_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n"
+					.encode("ascii"))
+				self.wfile.write(jpeg)
+				self.wfile.write(b"\r\n")
+				with server._clients_lock:
+					server.frames_sent += 1
+		except (BrokenPipeError, ConnectionResetError):
+			pass
+		finally:
+			with server._clients_lock:
+				server.clients -= 1
@@ -0,0 +1,120 @@
+# import necessary packages
+import time
+import csv
+
+class RecordingTello:
+	"""
+	Stand in for djitellopy.Tello that never touches the network.  Every
+	send_rc_control call is logged with the time it was sent and the capture
+	time of the frame it was computed from so the command latency can be
+	measured.  The RCScheduler passes that frame time along (see
+	records_frame_time), direct callers get the newest frame of the frame
+	source.
+	"""
+
+	# RCScheduler hands send_rc_control the frame time of each setpoint
+	records_frame_time = True
+
+	def __init__(self, frame_source=None, battery=100):
+		self.frame_source = frame_source
+		self.battery = battery
+		self.commands = []
+		self.rc_commands = []
+		self.is_flying = False
+		self.stream_on = False
+
+	def _log(self, command):
+		self.commands.append((time.time(), command))
+		return True
+
+	def connect(self):
+		return self._log("command")
+
+	def streamon(self):
+		self.stream_on = True
+		return self._log("streamon")
+
+	def streamoff(self):
+		self.stream_on = False
+		return self._log("streamoff")
+
+	def get_frame_read(self):
+		return self.frame_source
+
+	def takeoff(self):
+		self.is_flying = True
+		return self._log("takeoff")
+
+	def land(self):
+		self.is_flying = False
+		return self._log("land")
+
+	def emergency(self):
+		self.is_flying = False
+		return self._log("emergency")
+
+	def move(self, direction, x):
+		return self._log(f"{direction} {x}")
+
+	def move_up(self, x):
+		return self.move("up", x)
+
+	def move_down(self, x):
+		return self.move("down", x)
+
+	def move_left(self, x):
+		return self.move("left", x)
+
+	def move_right(self, x):
+		return self.move("right", x)
+
+	def move_forward(self, x):
+		return self.move("forward", x)
+
+	def move_back(self, x):
+		return self.move("back", x)
+
+	def rotate_clockwise(self, x):
+		return self._log(f"cw {x}")
+
+	def rotate_counter_clockwise(self, x):
+		return self._log(f"ccw {x}")
+
+	def get_battery(self):
+		return self.battery
+
+	def send_rc_control(self, left_right_velocity, forward_backward_velocity, up_down_velocity, yaw_velocity,
+			frame_time=None):
+		sent_time = time.time()
+		# the SDK's "rc a b c d" takes integer velocities from -100 to 100 and
+		# send_rc_control formats them with %s, so a float from the PID would reach
+		# the drone as "rc 12.5 ...".  Raise, so a missing int() cast shows up in the replay
+		for velocity in (left_right_velocity, forward_backward_velocity, up_down_velocity, yaw_velocity):
+			if not isinstance(velocity, int):
+				raise TypeError(f"rc velocity {velocity!r} is not an int")
+
+		if frame_time is None and self.frame_source is not None:
+			frame_time = self.frame_source.frame_time
+		self.rc_commands.append((sent_time, frame_time, left_right_velocity, forward_backward_velocity,
+			up_down_velocity, yaw_velocity))
+
+	def command_latencies(self):
+		# seconds between a frame being read and the first rc command computed
+		# from it, the scheduler's resends of the same setpoint do not count
+		latencies = []
+		last_frame = None
+		for (sent, frame, _, _, _, _) in self.rc_commands:
+			if frame is not None and frame != last_frame:
+				latencies.append(sent - frame)
+			last_frame = frame
+		return latencies
+
+	def save_rc_log(self, path):
+		with open(path, "w", newline="") as f:
+			writer = csv.writer(f)
+			writer.writerow(["sent_time", "frame_time", "left_right", "forward_backward", "up_down", "yaw"])
+			writer.writerows(self.rc_commands)
+
+	def end(self):
+		if self.frame_source is not None:
+			self.frame_source.release()
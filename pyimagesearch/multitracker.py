@@ -0,0 +1,193 @@
+# import necessary packages
+import numpy as np
+import time
+
+# lock policies, which face the drone follows when it has to pick one
+LARGEST = "largest"
+CENTER = "center"
+FIRST = "first"
+LOCK_POLICIES = (LARGEST, CENTER, FIRST)
+
+def iou_matrix(a, b):
+	"""
+	Intersection over union of every (x, y, w, h) rectangle in a against every
+	one in b, as an len(a) x len(b) array.
+	"""
+	a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+	b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+	ax2 = a[:, 0] + a[:, 2]
+	ay2 = a[:, 1] + a[:, 3]
+	bx2 = b[:, 0] + b[:, 2]
+	by2 = b[:, 1] + b[:, 3]
+
+	iw = np.clip(np.minimum(ax2[:, None], bx2[None, :]) - np.maximum(a[:, 0][:, None], b[:, 0][None, :]), 0, None)
+	ih = np.clip(np.minimum(ay2[:, None], by2[None, :]) - np.maximum(a[:, 1][:, None], b[:, 1][None, :]), 0, None)
+	intersection = iw * ih
+	union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - intersection
+	return intersection / np.maximum(union, 1e-9)
+
+
+def center_distance_matrix(a, b):
+	"""
+	Distance between the centers of every rectangle in a and b, relative to
+	the larger of the two widths.
+	"""
+	a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+	b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+	ac = a[:, :2] + a[:, 2:] / 2
+	bc = b[:, :2] + b[:, 2:] / 2
+	distance = np.linalg.norm(ac[:, None, :] - bc[None, :, :], axis=2)
+	return distance / np.maximum(np.maximum(a[:, 2][:, None], b[:, 2][None, :]), 1e-9)
+
+
+def _greedy(score, minimum, rows, cols, pairs):
+	# take the pairs best first, skipping the ones whose track or detection is
+	# already taken.  One sort of the n * m scores, O(n * m * log(n * m))
+	(i, j) = np.nonzero((score >= minimum) & rows[:, None] & cols[None, :])
+	# stable, so ties go to the lower track index, then the lower detection index
+	order = np.argsort(-score[i, j], kind="stable")
+	for (a, b) in zip(i[order], j[order]):
+		if rows[a] and cols[b]:
+			pairs.append((a, b))
+			rows[a] = False
+			cols[b] = False
+
+
+class MultiFaceTracker:
+	"""
+	Keeps every face in view as a track with a persistent id and picks one of
+	them as the target.
+
+	Each frame's detections are matched to the tracks greedily by IoU, then
+	by center distance for faces that moved too far to overlap.  Unmatched
+	detections start new tracks.  A track that was not seen for max_age
+	seconds is dropped.  With ROI detection only full frame scans can see the
+	faces besides the locked one, so those tracks only age on full scans and
+	are kept for two periods between full scans when that is longer.  The target stays locked on its
+	track for as long as the track lives, and a new one is picked by
+	lock_policy: the largest face, the one closest to the frame center or the
+	one seen first.  Only tracks seen min_hits times are picked, so a new
+	target drives the drone from its second detection on.  lock(track_id)
+	picks one by hand.
+	"""
+
+	def __init__(self, lock_policy=LARGEST, frame_size=(400, 300), iou_threshold=0.3, max_center_distance=1.0,
+			max_age=1.0, min_hits=2):
+		if lock_policy not in LOCK_POLICIES:
+			raise ValueError(f"unknown lock policy {lock_policy!r}, choose from {LOCK_POLICIES}")
+		self.lock_policy = lock_policy
+		self.frame_center = np.array(frame_size, dtype=np.float64) / 2
+		self.iou_threshold = iou_threshold
+		self.max_center_distance = max_center_distance
+		self.max_age = max_age
+		self.min_hits = min_hits
+
+		# one row per track
+		self.ids = np.zeros(0, dtype=np.int64)
+		self.rects = np.zeros((0, 4), dtype=np.int64)
+		self.hits = np.zeros(0, dtype=np.int64)
+		self.first_seen = np.zeros(0)
+		self.last_seen = np.zeros(0)
+		self.next_id = 0
+		# time between the last two full frame scans
+		self.full_scan_gap = 0.0
+		self._last_full_scan = None
+		self.locked_id = None
+		self.switches = 0
+
+	def update(self, rects, timestamp=None, full_scan=True):
+		"""
+		Match one frame's detections to the tracks.  full_scan is False when
+		only a window around the target was searched.  Returns the detection of
+		the locked target in this frame, or None when it was not detected.
+		"""
+		timestamp = time.time() if timestamp is None else timestamp
+		if full_scan:
+			if self._last_full_scan is not None:
+				self.full_scan_gap = timestamp - self._last_full_scan
+			self._last_full_scan = timestamp
+		rects = np.asarray(rects, dtype=np.int64).reshape(-1, 4)
+		rows = np.ones(len(self.ids), dtype=bool)
+		cols = np.ones(len(rects), dtype=bool)
+
+		pairs = []
+		if len(self.ids) and len(rects):
+			_greedy(iou_matrix(self.rects, rects), self.iou_threshold, rows, cols, pairs)
+			if rows.any() and cols.any():
+				_greedy(-center_distance_matrix(self.rects, rects), -self.max_center_distance, rows, cols, pairs)
+
+		target = None
+		for (i, j) in pairs:
+			self.rects[i] = rects[j]
+			self.hits[i] += 1
+			self.last_seen[i] = timestamp
+			if self.ids[i] == self.locked_id:
+				target = rects[j]
+
+		# new tracks for the detections nobody claimed
+		new = rects[cols]
+		if len(new):
+			self.ids = np.concatenate((self.ids, np.arange(self.next_id, self.next_id + len(new))))
+			self.next_id += len(new)
+			self.rects = np.concatenate((self.rects, new))
+			self.hits = np.concatenate((self.hits, np.ones(len(new), dtype=np.int64)))
+			self.first_seen = np.concatenate((self.first_seen, np.full(len(new), timestamp)))
+			self.last_seen = np.concatenate((self.last_seen, np.full(len(new), timestamp)))
+
+		# age out lost tracks.  The faces besides the target are only looked for on
+		# full scans, so only those age them
+		other_age = max(self.max_age, 2 * self.full_scan_gap) if full_scan else np.inf
+		max_age = np.where(self.ids == self.locked_id, self.max_age, other_age)
+		alive = timestamp - self.last_seen <= max_age
+		if not alive.all():
+			if self.locked_id is not None and self.locked_id not in self.ids[alive]:
+				self.locked_id = None
+			self.ids = self.ids[alive]
+			self.rects = self.rects[alive]
+			self.hits = self.hits[alive]
+			self.first_seen = self.first_seen[alive]
+			self.last_seen = self.last_seen[alive]
+
+		if self.locked_id is None:
+			target = self._acquire(timestamp)
+		return target
+
+	def _acquire(self, timestamp):
+		# pick a confirmed track seen in this frame by the lock policy
+		candidates = np.flatnonzero((self.hits >= self.min_hits) & (self.last_seen == timestamp))
+		if not len(candidates):
+			return None
+
+		rects = self.rects[candidates]
+		if self.lock_policy == LARGEST:
+			best = np.argmax(rects[:, 2] * rects[:, 3])
+		elif self.lock_policy == CENTER:
+			centers = rects[:, :2] + rects[:, 2:] / 2
+			best = np.argmin(np.linalg.norm(centers - self.frame_center, axis=1))
+		else:
+			best = np.argmin(self.ids[candidates])
+
+		self.locked_id = int(self.ids[candidates[best]])
+		self.switches += 1
+		return self.rects[candidates[best]]
+
+	def lock(self, track_id):
+		if track_id not in self.ids:
+			raise KeyError(f"no track {track_id}")
+		self.locked_id = int(track_id)
+
+	def unlock(self):
+		self.locked_id = None
+
+	def tracks(self):
+		# (id, rect, locked) for every live track
+		return [(int(track_id), tuple(rect), track_id == self.locked_id) for track_id, rect in zip(self.ids, self.rects)]
+
+	def stats(self):
+		return {
+			"tracks": len(self.ids),
+			"next_id": self.next_id,
+			"locked_id": self.locked_id,
+			"lock_switches": self.switches,
+			"full_scan_gap": self.full_scan_gap,
+		}
@@ -1,24 +1,145 @@
 # import necessary packages
-import cv2
+from pyimagesearch.detectors import create_detector
+import numpy as np
 import math
+import cv2
 
 class ObjCenter:
-	def __init__(self, haarPath, scale_factor=1.05):
-		# load OpenCV's Haar cascade face detector
-		self.detector = cv2.CascadeClassifier(haarPath)
+	def __init__(self, haarPath, scale_factor=1.05, min_neighbors=9, min_size=(30, 30),
+			roi_expand=None, max_roi_misses=3, full_scan_interval=15, target_filter=None, backend=None,
+			multi_tracker=None, detect_width=None):
+		# load the face detector backend by name ("haar", "lbp", "skin"), the
+		# default is OpenCV's Haar cascade from haarPath.  Without a path or
+		# backend the object only keeps track of faces found elsewhere, see locate()
+		if backend is None:
+			backend = "haar" if haarPath else None
+		self.backend = backend
+		self.detector = None
+		if backend is not None:
+			self.detector = create_detector(backend, path=haarPath if backend == "haar" else None,
+				scale_factor=scale_factor, min_neighbors=min_neighbors, min_size=min_size)
 		self.last_face_center_x = None
 		self.last_face_center_y = None
 		self.scale_factor = scale_factor
+		self.min_neighbors = min_neighbors
+		self.min_size = tuple(min_size)
 		self.last_rect = None
 
-	def update(self, frame, frameCenter=None):
-		# convert the frame to grayscale
-		gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+		# ROI tracking: once a face is found only search a window of
+		# roi_expand times the last face size around it.  Go back to a
+		# full frame scan after max_roi_misses misses in a row, and at
+		# least every full_scan_interval frames to pick up other faces
+		self.roi_expand = roi_expand
+		self.max_roi_misses = max_roi_misses
+		self.full_scan_interval = full_scan_interval
+		self.roi_misses = 0
+		self.frames_since_full_scan = 0
+		self.last_scan_was_roi = False
+
+		# optional TargetFilter: gate the detections by innovation, coast
+		# through misses and predict the face center, see locate()
+		self.target_filter = target_filter
+
+		# optional MultiFaceTracker: follow the locked face among all the
+		# detected ones instead of whichever detectMultiScale lists first
+		self.multi_tracker = multi_tracker
+
+		# detect on a copy downscaled to this width, the rects are mapped back
+		# to the frame.  None detects at the frame size
+		self.detect_width = detect_width
+
+	def _roi(self, frame, rect):
+		# window around rect, clipped to the frame
+		(x, y, w, h) = rect
+		(H, W) = frame.shape[:2]
+		padX = int(w * (self.roi_expand - 1) / 2)
+		padY = int(h * (self.roi_expand - 1) / 2)
+		return (max(x - padX, 0), max(y - padY, 0), min(x + w + padX, W), min(y + h + padY, H))
+
+	def next_roi(self):
+		"""
+		Face to search around in the next frame, or None for a full frame scan,
+		and advance the scan counters.  Split from scan() so a DetectorPool can
+		decide in the parent, which knows the last accepted face, and scan in a
+		worker.
+		"""
+		use_roi = (self.roi_expand is not None and self.last_rect is not None
+			and self.roi_misses < self.max_roi_misses
+			and self.frames_since_full_scan < self.full_scan_interval)
+		if use_roi:
+			self.frames_since_full_scan += 1
+			return tuple(int(v) for v in self.last_rect)
+		self.frames_since_full_scan = 0
+		self.roi_misses = 0
+		return None
+
+	def scan(self, frame, roi_rect=None):
+		# detect in the window around roi_rect (the whole frame for None), in frame coordinates
+		scale = 1.0
+		if self.detect_width and frame.shape[1] > self.detect_width:
+			scale = self.detect_width / frame.shape[1]
+
+		(x0, y0) = (0, 0)
+		if roi_rect is not None:
+			(x0, y0, x1, y1) = self._roi(frame, roi_rect)
+			frame = frame[y0:y1, x0:x1]
+
+		if scale != 1.0:
+			frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
 
 		# detect all faces in the input frame
-		rects = self.detector.detectMultiScale(gray, scaleFactor=self.scale_factor,
-			minNeighbors=9, minSize=(30, 30),
-			flags=cv2.CASCADE_SCALE_IMAGE)
+		rects = self.detector.detect(frame)
+		if scale != 1.0 and len(rects):
+			rects = (np.asarray(rects) / scale).astype(np.int32)
+
+		if roi_rect is not None and len(rects):
+			# map the ROI coordinates back to the full frame
+			rects = rects + (x0, y0, 0, 0)
+		return rects
+
+	def scanned(self, roi_rect, rects):
+		# count the ROI misses, after too many the next scan is a full one
+		self.last_scan_was_roi = roi_rect is not None
+		if roi_rect is not None:
+			self.roi_misses = 0 if len(rects) else self.roi_misses + 1
+
+	def detect(self, frame):
+		roi_rect = self.next_roi()
+		rects = self.scan(frame, roi_rect)
+		self.scanned(roi_rect, rects)
+		return rects
+
+	def set_quality(self, settings):
+		"""
+		Apply detection settings chosen by a QualityGovernor: width, scale_factor,
+		min_neighbors, min_size and full_scan_interval.  Settings the backend
+		does not have are skipped.
+		"""
+		if "width" in settings:
+			self.detect_width = settings["width"]
+		if "full_scan_interval" in settings:
+			self.full_scan_interval = settings["full_scan_interval"]
+		for name in ("scale_factor", "min_neighbors", "min_size"):
+			if name in settings and self.detector is not None and getattr(self.detector, name, None) is not None:
+				value = settings[name]
+				setattr(self.detector, name, tuple(value) if name == "min_size" else value)
+
+	def warm_up(self, shape):
+		# run the detector once on a blank frame so the first real frame does
+		# not pay for the cascade's lazy initialization
+		if self.detector is not None:
+			self.detector.detect(np.zeros(shape, dtype=np.uint8))
+
+	def update(self, frame, frameCenter=None, timestamp=None):
+		return self.locate(self.detect(frame), frameCenter, timestamp)
+
+	def locate(self, rects, frameCenter=None, timestamp=None):
+		if self.multi_tracker is not None:
+			target = self.multi_tracker.update(rects, timestamp, full_scan=not self.last_scan_was_roi)
+			rects = [] if target is None else [target]
+
+		if self.target_filter is not None:
+			return self._filtered(rects, timestamp)
 
 		# check to see if a face was found
 		if len(rects) > 0:
@@ -50,3 +171,20 @@ class ObjCenter:
 			return (frameCenter, None, -1)
 		else:
 			return ((self.last_face_center_x, self.last_face_center_y), None, -1)
+
+	def _filtered(self, rects, timestamp=None):
+		# returns the predicted center (None when the filter lost the face), the
+		# accepted detection (None when coasting) and its distance from the
+		# prediction (-1 without a detection)
+		centers = [(x + w / 2.0, y + h / 2.0) for (x, y, w, h) in rects]
+		(index, d) = self.target_filter.update(centers, timestamp)
+		rect = None
+		if index is not None:
+			rect = rects[index]
+			self.last_rect = rect
+			(self.last_face_center_x, self.last_face_center_y) = (int(centers[index][0]), int(centers[index][1]))
+		return (self.estimate(), rect, d)
+
+	def estimate(self, now=None):
+		# filtered center predicted to the time the command takes effect
+		return self.target_filter.estimate(now)
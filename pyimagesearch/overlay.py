@@ -0,0 +1,67 @@
+# import necessary packages
+import numpy as np
+import cv2
+
+# other faces in view that fit in one record
+MAX_TRACKS = 8
+
+# what the tracking process knows about a frame, published next to it in the FrameRing
+FRAME_META_DTYPE = np.dtype([
+	("frame_time", np.float64),		# when the frame was read
+	("publish_time", np.float64),		# when it was published
+	("frame_center", np.int32, 2),
+	("has_target", np.bool_),		# center holds the followed face
+	("center", np.int32, 2),
+	("has_rect", np.bool_),			# rect holds this frame's detection of it
+	("rect", np.int32, 4),
+	("has_pid", np.bool_),			# errors, PID outputs and rc command are set
+	("pan_error", np.float32),
+	("tilt_error", np.float32),
+	("pan_output", np.float32),
+	("tilt_output", np.float32),
+	("rc", np.int16, 4),			# left/right, forward/back, up/down, yaw
+	("track_count", np.int32),
+	("track_ids", np.int32, MAX_TRACKS),
+	("track_rects", np.int32, (MAX_TRACKS, 4)),
+	("track_locked", np.bool_, MAX_TRACKS),
+])
+
+def draw_overlay(frame, meta):
+	"""
+	Draw the tracking overlay described by a FRAME_META_DTYPE record onto frame.
+	Consumers draw on their own copy, the ring slot keeps the raw frame.
+	"""
+	frame_center = tuple(int(v) for v in meta["frame_center"])
+
+	# draw a circle in the center of the frame
+	cv2.circle(frame, center=frame_center, radius=5, color=(0, 0, 255), thickness=-1)
+
+	# the other faces in view and the track ids
+	for i in range(min(int(meta["track_count"]), MAX_TRACKS)):
+		(x, y, w, h) = (int(v) for v in meta["track_rects"][i])
+		locked = bool(meta["track_locked"][i])
+		if not locked:
+			cv2.rectangle(frame, (x, y), (x + w, y + h), (128, 128, 128), 1)
+		cv2.putText(frame, f"id {meta['track_ids'][i]}", (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+			(0, 255, 0) if locked else (128, 128, 128), 1, cv2.LINE_AA)
+
+	if meta["has_rect"]:
+		(x, y, w, h) = (int(v) for v in meta["rect"])
+		cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+
+	if meta["has_target"]:
+		center = tuple(int(v) for v in meta["center"])
+
+		# draw a circle in the center of the face
+		cv2.circle(frame, center=center, radius=5, color=(255, 0, 0), thickness=-1)
+
+		# Draw line from frameCenter to face center
+		cv2.arrowedLine(frame, frame_center, center, color=(0, 255, 0), thickness=2)
+
+	if meta["has_pid"]:
+		cv2.putText(frame, f"X Error: {meta['pan_error']:.0f} PID: {meta['pan_output']:.2f}", (20, 30),
+			cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2, cv2.LINE_AA)
+		cv2.putText(frame, f"Y Error: {meta['tilt_error']:.0f} PID: {meta['tilt_output']:.2f}", (20, 70),
+			cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2, cv2.LINE_AA)
+
+	return frame
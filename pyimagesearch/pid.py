@@ -1,56 +1,158 @@
 # import necessary packages
+import numpy as np
 import time
 
-class PID:
-	def __init__(self, kP=1, kI=0, kD=0):
-		# initialize gains
-		self.kP = kP
-		self.kI = kI
-		self.kD = kD
+class PIDBank:
+	"""
+	N independent PID controllers (pan, tilt, yaw, forward...) updated together as
+	NumPy arrays.  The time step comes from a caller supplied timestamp or a
+	fixed dt, never from sleeping.  All work arrays are allocated up front and
+	update() returns the same output array every call, copy it to keep it.
 
-		self.cP = 0
-		self.cI = 0
-		self.cD = 0
+	output_limit clamps the output, integral_limit clamps the integral term and
+	while the output is saturated the integral stops growing in the saturated
+	direction (anti-windup).  derivative_filter in [0, 1) low pass filters the
+	derivative term, 0 turns the filter off.
+	"""
 
-	def initialize(self):
-		# initialize the current and previous time
-		self.currTime = time.time()
-		self.prevTime = self.currTime
+	def __init__(self, kP=1, kI=0, kD=0, axes=1, dt=None, output_limit=None, integral_limit=None,
+			derivative_filter=0.0):
+		# initialize gains, scalars apply to every axis
+		self.axes = axes
+		self.kP = np.broadcast_to(np.asarray(kP, dtype=np.float64), (axes,)).copy()
+		self.kI = np.broadcast_to(np.asarray(kI, dtype=np.float64), (axes,)).copy()
+		self.kD = np.broadcast_to(np.asarray(kD, dtype=np.float64), (axes,)).copy()
+		self.dt = dt
+		self.output_limit = output_limit
+		self.integral_limit = integral_limit
+		self.derivative_filter = derivative_filter
 
-		# initialize the previous error
-		self.prevError = 0
+		# term results and state
+		self.cP = np.zeros(axes)
+		self.cI = np.zeros(axes)
+		self.cD = np.zeros(axes)
+		self.prevError = np.zeros(axes)
+		self.prevTime = None
 
-		# initialize the term result variables
-		self.cP = 0
-		self.cI = 0
-		self.cD = 0
+		# work arrays
+		self.output = np.zeros(axes)
+		self._error = np.zeros(axes)
+		self._step = np.zeros(axes)
+		self._tmp = np.zeros(axes)
+		self._saturated = np.zeros(axes, dtype=bool)
+		self._windup = np.zeros(axes, dtype=bool)
 
-	def update(self, error, sleep=0.2):
-		# pause for a bit
-		time.sleep(sleep)
+	def initialize(self, now=None):
+		# initialize the previous time and error and the term results
+		self.prevTime = now
+		self.prevError[:] = 0
+		self.cP[:] = 0
+		self.cI[:] = 0
+		self.cD[:] = 0
+		self.output[:] = 0
 
-		# grab the current time and calculate delta time
-		self.currTime = time.time()
-		deltaTime = self.currTime - self.prevTime
+	def update(self, error, now=None, dt=None):
+		self._error[:] = error
+		error = self._error
 
-		# calculate the delta error
-		deltaError = error - self.prevError
+		# delta time from the argument, the fixed dt or the timestamps
+		if dt is None:
+			dt = self.dt
+		if dt is None:
+			dt = (now - self.prevTime) if (now is not None and self.prevTime is not None) else 0.0
+		self.prevTime = now
 
-		# calculate the proportional term
-		self.cP = error
+		# proportional term
+		self.cP[:] = error
 
-		# calculate the integral term
-		self.cI += error * deltaTime
+		# integral term
+		np.multiply(error, dt, out=self._step)
+		np.add(self.cI, self._step, out=self.cI)
+		if self.integral_limit is not None:
+			np.clip(self.cI, -self.integral_limit, self.integral_limit, out=self.cI)
 
-		# calculate the derivative term (and prevent divide by zero)
-		self.cD = (deltaError / deltaTime) if deltaTime > 0 else 0
+		# derivative term (and prevent divide by zero)
+		if dt > 0:
+			np.subtract(error, self.prevError, out=self._tmp)
+			np.divide(self._tmp, dt, out=self._tmp)
+		else:
+			self._tmp[:] = 0
+		if self.derivative_filter:
+			np.multiply(self.cD, self.derivative_filter, out=self.cD)
+			np.multiply(self._tmp, 1 - self.derivative_filter, out=self._tmp)
+			np.add(self.cD, self._tmp, out=self.cD)
+		else:
+			self.cD[:] = self._tmp
+
+		self.prevError[:] = error
+
+		# sum the terms
+		self._sum()
+
+		if self.output_limit is not None:
+			# anti-windup: undo this step's integration where the output is
+			# saturated and the error pushes it further out
+			np.abs(self.output, out=self._tmp)
+			np.greater(self._tmp, self.output_limit, out=self._saturated)
+			np.multiply(error, self.output, out=self._tmp)
+			np.greater(self._tmp, 0, out=self._windup)
+			np.logical_and(self._saturated, self._windup, out=self._windup)
+			if self._windup.any():
+				np.subtract(self.cI, self._step, out=self.cI, where=self._windup)
+				self._sum()
+			np.clip(self.output, -self.output_limit, self.output_limit, out=self.output)
+
+		return self.output
+
+	def _sum(self):
+		np.multiply(self.kP, self.cP, out=self.output)
+		np.multiply(self.kI, self.cI, out=self._tmp)
+		np.add(self.output, self._tmp, out=self.output)
+		np.multiply(self.kD, self.cD, out=self._tmp)
+		np.add(self.output, self._tmp, out=self.output)
+
+
+class PID:
+	"""
+	Single axis PID with the original wall clock API, a thin wrapper around a
+	one axis PIDBank.
+	"""
 
-		# save previous time and error for the next update
-		self.prevTime = self.currTime
-		self.prevError = error
+	def __init__(self, kP=1, kI=0, kD=0):
+		# initialize gains
+		self.bank = PIDBank(kP=kP, kI=kI, kD=kD, axes=1)
+
+	@property
+	def kP(self):
+		return float(self.bank.kP[0])
+
+	@property
+	def kI(self):
+		return float(self.bank.kI[0])
+
+	@property
+	def kD(self):
+		return float(self.bank.kD[0])
+
+	@property
+	def cP(self):
+		return float(self.bank.cP[0])
+
+	@property
+	def cI(self):
+		return float(self.bank.cI[0])
+
+	@property
+	def cD(self):
+		return float(self.bank.cD[0])
+
+	def initialize(self):
+		# initialize the current and previous time
+		self.bank.initialize(time.time())
+
+	def update(self, error, sleep=0.2):
+		# pause for a bit
+		time.sleep(sleep)
 
-		# sum the terms and return
-		return sum([
-			self.kP * self.cP,
-			self.kI * self.cI,
-			self.kD * self.cD])
\ No newline at end of file
+		# grab the current time, the bank calculates the delta time
+		return float(self.bank.update(error, now=time.time())[0])
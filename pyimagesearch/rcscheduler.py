@@ -0,0 +1,134 @@
+# import necessary packages
+from threading import Thread, Lock
+import time
+
+ZERO = (0, 0, 0, 0)
+
+class RCScheduler:
+	"""
+	Sends rc commands to the Tello from its own thread at a fixed rate.
+
+	The vision loop only publishes the latest setpoint, the scheduler always sends
+	the most recent one.  Repeated zero commands are only resent every
+	zero_keepalive seconds, and if no setpoint was published for watchdog_timeout
+	seconds the scheduler zeroes the velocities itself.
+
+	publish() can take the capture time of the frame the setpoint was computed
+	from.  It is handed to tellos with records_frame_time set (RecordingTello),
+	so they measure the command latency from the originating frame rather than
+	the newest one.
+	"""
+
+	def __init__(self, tello, rate=20, watchdog_timeout=0.5, zero_keepalive=1.0):
+		self.tello = tello
+		self.period = 1.0 / rate
+		self.watchdog_timeout = watchdog_timeout
+		self.zero_keepalive = zero_keepalive
+
+		self._lock = Lock()
+		self._setpoint = ZERO
+		self._frame_time = None
+		self._published_time = None
+		self._pass_frame_time = getattr(tello, "records_frame_time", False)
+		self._running = False
+		self._thread = None
+
+		self.last_sent = None
+		self.last_sent_time = 0.0
+
+		# statistics
+		self.published = 0
+		self.sent = 0
+		self.coalesced = 0
+		self.watchdog_trips = 0
+		self.late_ticks = 0
+		self.send_time_total = 0.0
+		self.send_time_max = 0.0
+		self.start_time = None
+
+	def publish(self, left_right_velocity, forward_backward_velocity, up_down_velocity, yaw_velocity, frame_time=None):
+		setpoint = (int(left_right_velocity), int(forward_backward_velocity), int(up_down_velocity), int(yaw_velocity))
+		with self._lock:
+			self._setpoint = setpoint
+			self._frame_time = frame_time
+			self._published_time = time.time()
+			self.published += 1
+
+	def start(self):
+		self._running = True
+		self.start_time = time.time()
+		self._thread = Thread(target=self._run, daemon=True)
+		self._thread.start()
+		return self
+
+	def stop(self):
+		self._running = False
+		if self._thread is not None:
+			self._thread.join()
+		# never leave the drone moving
+		self._send(ZERO)
+
+	def _next_command(self, now):
+		# (command, frame time it was computed from).  Checked and zeroed under
+		# one lock, a setpoint published in between must not be overwritten
+		with self._lock:
+			if self._published_time is None:
+				return (ZERO, None)
+
+			if now - self._published_time > self.watchdog_timeout:
+				# the vision loop stalled, stop the drone
+				if self._setpoint != ZERO:
+					self.watchdog_trips += 1
+					self._setpoint = ZERO
+					self._frame_time = None
+				return (ZERO, None)
+
+			return (self._setpoint, self._frame_time)
+
+	def _send(self, command, frame_time=None):
+		start = time.time()
+		if self._pass_frame_time:
+			self.tello.send_rc_control(*command, frame_time=frame_time)
+		else:
+			# djitellopy's send_rc_control takes the velocities only
+			self.tello.send_rc_control(*command)
+		send_time = time.time() - start
+
+		self.last_sent = command
+		self.last_sent_time = start
+		self.sent += 1
+		self.send_time_total += send_time
+		self.send_time_max = max(self.send_time_max, send_time)
+
+	def _run(self):
+		next_tick = time.time()
+		while self._running:
+			now = time.time()
+			(command, frame_time) = self._next_command(now)
+
+			if command == ZERO and self.last_sent == ZERO and now - self.last_sent_time < self.zero_keepalive:
+				self.coalesced += 1
+			else:
+				self._send(command, frame_time)
+
+			# fixed rate: schedule from the previous tick, not from now
+			next_tick += self.period
+			delay = next_tick - time.time()
+			if delay > 0:
+				time.sleep(delay)
+			else:
+				self.late_ticks += 1
+				next_tick = time.time()
+
+	def stats(self):
+		elapsed = time.time() - self.start_time if self.start_time else 0.0
+		return {
+			"published": self.published,
+			"sent": self.sent,
+			"coalesced": self.coalesced,
+			"watchdog_trips": self.watchdog_trips,
+			"late_ticks": self.late_ticks,
+			"send_rate_hz": self.sent / elapsed if elapsed > 0 else 0.0,
+			"send_ms_mean": 1000 * self.send_time_total / self.sent if self.sent else 0.0,
+			"send_ms_max": 1000 * self.send_time_max,
+		}
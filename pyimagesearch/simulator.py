@@ -0,0 +1,328 @@
+# import necessary packages
+from threading import Thread, Lock, Condition
+import subprocess
+import shutil
+import socket
+import random
+import heapq
+import math
+import time
+
+class SimulatedPose:
+	"""
+	Very small kinematic model of the drone.  rc velocities (-100~100) are taken as
+	cm/s for left/right, forward/back and up/down and as deg/s for yaw, and are
+	integrated in the world frame.
+	"""
+
+	def __init__(self):
+		self.x = 0.0
+		self.y = 0.0
+		self.z = 0.0
+		self.yaw = 0.0
+		self.rc = (0, 0, 0, 0)
+		self.vgx = 0.0
+		self.vgy = 0.0
+		self.vgz = 0.0
+		self.flying = False
+
+	def step(self, dt):
+		if not self.flying:
+			self.vgx = self.vgy = self.vgz = 0.0
+			return
+
+		(lr, fb, ud, yaw_rate) = self.rc
+		heading = math.radians(self.yaw)
+		# body frame velocities rotated into the world frame
+		self.vgx = fb * math.cos(heading) - lr * math.sin(heading)
+		self.vgy = fb * math.sin(heading) + lr * math.cos(heading)
+		self.vgz = ud
+		self.x += self.vgx * dt
+		self.y += self.vgy * dt
+		self.z = max(self.z + self.vgz * dt, 0.0)
+		self.yaw = (self.yaw + yaw_rate * dt + 180) % 360 - 180
+
+	def move(self, forward=0, right=0, up=0):
+		heading = math.radians(self.yaw)
+		self.x += forward * math.cos(heading) - right * math.sin(heading)
+		self.y += forward * math.sin(heading) + right * math.cos(heading)
+		self.z = max(self.z + up, 0.0)
+
+
+class TelloSimulator:
+	"""
+	Local stand in for a Tello drone speaking the SDK text protocol over UDP.
+
+	Commands are answered on the command port, the state string is pushed to the
+	client on the state port at state_rate Hz once the SDK mode was entered with
+	"command", and after "streamon" a recorded video is streamed as H.264 to the
+	video port (this needs ffmpeg on the path).  Every packet sent back to the
+	client can be delayed by latency +/- jitter seconds and dropped with
+	probability loss, incoming commands are dropped with the same probability.
+	"""
+
+	# seconds a blocking command takes before the drone answers "ok"
+	ACTION_TIME = {"takeoff": 2.0, "land": 2.0, "flip": 1.0}
+	MOVE_SPEED = 100.0  # cm/s for move_* commands
+	ROTATE_SPEED = 90.0  # deg/s for cw / ccw
+
+	def __init__(self, host="127.0.0.1", command_port=8889, state_port=8890, video_port=11111,
+			video_file=None, state_rate=10, latency=0.0, jitter=0.0, loss=0.0, time_scale=1.0):
+		self.host = host
+		self.command_port = command_port
+		self.state_port = state_port
+		self.video_port = video_port
+		self.video_file = video_file
+		self.state_rate = state_rate
+		self.latency = latency
+		self.jitter = jitter
+		self.loss = loss
+		self.time_scale = time_scale
+
+		self.pose = SimulatedPose()
+		self.battery = 100.0
+		self.speed = 10
+		self.sdk_mode = False
+		self.client = None
+		self.start_time = time.time()
+		self.takeoff_time = None
+		self.video_process = None
+
+		self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+		self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		self.sock.bind((host, command_port))
+		self.state_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+		self._lock = Lock()
+		self._outbox = []
+		self._outbox_cv = Condition()
+		self._running = False
+		self._threads = []
+
+		# statistics
+		self.commands_received = 0
+		self.commands_dropped = 0
+		self.packets_sent = 0
+		self.packets_dropped = 0
+
+	def start(self):
+		self._running = True
+		for target in (self._command_loop, self._physics_loop, self._state_loop, self._delivery_loop):
+			thread = Thread(target=target, daemon=True)
+			thread.start()
+			self._threads.append(thread)
+		return self
+
+	def stop(self):
+		self._running = False
+		with self._outbox_cv:
+			self._outbox_cv.notify()
+		self._stop_video()
+		self.sock.close()
+		self.state_sock.close()
+
+	# link impairment
+	def _send(self, sock, data, address):
+		if random.random() < self.loss:
+			self.packets_dropped += 1
+			return
+		delay = max(self.latency + random.uniform(-self.jitter, self.jitter), 0.0)
+		with self._outbox_cv:
+			heapq.heappush(self._outbox, (time.time() + delay, id(data), sock, data, address))
+			self._outbox_cv.notify()
+
+	def _delivery_loop(self):
+		while self._running:
+			with self._outbox_cv:
+				while self._running and not self._outbox:
+					self._outbox_cv.wait()
+				if not self._running:
+					return
+				due = self._outbox[0][0]
+				now = time.time()
+				if due > now:
+					self._outbox_cv.wait(due - now)
+					continue
+				(_, _, sock, data, address) = heapq.heappop(self._outbox)
+			try:
+				sock.sendto(data, address)
+				self.packets_sent += 1
+			except OSError:
+				pass
+
+	def _reply(self, response):
+		self._send(self.sock, response.encode("utf-8"), self.client)
+
+	# command channel
+	def _command_loop(self):
+		while self._running:
+			try:
+				data, address = self.sock.recvfrom(1518)
+			except OSError:
+				return
+			if random.random() < self.loss:
+				self.commands_dropped += 1
+				continue
+
+			self.commands_received += 1
+			self.client = address
+			command = data.decode("utf-8", errors="replace").strip()
+			try:
+				self._handle(command)
+			except (ValueError, IndexError):
+				self._reply("error")
+
+	def _handle(self, command):
+		parts = command.split()
+		if not parts:
+			return
+		name = parts[0]
+
+		if name == "command":
+			self.sdk_mode = True
+			self._reply("ok")
+		elif name == "rc":
+			# well formed rc commands are never acknowledged, the rest get an
+			# error like any other bad command (int raises for non integers)
+			if len(parts) != 5:
+				self._reply("error")
+				return
+			rc = tuple(max(-100, min(100, int(v))) for v in parts[1:])
+			with self._lock:
+				self.pose.rc = rc
+		elif name.endswith("?"):
+			self._reply(self._read(name))
+		elif name == "streamon":
+			self._start_video()
+			self._reply("ok")
+		elif name == "streamoff":
+			self._stop_video()
+			self._reply("ok")
+		elif name == "emergency":
+			with self._lock:
+				self.pose.flying = False
+				self.pose.z = 0.0
+			self._reply("ok")
+		elif name == "speed":
+			self.speed = int(parts[1])
+			self._reply("ok")
+		elif name in ("takeoff", "land", "up", "down", "left", "right", "forward", "back", "cw", "ccw", "flip"):
+			# blocking actions answer once they are done, without holding up rc commands.
+			# A missing or bad distance raises here and is answered with an error
+			if name not in ("takeoff", "land", "flip"):
+				int(parts[1])
+			Thread(target=self._action, args=(name, parts[1:]), daemon=True).start()
+		else:
+			self._reply("error")
+
+	def _action(self, name, args):
+		if name in ("takeoff", "land", "flip"):
+			duration = self.ACTION_TIME[name]
+		elif name in ("cw", "ccw"):
+			duration = int(args[0]) / self.ROTATE_SPEED
+		else:
+			duration = int(args[0]) / self.MOVE_SPEED
+
+		time.sleep(duration * self.time_scale)
+
+		with self._lock:
+			if name == "takeoff":
+				self.pose.flying = True
+				self.pose.z = 80.0
+				self.takeoff_time = time.time()
+			elif name == "land":
+				self.pose.flying = False
+				self.pose.z = 0.0
+				self.pose.rc = (0, 0, 0, 0)
+			elif not self.pose.flying:
+				self._reply("error Not flying")
+				return
+			elif name in ("cw", "ccw"):
+				sign = 1 if name == "cw" else -1
+				self.pose.yaw = (self.pose.yaw + sign * int(args[0]) + 180) % 360 - 180
+			elif name != "flip":
+				distance = int(args[0])
+				offsets = {"up": (0, 0, distance), "down": (0, 0, -distance), "left": (0, -distance, 0),
+					"right": (0, distance, 0), "forward": (distance, 0, 0), "back": (-distance, 0, 0)}
+				(forward, right, up) = offsets[name]
+				self.pose.move(forward=forward, right=right, up=up)
+		self._reply("ok")
+
+	def _flight_time(self):
+		return int(time.time() - self.takeoff_time) if self.takeoff_time else 0
+
+	def _read(self, name):
+		with self._lock:
+			pose = self.pose
+			values = {
+				"battery?": f"{int(self.battery)}",
+				"speed?": f"{self.speed}",
+				"time?": f"{self._flight_time()}s",
+				"height?": f"{int(pose.z / 10)}dm",
+				"temp?": "60~63C",
+				"attitude?": f"pitch:0;roll:0;yaw:{int(pose.yaw)};",
+				"baro?": f"{pose.z / 100:.2f}",
+				"tof?": f"{int(pose.z) + 10}mm",
+				"wifi?": "90",
+				"sdk?": "20",
+				"sn?": "0TQDSIMULATOR",
+			}
+		return values.get(name, "error")
+
+	# state channel
+	def state_string(self):
+		with self._lock:
+			pose = self.pose
+			# the drone reports velocities in dm/s
+			return (f"pitch:0;roll:0;yaw:{int(pose.yaw)};vgx:{int(pose.vgx / 10)};vgy:{int(pose.vgy / 10)};"
+				f"vgz:{int(pose.vgz / 10)};templ:60;temph:63;tof:{int(pose.z) + 10};h:{int(pose.z)};"
+				f"bat:{int(self.battery)};baro:{pose.z / 100:.2f};time:{self._flight_time()};"
+				f"agx:0.00;agy:0.00;agz:-1000.00;\r\n")
+
+	def _state_loop(self):
+		period = 1.0 / self.state_rate
+		next_tick = time.time()
+		while self._running:
+			if self.sdk_mode and self.client is not None:
+				self._send(self.state_sock, self.state_string().encode("utf-8"), (self.client[0], self.state_port))
+			next_tick += period
+			time.sleep(max(next_tick - time.time(), 0))
+
+	def _physics_loop(self):
+		last = time.time()
+		while self._running:
+			time.sleep(0.01)
+			now = time.time()
+			with self._lock:
+				self.pose.step(now - last)
+				# roughly 12 minutes of flight, a little drain on the ground
+				self.battery = max(self.battery - (now - last) * (100 / 720 if self.pose.flying else 0.01), 0.0)
+			last = now
+
+	# video channel
+	def _start_video(self):
+		if self.video_process is not None or self.video_file is None or self.client is None:
+			return
+		ffmpeg = shutil.which("ffmpeg")
+		if ffmpeg is None:
+			print("ffmpeg not found, the simulator will not stream video")
+			return
+		self.video_process = subprocess.Popen([ffmpeg, "-loglevel", "error", "-re", "-stream_loop", "-1",
+			"-i", self.video_file, "-an", "-vf", "scale=960:720", "-c:v", "libx264", "-preset", "ultrafast",
+			"-tune", "zerolatency", "-f", "h264", f"udp://{self.client[0]}:{self.video_port}"])
+
+	def _stop_video(self):
+		if self.video_process is not None:
+			self.video_process.terminate()
+			self.video_process.wait()
+			self.video_process = None
+
+	def stats(self):
+		return {
+			"commands_received": self.commands_received,
+			"commands_dropped": self.commands_dropped,
+			"packets_sent": self.packets_sent,
+			"packets_dropped": self.packets_dropped,
+			"pose": (round(self.pose.x), round(self.pose.y), round(self.pose.z), round(self.pose.yaw)),
+			"battery": int(self.battery),
+		}
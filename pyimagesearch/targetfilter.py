@@ -0,0 +1,152 @@
+# import necessary packages
+import numpy as np
+import time
+
+class TargetFilter:
+	"""
+	Constant velocity Kalman filter for the face center, x and y filtered as two
+	independent position / velocity pairs.
+
+	A detection is only accepted when its innovation (the distance from the
+	prediction, scaled by the filter's uncertainty) is inside the gate, so
+	false positives are rejected without a fixed pixel threshold.  The filter
+	restarts on the new position after reset_after rejections in a row, because
+	then the face really moved.  Without a detection the filter coasts on its
+	velocity for at most max_coast seconds and then gives up.  estimate()
+	predicts lead seconds past now, which covers the time between the frame
+	and the drone acting on the command.
+	"""
+
+	def __init__(self, process_noise=5e5, measurement_noise=25.0, gate=9.21, max_coast=0.5, lead=0.1,
+			reset_after=3):
+		# process_noise: acceleration noise density (px^2/s^3), measurement_noise: detection variance (px^2)
+		# gate: chi-square limit of the innovation, 9.21 keeps 99% of true detections (2 dof)
+		self.process_noise = process_noise
+		self.measurement_noise = measurement_noise
+		self.gate = gate
+		self.max_coast = max_coast
+		self.lead = lead
+		self.reset_after = reset_after
+
+		# per axis state and covariance [[p11, p12], [p12, p22]]
+		self.position = np.zeros(2)
+		self.velocity = np.zeros(2)
+		self.p11 = np.zeros(2)
+		self.p12 = np.zeros(2)
+		self.p22 = np.zeros(2)
+		self.state_time = None
+		self.last_measurement_time = None
+		self.rejects_in_row = 0
+
+		self.accepted = 0
+		self.rejected = 0
+		self.resets = 0
+		self.coasted = 0
+		self.lost = 0
+
+	@property
+	def tracking(self):
+		return self.state_time is not None
+
+	def _start(self, center, timestamp):
+		self.position[:] = center
+		self.velocity[:] = 0
+		self.p11[:] = self.measurement_noise
+		self.p12[:] = 0
+		# the velocity is unknown, start with a large uncertainty
+		self.p22[:] = 200.0 ** 2
+		self.state_time = timestamp
+		self.last_measurement_time = timestamp
+		self.rejects_in_row = 0
+
+	def _predict(self, timestamp):
+		dt = timestamp - self.state_time
+		if dt <= 0:
+			return
+		q = self.process_noise
+		self.position += self.velocity * dt
+		self.p11 += dt * (2 * self.p12 + dt * self.p22) + q * dt ** 3 / 3
+		self.p12 += dt * self.p22 + q * dt ** 2 / 2
+		self.p22 += q * dt
+		self.state_time = timestamp
+
+	def _innovation(self, center):
+		residual = np.asarray(center, dtype=np.float64) - self.position
+		s = self.p11 + self.measurement_noise
+		return residual, s, float((residual ** 2 / s).sum())
+
+	def update(self, centers, timestamp=None):
+		"""
+		Feed the detected centers of one frame.  Returns (index, distance): the index
+		of the accepted center, or None, and its distance from the prediction in
+		pixels, or -1 when no center was accepted.
+		"""
+		timestamp = time.time() if timestamp is None else timestamp
+
+		if not self.tracking:
+			if len(centers) == 0:
+				return (None, -1)
+			self._start(centers[0], timestamp)
+			self.accepted += 1
+			return (0, 0.0)
+
+		self._predict(timestamp)
+
+		if len(centers) == 0:
+			self.coasted += 1
+			self._check_coast(timestamp)
+			return (None, -1)
+
+		# the detection closest to the prediction
+		innovations = [self._innovation(center) for center in centers]
+		index = min(range(len(centers)), key=lambda i: innovations[i][2])
+		residual, s, m2 = innovations[index]
+
+		if m2 > self.gate:
+			self.rejected += 1
+			self.rejects_in_row += 1
+			if self.rejects_in_row >= self.reset_after:
+				# consistently somewhere else, follow it
+				self.resets += 1
+				self._start(centers[index], timestamp)
+				return (index, float(np.hypot(*residual)))
+			self._check_coast(timestamp)
+			return (None, -1)
+
+		# measurement update
+		k1 = self.p11 / s
+		k2 = self.p12 / s
+		self.position += k1 * residual
+		self.velocity += k2 * residual
+		self.p22 -= k2 * self.p12
+		self.p12 *= 1 - k1
+		self.p11 *= 1 - k1
+		self.last_measurement_time = timestamp
+		self.rejects_in_row = 0
+		self.accepted += 1
+		return (index, float(np.hypot(*residual)))
+
+	def _check_coast(self, timestamp):
+		if timestamp - self.last_measurement_time > self.max_coast:
+			self.lost += 1
+			self.state_time = None
+
+	def estimate(self, now=None):
+		"""
+		Predicted (x, y) center lead seconds after now, or None when not tracking.
+		"""
+		if not self.tracking:
+			return None
+		now = time.time() if now is None else now
+		dt = max(now + self.lead - self.state_time, 0.0)
+		(x, y) = self.position + self.velocity * dt
+		return (int(x), int(y))
+
+	def stats(self):
+		return {
+			"accepted": self.accepted,
+			"rejected": self.rejected,
+			"resets": self.resets,
+			"coasted": self.coasted,
+			"lost": self.lost,
+		}
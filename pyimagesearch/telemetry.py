@@ -0,0 +1,126 @@
+# import necessary packages
+from threading import Thread
+import numpy as np
+import socket
+import time
+
+# fields of the Tello state string, in the order the drone sends them
+STATE_FIELDS = ("pitch", "roll", "yaw", "vgx", "vgy", "vgz", "templ", "temph", "tof", "h", "bat", "baro",
+	"time", "agx", "agy", "agz")
+
+# every record starts with the time the packet was received
+STATE_DTYPE = np.dtype([("t", np.float64)] + [(field, np.float64) for field in STATE_FIELDS])
+_COLUMN = {field.encode("ascii"): i + 1 for i, field in enumerate(STATE_FIELDS)}
+
+class TelemetryIngester:
+	"""
+	Background reader for the state string the Tello pushes to UDP 8890 about ten
+	times a second.
+
+	Packets are received into a preallocated buffer and parsed straight into the
+	next row of a fixed capacity ring of STATE_DTYPE records, so state reads never
+	touch the command channel and nothing grows while flying.  latest() is O(1),
+	window() / mean() run vectorized over the last N seconds.
+	"""
+
+	def __init__(self, port=8890, host="0.0.0.0", capacity=6000):
+		self.capacity = capacity
+		self._data = np.zeros((capacity, len(STATE_DTYPE.names)), dtype=np.float64)
+		# structured view on the same memory
+		self.records = self._data.view(STATE_DTYPE).reshape(capacity)
+		self._packet = bytearray(1024)
+		self.head = 0
+		self.count = 0
+		self.packets = 0
+		self.bad_packets = 0
+
+		self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+		self.sock.bind((host, port))
+		self.sock.settimeout(0.5)
+		self._running = False
+		self._thread = None
+
+	def start(self):
+		self._running = True
+		self._thread = Thread(target=self._run, daemon=True)
+		self._thread.start()
+		return self
+
+	def stop(self):
+		self._running = False
+		if self._thread is not None:
+			self._thread.join()
+		self.sock.close()
+
+	def _run(self):
+		while self._running:
+			try:
+				n = self.sock.recv_into(self._packet)
+			except socket.timeout:
+				continue
+			except OSError:
+				return
+			self.ingest(self._packet, n, time.time())
+
+	def ingest(self, packet, n, timestamp):
+		row = self._data[self.head]
+		row[0] = timestamp
+		try:
+			# "pitch:0;roll:0;yaw:0;...;agz:-1000.00;\r\n"
+			for item in bytes(packet[:n]).split(b";"):
+				key, sep, value = item.partition(b":")
+				column = _COLUMN.get(key.strip())
+				if column is not None and sep:
+					row[column] = float(value)
+		except ValueError:
+			self.bad_packets += 1
+			return
+
+		# publish the row only once it is complete
+		self.head = (self.head + 1) % self.capacity
+		self.count = min(self.count + 1, self.capacity)
+		self.packets += 1
+
+	def wait_for_state(self, timeout=3.0):
+		deadline = time.time() + timeout
+		while self.count == 0 and time.time() < deadline:
+			time.sleep(0.01)
+		return self.count > 0
+
+	def latest(self, field=None):
+		"""
+		Most recent state record, or a single field of it.  None before the first packet.
+		"""
+		if self.count == 0:
+			return None
+		record = self.records[(self.head - 1) % self.capacity]
+		return float(record[field]) if field else record.copy()
+
+	def last(self, n=None):
+		# the last n records in arrival order
+		n = self.count if n is None else min(n, self.count)
+		start = self.head - n
+		if start >= 0:
+			return self.records[start:self.head]
+		return np.concatenate((self.records[start:], self.records[:self.head]))
+
+	def window(self, seconds, field=None, now=None):
+		"""
+		Records (or one field of them) received during the last `seconds`.
+		"""
+		now = time.time() if now is None else now
+		# the drone sends about 10 packets a second, 50 leaves plenty of margin
+		records = self.last(int(seconds * 50) + 1)
+		records = records[records["t"] >= now - seconds]
+		return records[field] if field else records
+
+	def mean(self, field, seconds, now=None):
+		values = self.window(seconds, field, now)
+		return float(values.mean()) if len(values) else None
+
+	def speed(self, seconds=2.0, now=None):
+		# mean ground speed in cm/s (vgx / vgy / vgz are dm/s)
+		records = self.window(seconds, now=now)
+		if not len(records):
+			return None
+		return float(np.sqrt(records["vgx"] ** 2 + records["vgy"] ** 2 + records["vgz"] ** 2).mean() * 10)
@@ -0,0 +1,258 @@
+# import necessary packages
+from pyimagesearch.latency import LatencyHistogram
+from collections import deque, defaultdict
+from threading import Thread
+import asyncio
+import time
+
+class _Request:
+	__slots__ = ("command", "kind", "future", "sent_time", "attempts", "answers", "orphan_until")
+
+	def __init__(self, command, kind, future):
+		self.command = command
+		self.kind = kind
+		self.future = future
+		self.sent_time = time.time()
+		# every attempt may be answered, the first answer wins
+		self.attempts = 0
+		self.answers = 0
+		self.orphan_until = None
+
+
+class _TelloProtocol(asyncio.DatagramProtocol):
+	def __init__(self, client):
+		self.client = client
+
+	def datagram_received(self, data, addr):
+		self.client._on_response(data)
+
+	def error_received(self, exc):
+		print(f"Tello link error: {exc}")
+
+
+class TelloClient:
+	"""
+	asyncio client for the Tello SDK command port.
+
+	Acknowledged commands are awaitable, with a timeout and optional retries, and up
+	to max_in_flight of them can be outstanding at once.  The Tello answers in order
+	and without request ids, so a response is matched to the oldest outstanding
+	request of the same kind: "ok" / "error" for control commands, a value for "?"
+	queries.  A request that timed out, or was retried and still owes answers to
+	its other attempts, stays in line for up to orphan_grace seconds so the late
+	answers are discarded instead of being handed to the next request.
+
+	rc commands go through their own latest-wins slot and are never acknowledged.
+	With rc_rate set the latest rc command is resent at that rate, otherwise it is
+	sent right away.  Round trip times are kept per command in latency histograms.
+	"""
+
+	def __init__(self, host="192.168.10.1", port=8889, local_port=9000, timeout=7.0, retries=0, read_retries=2,
+			max_in_flight=1, rc_rate=None, orphan_grace=3.0):
+		self.address = (host, port)
+		self.local_port = local_port
+		self.timeout = timeout
+		self.retries = retries
+		self.read_retries = read_retries
+		self.max_in_flight = max_in_flight
+		self.rc_rate = rc_rate
+		self.orphan_grace = orphan_grace
+
+		self.transport = None
+		self._pending = deque()
+		self._in_flight = None
+		self._rc_command = None
+		self._rc_task = None
+
+		self.latency = defaultdict(LatencyHistogram)
+		self.sent = 0
+		self.rc_sent = 0
+		self.timeouts = 0
+		self.late_responses = 0
+		self.unsolicited = 0
+
+	async def open(self):
+		loop = asyncio.get_running_loop()
+		self._in_flight = asyncio.Semaphore(self.max_in_flight)
+		self.transport, _ = await loop.create_datagram_endpoint(lambda: _TelloProtocol(self),
+			local_addr=("0.0.0.0", self.local_port))
+		if self.rc_rate:
+			self._rc_task = asyncio.ensure_future(self._rc_loop())
+		return self
+
+	async def connect(self):
+		# enter SDK mode
+		return await self.command("command")
+
+	async def close(self):
+		if self._rc_task is not None:
+			self._rc_task.cancel()
+		if self.transport is not None:
+			self.transport.close()
+
+	async def __aenter__(self):
+		return await self.open()
+
+	async def __aexit__(self, *exc):
+		await self.close()
+
+	def send(self, command):
+		# fire and forget, nothing is waited for
+		self.transport.sendto(command.encode("utf-8"), self.address)
+		self.sent += 1
+
+	def send_rc(self, left_right_velocity, forward_backward_velocity, up_down_velocity, yaw_velocity):
+		self._rc_command = (f"rc {int(left_right_velocity)} {int(forward_backward_velocity)} "
+			f"{int(up_down_velocity)} {int(yaw_velocity)}")
+		if not self.rc_rate:
+			self.send(self._rc_command)
+			self.rc_sent += 1
+
+	async def _rc_loop(self):
+		period = 1.0 / self.rc_rate
+		while True:
+			if self._rc_command is not None:
+				self.send(self._rc_command)
+				self.rc_sent += 1
+			await asyncio.sleep(period)
+
+	async def command(self, command, timeout=None, retries=None):
+		"""
+		Send a command and return the drone's answer.  Raises TimeoutError when no
+		answer came back after all retries.
+		"""
+		kind = "read" if command.endswith("?") else "control"
+		if timeout is None:
+			timeout = self.timeout
+		if retries is None:
+			retries = self.read_retries if kind == "read" else self.retries
+
+		loop = asyncio.get_running_loop()
+		async with self._in_flight:
+			request = _Request(command, kind, loop.create_future())
+			self._pending.append(request)
+			try:
+				for attempt in range(retries + 1):
+					# a retry keeps its place in line, whichever answer comes first wins
+					request.attempts += 1
+					self.send(command)
+					try:
+						response = await asyncio.wait_for(asyncio.shield(request.future), timeout)
+					except asyncio.TimeoutError:
+						self.timeouts += 1
+						continue
+
+					# the answer can be to any attempt, so the wait is timed from the first
+					self.latency[command.split()[0]].record(time.time() - request.sent_time)
+					return response
+			finally:
+				# swallow the answers still owed to the other attempts for a while
+				request.orphan_until = time.time() + self.orphan_grace
+				if request.answers >= request.attempts and request in self._pending:
+					self._pending.remove(request)
+
+		raise TimeoutError(f"No response from Tello to {command!r} after {retries + 1} attempts")
+
+	def _on_response(self, data):
+		response = data.decode("utf-8", errors="replace").strip()
+		now = time.time()
+
+		# forget requests that timed out long enough ago
+		while self._pending and self._pending[0].orphan_until is not None and self._pending[0].orphan_until < now:
+			self._pending.popleft()
+
+		if response == "ok" or response.startswith("error"):
+			kind = None if response.startswith("error") else "control"
+		else:
+			kind = "read"
+
+		for request in self._pending:
+			if kind is not None and request.kind != kind:
+				continue
+			if request.future.done() and request.answers >= request.attempts:
+				# answered and owes nothing, about to leave the line
+				continue
+			request.answers += 1
+			if request.orphan_until is not None or request.future.done():
+				self.late_responses += 1
+			else:
+				request.future.set_result(response)
+			# leaves the line as soon as every attempt was answered, a pipelined
+			# command behind it must get the next answer
+			if request.answers >= request.attempts:
+				self._pending.remove(request)
+			return
+
+		self.unsolicited += 1
+
+	def stats(self):
+		return {
+			"sent": self.sent,
+			"rc_sent": self.rc_sent,
+			"timeouts": self.timeouts,
+			"late_responses": self.late_responses,
+			"unsolicited": self.unsolicited,
+			"pending": len(self._pending),
+			"latency_ms": {name: histogram.summary() for name, histogram in self.latency.items()},
+		}
+
+
+class ThreadedTelloClient:
+	"""
+	TelloClient on an event loop of its own thread, for synchronous code.
+	submit() returns a concurrent.futures.Future of the drone's answer, so the
+	caller can wait on it with its own timeout and keep doing other work.
+	"""
+
+	def __init__(self, **client_kwargs):
+		self.client = TelloClient(**client_kwargs)
+		self.loop = asyncio.new_event_loop()
+		self._thread = Thread(target=self.loop.run_forever, daemon=True)
+		self._thread.start()
+		asyncio.run_coroutine_threadsafe(self.client.open(), self.loop).result()
+
+	def submit(self, command, timeout=None, retries=None):
+		return asyncio.run_coroutine_threadsafe(self.client.command(command, timeout, retries), self.loop)
+
+	def close(self):
+		asyncio.run_coroutine_threadsafe(self.client.close(), self.loop).result()
+		self.loop.call_soon_threadsafe(self.loop.stop)
+		self._thread.join()
+		self.loop.close()
+
+
+async def repl(client):
+	"""
+	Interactive prompt: every line is sent as a command and the answer printed with
+	its round trip time.  rc commands are sent without waiting, "stats" prints the
+	latency histograms and an empty line or "end" quits.
+	"""
+	loop = asyncio.get_running_loop()
+	while True:
+		try:
+			msg = await loop.run_in_executor(None, input, "")
+		except (EOFError, KeyboardInterrupt):
+			break
+
+		msg = msg.strip()
+		if not msg or 'end' in msg:
+			print('...')
+			break
+
+		if msg == "stats":
+			for name, histogram in client.latency.items():
+				print(f"{name}: {histogram.summary()}")
+				print(histogram.bars())
+			print(client.stats())
+			continue
+
+		if msg.startswith("rc "):
+			client.send(msg)
+			continue
+
+		start = time.time()
+		try:
+			response = await client.command(msg)
+			print(f"{response}  ({(time.time() - start) * 1000:.1f}ms)")
+		except TimeoutError as e:
+			print(e)
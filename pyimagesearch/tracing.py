@@ -0,0 +1,161 @@
+# import necessary packages
+from pyimagesearch.latency import LatencyHistogram
+from contextlib import contextmanager
+import numpy as np
+import json
+import time
+
+class Tracer:
+	"""
+	Per frame stage timestamps and per stage latency histograms.
+
+	A trace is one wall clock timestamp for the start of the frame followed by
+	one per stage, so it can travel with the frame through a FrameRing and be
+	picked up by another process.  finish() turns the stages marked in this
+	process into durations (time since the previous stamped stage), records them
+	with the end to end time since the start, and dumps the histograms to a json
+	file every dump_interval seconds.
+	"""
+
+	enabled = True
+
+	def __init__(self, stages, name="trace", dump_path=None, dump_interval=5.0):
+		self.stages = tuple(stages)
+		self.name = name
+		self.dump_path = dump_path
+		self.dump_interval = dump_interval
+
+		self._index = {stage: i + 1 for i, stage in enumerate(self.stages)}
+		self.stamps = np.full(len(self.stages) + 1, np.nan)
+		self._marked = []
+
+		self.histograms = {stage: LatencyHistogram() for stage in self.stages}
+		self.end_to_end = LatencyHistogram()
+		self.frames = 0
+		self._last_dump = time.time()
+
+	@property
+	def trace_len(self):
+		return len(self.stamps)
+
+	def begin(self, timestamp=None):
+		self.stamps[:] = np.nan
+		self.stamps[0] = time.time() if timestamp is None else timestamp
+		self._marked.clear()
+
+	def load(self, trace):
+		# continue a trace that was started in another process
+		self.stamps[:] = trace
+		self._marked.clear()
+
+	def store(self, trace):
+		trace[:] = self.stamps
+
+	def mark(self, stage):
+		i = self._index[stage]
+		self.stamps[i] = time.time()
+		self._marked.append(i)
+
+	def finish(self):
+		if not self._marked:
+			return
+		for i in self._marked:
+			# the previous stage that has a timestamp, possibly from another process
+			previous = i - 1
+			while previous > 0 and np.isnan(self.stamps[previous]):
+				previous -= 1
+			self.histograms[self.stages[i - 1]].record(self.stamps[i] - self.stamps[previous])
+		self.end_to_end.record(self.stamps[self._marked[-1]] - self.stamps[0])
+		self.frames += 1
+
+		if self.dump_path and time.time() - self._last_dump >= self.dump_interval:
+			self.dump()
+
+	def summary(self):
+		return {
+			"name": self.name,
+			"frames": self.frames,
+			"stages_ms": {stage: h.summary() for stage, h in self.histograms.items() if h.count},
+			"end_to_end_ms": self.end_to_end.summary(),
+		}
+
+	def dump(self):
+		self._last_dump = time.time()
+		if self.dump_path:
+			with open(self.dump_path, "w") as f:
+				json.dump(self.summary(), f, indent=2)
+
+
+class NullTracer:
+	"""
+	Tracer that does nothing, used when tracing is off so the pipeline pays
+	no more than an empty method call per stage.
+	"""
+
+	enabled = False
+	trace_len = 0
+
+	def begin(self, timestamp=None):
+		pass
+
+	def load(self, trace):
+		pass
+
+	def store(self, trace):
+		pass
+
+	def mark(self, stage):
+		pass
+
+	def finish(self):
+		pass
+
+	def summary(self):
+		return {}
+
+	def dump(self):
+		pass
+
+
+def make_tracer(enabled, stages, name="trace", dump_path=None, dump_interval=5.0):
+	if not enabled:
+		return NullTracer()
+	return Tracer(stages, name=name, dump_path=dump_path, dump_interval=dump_interval)
+
+
+class StartupTimer:
+	"""
+	Wall clock breakdown of the startup phases.  Phases that run in the
+	background overlap the others, so the total is the time from start to
+	the last phase, not the sum of the phases.
+	"""
+
+	def __init__(self, name="startup", start=None):
+		self.name = name
+		self.start = time.time() if start is None else start
+		self.phases = []
+		self.end = self.start
+
+	def record(self, phase, seconds, background=False):
+		self.phases.append((phase, seconds, background))
+		self.end = max(self.end, time.time())
+
+	@contextmanager
+	def phase(self, phase, background=False):
+		start = time.time()
+		try:
+			yield
+		finally:
+			self.record(phase, time.time() - start, background)
+
+	def summary(self):
+		return {
+			"name": self.name,
+			"phases_s": {phase: round(seconds, 3) for phase, seconds, _ in self.phases},
+			"total_s": round(self.end - self.start, 3),
+		}
+
+	def report(self):
+		phases = " | ".join(f"{phase}{' (bg)' if background else ''} {seconds:.2f}s"
+			for phase, seconds, background in self.phases)
+		return f"{self.name}: {phases} | total {self.end - self.start:.2f}s"
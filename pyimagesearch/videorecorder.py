@@ -0,0 +1,126 @@
+# import necessary packages
+from pyimagesearch.latency import LatencyHistogram
+from threading import Thread
+from datetime import datetime
+import queue
+import time
+import cv2
+
+class VideoRecorder:
+	"""
+	Constant frame rate video recorder that encodes on a background thread.
+
+	write() places each frame on the timeline by its timestamp.  A frame that
+	arrives late is queued once with a repeat count that fills the gap, and a
+	frame that is early is dropped.  The file therefore plays back at the real
+	speed of the flight.  Encoding happens on a thread behind a bounded queue, so
+	a slow encoder drops frames instead of blocking the caller.  The frame size
+	comes from the first frame.  The output is split into files of
+	segment_seconds, so a crash loses at most the segment being written.
+	"""
+
+	def __init__(self, prefix=None, fps=30, segment_seconds=60, queue_size=60, fourcc="MP4V"):
+		if prefix is None:
+			prefix = f"video_{datetime.now().strftime('%d-%m-%Y_%I-%M-%S_%p')}"
+		self.prefix = prefix
+		self.fps = fps
+		self.segment_frames = int(segment_seconds * fps) if segment_seconds else None
+		self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+
+		self._queue = queue.Queue(maxsize=queue_size)
+		self._writer = None
+		self._written_in_segment = 0
+		self.files = []
+
+		self._first_time = None
+		self.frames_in = 0
+		self.frames_queued = 0
+		self.frames_written = 0
+		self.duplicated = 0
+		self.dropped_early = 0
+		self.dropped_full = 0
+		self.encode_time = LatencyHistogram()
+		self._queue_depth_sum = 0
+		self.queue_depth_max = 0
+
+		self._thread = Thread(target=self._run, daemon=True)
+		self._thread.start()
+
+	def write(self, frame, timestamp=None):
+		timestamp = time.time() if timestamp is None else timestamp
+		if self._first_time is None:
+			self._first_time = timestamp
+		self.frames_in += 1
+
+		# how many frames the file should hold once this one is written
+		frames_due = int((timestamp - self._first_time) * self.fps) + 1
+		repeat = frames_due - self.frames_queued
+		if repeat <= 0:
+			self.dropped_early += 1
+			return False
+
+		try:
+			# copy, the caller's buffer is reused as soon as we return
+			self._queue.put_nowait((frame.copy(), repeat))
+		except queue.Full:
+			# the next frame that gets in fills the gap
+			self.dropped_full += 1
+			return False
+
+		self.frames_queued = frames_due
+		self.duplicated += repeat - 1
+		depth = self._queue.qsize()
+		self._queue_depth_sum += depth
+		self.queue_depth_max = max(self.queue_depth_max, depth)
+		return True
+
+	def _open_segment(self, frame):
+		height, width = frame.shape[:2]
+		path = f"{self.prefix}_{len(self.files):03d}.mp4"
+		self._writer = cv2.VideoWriter(path, self.fourcc, self.fps, (width, height))
+		self._written_in_segment = 0
+		self.files.append(path)
+
+	def _run(self):
+		while True:
+			item = self._queue.get()
+			if item is None:
+				break
+			frame, repeat = item
+
+			for _ in range(repeat):
+				if self._writer is None:
+					self._open_segment(frame)
+				start = time.perf_counter()
+				self._writer.write(frame)
+				self.encode_time.record(time.perf_counter() - start)
+				self.frames_written += 1
+				self._written_in_segment += 1
+
+				if self.segment_frames and self._written_in_segment >= self.segment_frames:
+					self._writer.release()
+					self._writer = None
+
+		if self._writer is not None:
+			self._writer.release()
+			self._writer = None
+
+	def release(self):
+		# encode what is still queued, then close the current segment
+		if self._thread.is_alive():
+			self._queue.put(None)
+			self._thread.join()
+
+	def stats(self):
+		accepted = self.frames_in - self.dropped_early - self.dropped_full
+		return {
+			"frames_in": self.frames_in,
+			"frames_written": self.frames_written,
+			"duplicated": self.duplicated,
+			"dropped_early": self.dropped_early,
+			"dropped_full": self.dropped_full,
+			"queue_depth_mean": self._queue_depth_sum / accepted if accepted else 0.0,
+			"queue_depth_max": self.queue_depth_max,
+			"encode_ms": self.encode_time.summary(),
+			"files": list(self.files),
+		}
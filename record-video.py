@@ -1,37 +1,26 @@
-import time, cv2
-from threading import Thread
 from djitellopy import Tello
+from pyimagesearch.mission import Mission, MissionExecutor, format_report
+from pyimagesearch.videorecorder import VideoRecorder
 
 tello = Tello()
 
 tello.connect()
 
-keepRecording = True
 tello.streamon()
 frame_read = tello.get_frame_read()
 
-def videoRecorder():
-    # create a VideoWrite object, recoring to ./video.avi
-    height, width, _ = frame_read.frame.shape
-    video = cv2.VideoWriter('video.avi', cv2.VideoWriter_fourcc(*'XVID'), 30, (width, height))
+# the executor feeds the recorder from its own thread while the blocking commands run,
+# the recorder encodes at a constant 30 fps into ./video_000.mp4
+recorder = VideoRecorder(prefix="video", fps=30)
 
-    while keepRecording:
-        video.write(frame_read.frame)
-        time.sleep(1 / 30)
+mission = (Mission("record-video")
+           .takeoff()
+           .move("up", 100)
+           .rotate(-360)
+           .land())
 
-    video.release()
+results = MissionExecutor(tello, frame_read=frame_read, recorder=recorder).run(mission)
+print(format_report(results))
 
-
-# we need to run the recorder in a seperate thread, otherwise blocking options
-#  would prevent frames from getting added to the video
-recorder = Thread(target=videoRecorder)
-recorder.start()
-
-tello.takeoff()
-tello.move_up(100)
-tello.rotate_counter_clockwise(360)
-tello.land()
-
-keepRecording = False
-recorder.join()
+recorder.release()
 tello.streamoff()
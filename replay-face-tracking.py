@@ -0,0 +1,95 @@
+from pyimagesearch.framering import FrameRing, KEEP_LATEST
+from pyimagesearch.framesource import FileFrameSource
+from pyimagesearch.mocktello import RecordingTello
+from tello_face_tracking import track_face_in_video_feed, show_video, serve_video, PIPELINE_STAGES
+from pyimagesearch.overlay import FRAME_META_DTYPE
+from multiprocessing import Process, Event
+import numpy as np
+import argparse
+import time
+
+"""
+Run the face tracking pipeline without a drone.  Frames come from a recorded video and the Tello is replaced
+by a RecordingTello that logs every rc command, so the end to end frame rate and the command latency can be
+measured on any machine and compared after every change.
+
+python replay-face-tracking.py --video video_12-06-2020_08-19-53_PM.mp4 --max-speed
+"""
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--video", default="video_12-06-2020_08-19-53_PM.mp4", help="recorded video to replay")
+    ap.add_argument("--max-speed", action="store_true", help="read frames as fast as possible instead of at the native rate")
+    ap.add_argument("--loop", action="store_true", help="restart the video when it ends, stop with ctrl-c")
+    ap.add_argument("--display", action="store_true", help="show the annotated frames in a window")
+    ap.add_argument("--http", type=int, default=None, metavar="PORT",
+                    help="serve the annotated frames as MJPEG on this port, POST /quit stops the replay")
+    ap.add_argument("--http-host", default="127.0.0.1",
+                    help="address to serve the MJPEG stream on, 0.0.0.0 for the network")
+    ap.add_argument("--flight-log", default=None, help="binary flight log to write a record per frame to")
+    ap.add_argument("--rc-log", default=None, help="csv file to write the rc commands to")
+    ap.add_argument("--detector-workers", type=int, default=0, help="run face detection in N worker processes")
+    ap.add_argument("--trace", action="store_true", help="time every frame through each pipeline stage")
+    ap.add_argument("--detector", default="haar", choices=("haar", "lbp", "skin"), help="face detector backend")
+    ap.add_argument("--lock-policy", default="none", choices=("largest", "center", "first", "none"),
+                    help="which face to follow with several in view, none follows the detector's first face")
+    ap.add_argument("--no-target-filter", action="store_true",
+                    help="use the 25 pixel jitter reject instead of the Kalman target filter")
+    ap.add_argument("--target-hz", type=float, default=None,
+                    help="lower the detection quality when needed to hold this control loop rate")
+    ap.add_argument("--trace-dir", default=".", help="directory for the trace_*.json latency summaries")
+    args = ap.parse_args()
+
+    frame_source = FileFrameSource(args.video, realtime=not args.max_speed, loop=args.loop)
+    drone = RecordingTello(frame_source)
+    frame_ring = FrameRing(shape=(300, 400, 3), slots=8, consumers=("display",), policies={"display": KEEP_LATEST},
+                           trace_len=len(PIPELINE_STAGES) + 1 if args.trace else 0, meta_dtype=FRAME_META_DTYPE)
+    exit_event = Event()
+
+    display = None
+    if args.http:
+        display = Process(target=serve_video, args=(exit_event, frame_ring,),
+                          kwargs={"host": args.http_host, "port": args.http, "trace": args.trace, "trace_dir": args.trace_dir})
+        display.start()
+    elif args.display:
+        display = Process(target=show_video, args=(exit_event, frame_ring,),
+                          kwargs={"trace": args.trace, "trace_dir": args.trace_dir})
+        display.start()
+
+    start = time.time()
+    track_face_in_video_feed(exit_event, frame_ring, run_pid=True, track_face=True, fly=True,
+                             drone=drone, frame_source=frame_source, detector_workers=args.detector_workers,
+                             trace=args.trace, trace_dir=args.trace_dir, use_target_filter=not args.no_target_filter,
+                             detector_backend=args.detector,
+                             lock_policy=None if args.lock_policy == "none" else args.lock_policy,
+                             flight_log_path=args.flight_log, flight_log_info={"source": args.video},
+                             target_hz=args.target_hz)
+    elapsed = time.time() - start
+
+    if display:
+        if args.http:
+            # the server stops on the exit event
+            exit_event.set()
+            display.join(timeout=2)
+        display.terminate()
+        display.join()
+
+    print()
+    print(f"Frames read: {frame_source.frames_read} skipped: {frame_source.frames_skipped} in {elapsed:.2f}s")
+    print(f"Pipeline FPS: {frame_source.frames_read / elapsed:.1f}")
+    print(f"Frames published: {frame_ring.sent}")
+    if display:
+        print(f"Frame ring: {frame_ring.stats()}")
+    print(f"RC commands sent: {len(drone.rc_commands)}")
+
+    latencies = np.array(drone.command_latencies()) * 1000
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"Frame to command latency ms: mean {latencies.mean():.2f} p50 {p50:.2f} p95 {p95:.2f} "
+              f"p99 {p99:.2f} max {latencies.max():.2f}")
+
+    if args.rc_log:
+        drone.save_rc_log(args.rc_log)
+        print(f"RC commands written to {args.rc_log}")
+
+    frame_ring.unlink()
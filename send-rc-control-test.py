@@ -1,4 +1,5 @@
 from djitellopy import Tello
+from pyimagesearch.telemetry import TelemetryIngester
 import time
 
 """
@@ -13,6 +14,7 @@ up_down_speed = 0
 left_right_speed = 0
 
 tello = None
+telemetry = None
 
 
 def set_speeds(ud, lr):
@@ -22,12 +24,19 @@ def set_speeds(ud, lr):
     tello.send_rc_control(lr, 0, ud, 0)
 
 
+def battery():
+    # read the battery from the state stream instead of asking on the command channel
+    bat = telemetry.latest('bat')
+    return int(bat) if bat is not None else tello.get_battery()
+
+
 if __name__ == '__main__':
+    telemetry = TelemetryIngester().start()
     tello = Tello()
     tello.connect()
-    time.sleep(0.5)
+    telemetry.wait_for_state(timeout=2)
 
-    print(f"Battery Life Pecentage: {tello.get_battery()}")
+    print(f"Battery Life Pecentage: {battery()}")
 
     is_flying = False
 
@@ -58,7 +67,8 @@ if __name__ == '__main__':
         elif cmd == 2:
             set_speeds(-speed, 0)
         elif cmd == 5:
-            print(f"Battery Life Percentage: {tello.get_battery()}")
+            print(f"Battery Life Percentage: {battery()}  Height: {telemetry.latest('h')}cm  "
+                  f"Speed (2s): {telemetry.speed(2.0)}cm/s")
         elif cmd == 6:
             set_speeds(0, 0)
         elif cmd == 7:
@@ -71,3 +81,5 @@ if __name__ == '__main__':
             tello.land()
             break
 
+    telemetry.stop()
+
@@ -1,5 +1,5 @@
 from djitellopy import Tello
-import time
+from pyimagesearch.mission import Mission, MissionExecutor, format_report
 
 print("Create Tello object")
 tello = Tello()
@@ -9,24 +9,19 @@ tello.connect()
 
 print(f"Battery Life Pecentage: {tello.get_battery()}")
 
-
-print("Takeoff - hoser!")
-tello.takeoff()
-
-time.sleep(1)
-print("Move Left 100 cm")
-tello.move_left(50)
-
-time.sleep(1)
-print("Rotate clockwise")
-tello.rotate_clockwise(90)
-
-time.sleep(1)
-print("Move forward 100 cm")
-tello.move_forward(50)
-
-print("Prepare floor to land.... you have 1 second")
-time.sleep(1)
-print("landing")
-tello.land()
+# takeoff, move left 50 cm, rotate clockwise, move forward 50 cm and land.  The executor
+# waits on each command with a timeout and lands the drone if one of them fails.
+mission = (Mission("simple")
+           .takeoff()
+           .hover(1)
+           .move("left", 50)
+           .hover(1)
+           .rotate(90)
+           .hover(1)
+           .move("forward", 50)
+           .hover(1)
+           .land())
+
+results = MissionExecutor(tello).run(mission)
+print(format_report(results))
 print("touchdown.... goodbye")
@@ -1,5 +1,5 @@
-import cv2
 from djitellopy import Tello
+from pyimagesearch.mission import Mission, MissionExecutor, format_report
 import time
 
 tello = Tello()
@@ -10,15 +10,14 @@ tello.streamon()
 
 frame_read = tello.get_frame_read()
 
-tello.takeoff()
+# give the stream two seconds in the air to settle before the picture
+mission = (Mission("take-picture")
+           .takeoff()
+           .hover(2)
+           .picture("tello-picture.png")
+           .land())
 
-print("I will take a picture in 2 seconds")
-time.sleep(1)
-print("I will take a picture in 1 seconds")
-time.sleep(1)
-
-cv2.imwrite("tello-picture.png", frame_read.frame)
-
-tello.land()
+results = MissionExecutor(tello, frame_read=frame_read).run(mission)
+print(format_report(results))
 
 tello.streamoff()
@@ -0,0 +1,46 @@
+from pyimagesearch.simulator import TelloSimulator
+import argparse
+import time
+
+"""
+Local Tello stand in.  Answers SDK commands on the command port, pushes the state string on 8890, streams a
+recorded video as H.264 on 11111 after streamon (needs ffmpeg) and integrates rc velocities into a simulated
+pose.  Latency, jitter and packet loss can be injected to load test the control stack.
+
+python tello-simulator.py --latency 0.02 --jitter 0.01 --loss 0.05
+
+Tello3.py and the asyncio client can point at it directly.  djitellopy 1.5 always binds local port 8889 and
+talks to 192.168.10.1, so to use it run the simulator on another machine, container or network namespace that
+owns 192.168.10.1, e.g. with --host 0.0.0.0.
+"""
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1", help="address to listen for commands on")
+    ap.add_argument("--command-port", type=int, default=8889)
+    ap.add_argument("--state-port", type=int, default=8890)
+    ap.add_argument("--video-port", type=int, default=11111)
+    ap.add_argument("--video", default="video_12-06-2020_08-19-53_PM.mp4", help="video to stream after streamon")
+    ap.add_argument("--state-rate", type=float, default=10, help="state packets per second")
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds added to every packet sent to the client")
+    ap.add_argument("--jitter", type=float, default=0.0, help="random +/- seconds added to the latency")
+    ap.add_argument("--loss", type=float, default=0.0, help="probability that a packet is dropped")
+    ap.add_argument("--time-scale", type=float, default=1.0,
+                    help="scale the time takeoff, land and move commands take to answer")
+    args = ap.parse_args()
+
+    simulator = TelloSimulator(host=args.host, command_port=args.command_port, state_port=args.state_port,
+                               video_port=args.video_port, video_file=args.video, state_rate=args.state_rate,
+                               latency=args.latency, jitter=args.jitter, loss=args.loss,
+                               time_scale=args.time_scale).start()
+    print(f"Tello simulator listening on {args.host}:{args.command_port}")
+
+    try:
+        while True:
+            time.sleep(5)
+            print(simulator.stats())
+    except KeyboardInterrupt:
+        pass
+
+    simulator.stop()
+    print("Simulator stopped")
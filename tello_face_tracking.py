@@ -1,21 +1,64 @@
+import time
+_import_start = time.time()
 from pyimagesearch.objcenter import ObjCenter
+from pyimagesearch.targetfilter import TargetFilter
+from pyimagesearch.multitracker import MultiFaceTracker
 import cv2
-from pyimagesearch.pid import PID
-from djitellopy import Tello
+from pyimagesearch.pid import PIDBank
+from pyimagesearch.framering import FrameRing, KEEP_LATEST, DROP_OLDEST
+from pyimagesearch.framesource import LiveFrameSource
+from pyimagesearch.rcscheduler import RCScheduler
+from pyimagesearch.tracing import make_tracer, StartupTimer
+from pyimagesearch.overlay import FRAME_META_DTYPE, MAX_TRACKS, draw_overlay
+from pyimagesearch.flightlog import FlightLogWriter, TELEMETRY_FIELDS
+from pyimagesearch.governor import QualityGovernor
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
 import signal
 import sys
-import imutils
-import time
-from datetime import datetime
-from multiprocessing import Manager, Process, Pipe, Event
+from multiprocessing import Process, Event
+import os
+# djitellopy, the detector pool and the video recorder are imported where they are used,
+# so the display and recorder processes do not load what they never need
+IMPORT_TIME = time.time() - _import_start
+
+# stages every frame is timed through when tracing is on, the last two run in the consumer processes
+PIPELINE_STAGES = ("read", "resize", "detect", "pid", "command", "publish", "display", "record")
 
 tello = None
-video_writer = None
+rc_scheduler = None
+video_writers = {}
+tracer = None
+flight_log = None
+telemetry = None
+governor = None
 
 
-# function to handle keyboard interrupt
-def signal_handler(sig, frame):
-    print("Signal Handler")
+def shutdown():
+    if tracer:
+        tracer.dump()
+
+    if flight_log:
+        try:
+            flight_log.close()
+            print(f"Flight log: {flight_log.records} records written to {flight_log.path}")
+        except:
+            pass
+
+    if telemetry:
+        try:
+            telemetry.stop()
+        except:
+            pass
+
+    if rc_scheduler:
+        try:
+            rc_scheduler.stop()
+            print(f"RC scheduler stats: {rc_scheduler.stats()}")
+        except:
+            pass
+
     if tello:
         try:
             tello.streamoff()
@@ -23,25 +66,31 @@ def signal_handler(sig, frame):
         except:
             pass
 
-    if video_writer:
+    for kind, video_writer in video_writers.items():
         try:
             video_writer.release()
+            print(f"Video recorder ({kind}) stats: {video_writer.stats()}")
         except:
             pass
 
+
+# function to handle keyboard interrupt
+def signal_handler(sig, frame):
+    print("Signal Handler")
+    shutdown()
     sys.exit()
 
 
-def track_face_in_video_feed(exit_event, show_video_conn, video_writer_conn, run_pid, track_face, fly=False,
-                             max_speed_limit=40):
+def track_face_in_video_feed(exit_event, frame_ring, run_pid, track_face, fly=False,
+                             max_speed_limit=40, drone=None, frame_source=None, detector_workers=0, rc_rate=20,
+                             trace=False, trace_dir=".", use_target_filter=True, detector_backend="haar",
+                             lock_policy=None, flight_log_path=None, flight_log_info=None, target_hz=None):
     """
 
     :param exit_event: Multiprocessing Event.  When set, this event indicates that the process should stop.
     :type exit_event:
-    :param show_video_conn: Pipe to send video frames to the process that will show the video
-    :type show_video_conn: multiprocessing Pipe
-    :param video_writer_conn: Pipe to send video frames to the process that will save the video frames
-    :type video_writer_conn: multiprocessing Pipe
+    :param frame_ring: Shared memory ring the annotated frames are written into for the display and recorder processes
+    :type frame_ring: FrameRing
     :param run_pid: Flag to indicate whether the PID controllers should be run.
     :type run_pid: bool
     :param track_face: Flag to indicate whether face tracking should be used to move the drone
@@ -50,145 +99,388 @@ def track_face_in_video_feed(exit_event, show_video_conn, video_writer_conn, run
     :type fly: bool
     :param max_speed_limit: Maximum speed that the drone will send as a command.
     :type max_speed_limit: int
+    :param drone: Tello to control.  None connects to the real drone, pass a RecordingTello to replay offline.
+    :type drone: Tello
+    :param frame_source: Where frames come from.  None reads the Tello video stream, pass a FileFrameSource to replay a video.
+    :type frame_source: LiveFrameSource or FileFrameSource
+    :param detector_workers: Number of worker processes to run face detection in.  0 detects in this process.
+    :type detector_workers: int
+    :param rc_rate: Rate in Hz at which rc commands are sent to the drone, independent of the frame rate.
+    :type rc_rate: int
+    :param trace: Flag to time every frame through each stage of the pipeline.  The frame_ring needs room for the traces.
+    :type trace: bool
+    :param trace_dir: Directory the per process trace_*.json latency summaries are written to.
+    :type trace_dir: str
+    :param use_target_filter: Follow the face through a TargetFilter that gates outliers, coasts through misses and
+                              predicts the center at command time.  False uses the old 25 pixel jitter reject.
+    :type use_target_filter: bool
+    :param detector_backend: Face detector backend by name: "haar" (most accurate), "lbp" (faster) or "skin" (coarse).
+    :type detector_backend: str
+    :param lock_policy: Which face to lock onto with several in view: "largest", "center" or "first" seen.  A new
+                        target is only followed from its second detection on.  None (the default) follows whichever
+                        face the detector lists first, from the first detection.
+    :type lock_policy: str
+    :param flight_log_path: Binary flight log to append a record per frame to (see pyimagesearch.flightlog).  With the
+                            real drone the Tello state stream is logged with it.
+    :type flight_log_path: str
+    :param flight_log_info: Extra entries for the flight log header, e.g. the prefix of the session's video files.
+    :type flight_log_info: dict
+    :param target_hz: Control loop rate to hold.  A QualityGovernor lowers the detection width, scale factor, min
+                      neighbors and full scan rate when the loop falls behind and restores them when there is headroom.
+                      None keeps the detector settings fixed.
+    :type target_hz: float
     :return: None
     :rtype:
     """
-    global tello
+    global tello, rc_scheduler, tracer, flight_log, telemetry, governor
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
-    max_speed_threshold = max_speed_limit
+    startup = StartupTimer()
+    startup.record("imports", IMPORT_TIME)
+
+    # load and warm up the detector while the drone handshake is going on
+    loader = ThreadPoolExecutor(max_workers=1)
+    detector_future = loader.submit(load_face_center, frame_ring.shape, detector_workers, detector_backend,
+                                    use_target_filter, lock_policy, startup)
 
-    tello = Tello()
+    live = drone is None
+    with startup.phase("connect"):
+        if drone is None:
+            from djitellopy import Tello
+            drone = Tello()
+        tello = drone
+        tello.connect()
 
-    tello.connect()
+    with startup.phase("streamon"):
+        tello.streamon()
+        if frame_source is None:
+            frame_source = LiveFrameSource(tello)
 
-    tello.streamon()
-    frame_read = tello.get_frame_read()
+    # only take off once the detector is ready, so the drone does not hover without tracking
+    with startup.phase("detector_wait"):
+        (face_center, target_filter, multi_tracker) = detector_future.result()
+    loader.shutdown(wait=False)
 
     if fly:
-        tello.takeoff()
-        tello.move_up(70)
+        with startup.phase("takeoff"):
+            tello.takeoff()
+            tello.move_up(70)
 
-    face_center = ObjCenter("./haarcascade_frontalface_default.xml")
-    pan_pid = PID(kP=0.7, kI=0.0001, kD=0.1)
-    tilt_pid = PID(kP=0.7, kI=0.0001, kD=0.1)
-    pan_pid.initialize()
-    tilt_pid.initialize()
+    # pan and tilt controllers updated together, clamped to the max speed
+    pid = PIDBank(kP=0.7, kI=0.0001, kD=0.1, axes=2, output_limit=max_speed_limit)
+    pid.initialize()
 
-    while not exit_event.is_set():
-        frame = frame_read.frame
+    # the tracking loop only publishes setpoints, the scheduler sends them at a fixed rate
+    if track_face and fly:
+        rc_scheduler = RCScheduler(tello, rate=rc_rate).start()
+
+    tracer = make_tracer(trace, PIPELINE_STAGES, name="tracking",
+                         dump_path=os.path.join(trace_dir, "trace_tracking.json"))
 
-        frame = imutils.resize(frame, width=400)
-        H, W, _ = frame.shape
+    if flight_log_path:
+        flight_log = FlightLogWriter(flight_log_path, fps=30, rc_rate=rc_rate, max_speed_limit=max_speed_limit,
+                                     gains={"kP": pid.kP.tolist(), "kI": pid.kI.tolist(), "kD": pid.kD.tolist()},
+                                     **(flight_log_info or {}))
+        if live:
+            # the state stream is only there with a real drone
+            from pyimagesearch.telemetry import TelemetryIngester
+            telemetry = TelemetryIngester().start()
+
+    if target_hz:
+        governor = QualityGovernor(target_hz=target_hz)
+
+    H, W, _ = frame_ring.shape
+
+    first_frame = True
+    while not exit_event.is_set():
+        tracer.begin()
+        image = frame_source.read()
+        if image is None:
+            # end of a replayed video
+            break
+        tracer.mark("read")
+        # the governor only counts the work on the frame, not the wait for it
+        busy_start = time.time()
+
+        # resize straight into the next free slot of the ring so the frame is never copied again
+        frame = frame_ring.next_slot()
+        cv2.resize(image, (W, H), dst=frame)
+        tracer.mark("resize")
+
+        # nothing is drawn here, what was found goes into the slot's metadata record
+        # and the display / recorder draw the overlay if they want it
+        meta = frame_ring.next_meta() if frame_ring.meta_dtype is not None else np.zeros(1, FRAME_META_DTYPE)[0]
+        meta["frame_time"] = frame_source.frame_time
 
         # calculate the center of the frame as this is (ideally) where
         # we will we wish to keep the object
         centerX = W // 2
         centerY = H // 2
-
-        # draw a circle in the center of the frame
-        cv2.circle(frame, center=(centerX, centerY), radius=5, color=(0, 0, 255), thickness=-1)
+        meta["frame_center"] = (centerX, centerY)
 
         # find the object's location
-        frame_center = (centerX, centerY)
-        objectLoc = face_center.update(frame, frameCenter=None)
+        objectLoc = face_center.update(frame, frameCenter=None, timestamp=frame_source.frame_time)
+        tracer.mark("detect")
         # print(centerX, centerY, objectLoc)
-
-        ((objX, objY), rect, d) = objectLoc
-        if d > 25 or d == -1:
-            # then either we got a false face, or we have no faces.
+        if objectLoc is None:
+            # the detector pool has no new result yet, keep the last command
+            seq = publish_frame(frame_ring, tracer, meta)
+            if flight_log:
+                log_frame(seq, meta, -1, None)
+            if governor:
+                govern(face_center, busy_start)
+            continue
+
+        (center, rect, d) = objectLoc
+        if use_target_filter:
+            # the filter already gated the detection, center is its prediction
+            # and None only once it lost the face
+            usable = center is not None
+        else:
             # the d - distance - value is used to keep the jitter down of false positive faces detected where there
-            #                   were none.
-            # if it is a false positive, or we cannot determine a distance, just stay put
-            # print(int(pan_update), int(tilt_update))
-            if track_face and fly:
-                tello.send_rc_control(0, 0, 0, 0)
-            continue  # ignore the sample as it is too far from the previous sample
+            #                   were none.  if it is a false positive, or we cannot determine a distance, stay put
+            usable = rect is not None and 0 <= d <= 25
 
         if rect is not None:
-            (x, y, w, h) = rect
-            cv2.rectangle(frame, (x, y), (x + w, y + h),
-                          (0, 255, 0), 2)
-
-            # draw a circle in the center of the face
-            cv2.circle(frame, center=(objX, objY), radius=5, color=(255, 0, 0), thickness=-1)
+            meta["has_rect"] = True
+            meta["rect"] = rect
+
+        if multi_tracker:
+            # the other faces in view and the track ids
+            tracks = multi_tracker.tracks()[:MAX_TRACKS]
+            meta["track_count"] = len(tracks)
+            for i, (track_id, track_rect, locked) in enumerate(tracks):
+                meta["track_ids"][i] = track_id
+                meta["track_rects"][i] = track_rect
+                meta["track_locked"][i] = locked
+
+        if not usable:
+            if track_face and fly:
+                rc_scheduler.publish(0, 0, 0, 0, frame_time=frame_source.frame_time)
+            tracer.mark("command")
 
-            # Draw line from frameCenter to face center
-            cv2.arrowedLine(frame, frame_center, (objX, objY), color=(0, 255, 0), thickness=2)
+        else:
+            (objX, objY) = center
+            meta["has_target"] = True
+            meta["center"] = center
 
             if run_pid:
                 # calculate the pan and tilt errors and run through pid controllers
                 pan_error = centerX - objX
-                pan_update = pan_pid.update(pan_error, sleep=0)
-
                 tilt_error = centerY - objY
-                tilt_update = tilt_pid.update(tilt_error, sleep=0)
-
-                # print(pan_error, int(pan_update), tilt_error, int(tilt_update))
-                cv2.putText(frame, f"X Error: {pan_error} PID: {pan_update:.2f}", (20, 30), cv2.FONT_HERSHEY_SIMPLEX, 1,
-                            (0, 255, 0), 2, cv2.LINE_AA)
-
-                cv2.putText(frame, f"Y Error: {tilt_error} PID: {tilt_update:.2f}", (20, 70), cv2.FONT_HERSHEY_SIMPLEX,
-                            1,
-                            (0, 0, 255), 2, cv2.LINE_AA)
-
-                if pan_update > max_speed_threshold:
-                    pan_update = max_speed_threshold
-                elif pan_update < -max_speed_threshold:
-                    pan_update = -max_speed_threshold
+                pan_update, tilt_update = pid.update((pan_error, tilt_error), now=frame_source.frame_time)
+                tracer.mark("pid")
+                meta["has_pid"] = True
+                meta["pan_error"] = pan_error
+                meta["tilt_error"] = tilt_error
+                meta["pan_output"] = pan_update
+                meta["tilt_output"] = tilt_update
 
                 # NOTE: if face is to the right of the drone, the distance will be negative, but
                 # the drone has to have positive power so I am flipping the sign
                 pan_update = pan_update * -1
 
-                if tilt_update > max_speed_threshold:
-                    tilt_update = max_speed_threshold
-                elif tilt_update < -max_speed_threshold:
-                    tilt_update = -max_speed_threshold
-
                 print(int(pan_update), int(tilt_update))
+                rc = (int(pan_update // 3), 0, int(tilt_update // 2), 0)
+                meta["rc"] = rc
                 if track_face and fly:
                     # left/right: -100/100
-                    tello.send_rc_control(pan_update // 3, 0, tilt_update // 2, 0)
-
-        # send frame to other processes
-        show_video_conn.send(frame)
-        video_writer_conn.send(frame)
+                    rc_scheduler.publish(*rc, frame_time=frame_source.frame_time)
+                tracer.mark("command")
+
+        # publish the frame to the other processes
+        seq = publish_frame(frame_ring, tracer, meta)
+        if flight_log:
+            log_frame(seq, meta, d, pid if meta["has_pid"] else None)
+        if governor:
+            govern(face_center, busy_start)
+
+        if first_frame:
+            first_frame = False
+            startup.record("first_frame", time.time() - startup.end)
+            print(startup.report())
+
+    if detector_workers > 0:
+        print(f"Detector pool stats: {face_center.stats()}")
+        face_center.close()
+    if target_filter:
+        print(f"Target filter stats: {target_filter.stats()}")
+    if multi_tracker:
+        print(f"Multi face tracker stats: {multi_tracker.stats()}")
+    if governor:
+        print(f"Quality governor stats: {governor.stats()}")
+    if tracer.enabled:
+        print(f"Trace: {tracer.summary()}")
     # then we got the exit event so cleanup
-    signal_handler(None, None)
-
-
-def show_video(exit_event, pipe_conn):
+    shutdown()
+
+
+def load_face_center(shape, detector_workers, detector_backend, use_target_filter, lock_policy, startup):
+    with startup.phase("detector_load", background=True):
+        # once a face is locked only search a window 2.5 times its size around it
+        # and follow it through a Kalman filter instead of throwing away jumpy detections.
+        # with several faces in view keep following the same one
+        target_filter = TargetFilter() if use_target_filter else None
+        multi_tracker = MultiFaceTracker(lock_policy, frame_size=(shape[1], shape[0])) if lock_policy else None
+        if detector_workers > 0:
+            from pyimagesearch.detectorpool import DetectorPool
+            face_center = DetectorPool("./haarcascade_frontalface_default.xml", workers=detector_workers,
+                                       roi_expand=2.5, target_filter=target_filter, multi_tracker=multi_tracker,
+                                       backend=detector_backend)
+        else:
+            face_center = ObjCenter("./haarcascade_frontalface_default.xml", roi_expand=2.5,
+                                    target_filter=target_filter, multi_tracker=multi_tracker,
+                                    backend=detector_backend)
+        face_center.warm_up(shape)
+    return (face_center, target_filter, multi_tracker)
+
+
+def publish_frame(frame_ring, tracer, meta):
+    tracer.mark("publish")
+    if frame_ring.trace_len:
+        tracer.store(frame_ring.next_trace())
+    meta["publish_time"] = time.time()
+    seq = frame_ring.commit(meta["publish_time"])
+    tracer.finish()
+    return seq
+
+
+def govern(face_center, busy_start):
+    busy = time.time() - busy_start
+    if getattr(face_center, "detect_load", None) is not None:
+        # a detector pool detects beside the loop, it only keeps up with target_hz while a detection takes less than
+        # a period per worker
+        busy = max(busy, face_center.detect_load)
+    settings = governor.record(busy)
+    if settings is not None:
+        # the detector pool forwards the settings to its workers
+        face_center.set_quality(settings)
+
+
+def log_frame(seq, meta, d, pid):
+    record = flight_log.next_record()
+    record["seq"] = seq
+    for field in ("frame_time", "publish_time", "has_rect", "rect", "has_target", "center", "pan_error", "tilt_error",
+                  "pan_output", "tilt_output", "rc"):
+        record[field] = meta[field]
+    record["d"] = d
+    if governor is not None:
+        record["quality"] = governor.level
+    if pid is not None:
+        # the terms that added up to the outputs
+        terms = np.stack((pid.kP * pid.cP, pid.kI * pid.cI, pid.kD * pid.cD), axis=1)
+        record["pan_terms"] = terms[0]
+        record["tilt_terms"] = terms[1]
+    if telemetry is not None and telemetry.count:
+        state = telemetry.latest()
+        for field in TELEMETRY_FIELDS:
+            record[field] = state[field]
+    flight_log.commit()
+
+
+def annotated(frame_ring, frame, seq):
+    # the slot is shared with the other consumers and keeps the raw frame, draw on a copy
+    frame = frame.copy()
+    if frame_ring.meta_dtype is not None:
+        draw_overlay(frame, frame_ring.meta(seq))
+    return frame
+
+
+def show_video(exit_event, frame_ring, trace=False, trace_dir="."):
+    global tracer
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
+    tracer = make_tracer(trace, PIPELINE_STAGES, name="display",
+                         dump_path=os.path.join(trace_dir, "trace_display.json"))
+
     while True:
-        frame = pipe_conn.recv()
+        frame, seq, _ = frame_ring.get("display")
+        tracer.load(frame_ring.trace(seq))
+        frame = annotated(frame_ring, frame, seq)
+        if tracer.enabled:
+            e2e = tracer.end_to_end.summary()
+            cv2.putText(frame, f"e2e p50 {e2e['p50']:.0f}ms p95 {e2e['p95']:.0f}ms", (20, frame.shape[0] - 15),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv2.LINE_AA)
         # display the frame to the screen
         cv2.imshow("Drone Face Tracking", frame)
-        cv2.waitKey(1)
+        tracer.mark("display")
+        tracer.finish()
         if cv2.waitKey(1) & 0xFF == ord('q'):
             exit_event.set()
 
 
-def video_recorder(pipe_conn, save_video, height=300, width=400):
-    global video_writer
-    # create a VideoWrite object, recoring to ./video.avi
+def serve_video(exit_event, frame_ring, host="127.0.0.1", port=8080, quality=80, max_fps=15, trace=False,
+                trace_dir="."):
+    """
+    Headless alternative to show_video: serve the frames as MJPEG on http://<host>:port/.
+    POST /quit takes the place of pressing q in the window.  Only served to the local machine unless host is
+    "0.0.0.0", anyone who can reach the page can land the drone.
+    """
+    global tracer
+    from pyimagesearch.mjpegserver import MJPEGServer
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
-    if video_writer is None and save_video == True:
-        video_file = f"video_{datetime.now().strftime('%d-%m-%Y_%I-%M-%S_%p')}.mp4"
-        video_writer = cv2.VideoWriter(video_file, cv2.VideoWriter_fourcc(*'MP4V'), 30, (width, height))
+    tracer = make_tracer(trace, PIPELINE_STAGES, name="display",
+                         dump_path=os.path.join(trace_dir, "trace_display.json"))
 
-    while True:
-        frame = pipe_conn.recv()
-        video_writer.write(frame)
-        time.sleep(1 / 30)
+    server = MJPEGServer(host=host, port=port, quality=quality, max_fps=max_fps, exit_event=exit_event).start()
+    print(f"Serving video on http://{server.address[0]}:{server.address[1]}/")
+
+    while not exit_event.is_set():
+        item = frame_ring.get("display", timeout=0.1)
+        if item is None:
+            continue
+        frame, seq, _ = item
+        tracer.load(frame_ring.trace(seq))
+        # encoded once here, however many clients are watching
+        server.publish(annotated(frame_ring, frame, seq))
+        tracer.mark("display")
+        tracer.finish()
+
+    print(f"MJPEG server stats: {server.stats()}")
+    server.stop()
+
+
+def video_recorder(exit_event, frame_ring, save_video, fps=30, segment_seconds=60, record="annotated", prefix=None,
+                   trace=False, trace_dir="."):
+    """
+    record: "raw" saves the frames as the drone saw them, "annotated" with the tracking overlay, "both" one file of each.
+    """
+    global tracer
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    tracer = make_tracer(trace, PIPELINE_STAGES, name="recorder",
+                         dump_path=os.path.join(trace_dir, "trace_recorder.json"))
+
+    if not video_writers and save_video == True:
+        from pyimagesearch.videorecorder import VideoRecorder
+        # constant frame rate, encoded on a background thread, one file per segment_seconds
+        if prefix is None:
+            prefix = f"video_{datetime.now().strftime('%d-%m-%Y_%I-%M-%S_%p')}"
+        kinds = ("raw", "annotated") if record == "both" else (record,)
+        for kind in kinds:
+            video_writers[kind] = VideoRecorder(prefix=f"{prefix}_{kind}" if record == "both" else prefix, fps=fps,
+                                                segment_seconds=segment_seconds)
+
+    while not exit_event.is_set():
+        item = frame_ring.get("recorder", timeout=0.1)
+        if item is None:
+            continue
+        frame, seq, timestamp = item
+        tracer.load(frame_ring.trace(seq))
+        if "raw" in video_writers:
+            video_writers["raw"].write(frame, timestamp)
+        if "annotated" in video_writers:
+            video_writers["annotated"].write(annotated(frame_ring, frame, seq), timestamp)
+        tracer.mark("record")
+        tracer.finish()
 
     # then we got the exit event so cleanup
-    signal_handler(None, None)
+    shutdown()
 
 
 if __name__ == '__main__':
@@ -198,25 +490,52 @@ if __name__ == '__main__':
     track_face = True  # True - cause the Tello to start to track/follow a face
     save_video = True
     fly = True
-
-    parent_conn, child_conn = Pipe()
-    parent2_conn, child2_conn = Pipe()
+    detector_workers = 0  # > 0 - run face detection in that many worker processes
+    trace = False  # True - time every frame through each stage, written to trace_*.json every 5 seconds
+    record = "annotated"  # "raw", "annotated" (with the tracking overlay) or "both"
+    save_flight_log = True  # per frame detection / PID / rc / telemetry records in flight_<date>.tlog
+    http_port = None  # e.g. 8080 - serve the video as MJPEG over http instead of a cv2 window, for headless machines
+    http_host = "127.0.0.1"  # "0.0.0.0" - also serve it to the network, anyone who can reach it can land the drone
+    target_hz = None  # e.g. 15 - lower the detection quality when needed to hold this control loop rate
+
+    # Tello frames are 960x720, resized to 400x300 for detection, display and recording
+    # the display only ever needs the newest frame, the recorder catches up on what is still in the ring
+    frame_ring = FrameRing(shape=(300, 400, 3), slots=8, consumers=("display", "recorder"),
+                           policies={"display": KEEP_LATEST, "recorder": DROP_OLDEST},
+                           trace_len=len(PIPELINE_STAGES) + 1 if trace else 0, meta_dtype=FRAME_META_DTYPE)
 
     exit_event = Event()
 
-    with Manager() as manager:
-        p1 = Process(target=track_face_in_video_feed,
-                     args=(exit_event, child_conn, child2_conn, run_pid, track_face, fly,))
-        p2 = Process(target=show_video, args=(exit_event, parent_conn,))
-        p3 = Process(target=video_recorder, args=(parent2_conn, save_video,))
-        p2.start()
-        p3.start()
-        p1.start()
-
-        p1.join()
-        p2.terminate()
-        p3.terminate()
-        p2.join()
-        p3.join()
-
+    # the video and the flight log of a session share the date, the log links its records to the video frames
+    session = datetime.now().strftime('%d-%m-%Y_%I-%M-%S_%p')
+    video_prefix = f"video_{session}"
+
+    p1 = Process(target=track_face_in_video_feed,
+                 args=(exit_event, frame_ring, run_pid, track_face, fly,),
+                 kwargs={"detector_workers": detector_workers, "trace": trace, "target_hz": target_hz,
+                         "flight_log_path": f"flight_{session}.tlog" if save_flight_log else None,
+                         "flight_log_info": {"video": video_prefix if save_video else None, "record": record}})
+    if http_port:
+        p2 = Process(target=serve_video, args=(exit_event, frame_ring,),
+                     kwargs={"host": http_host, "port": http_port, "trace": trace})
+    else:
+        p2 = Process(target=show_video, args=(exit_event, frame_ring,), kwargs={"trace": trace})
+    p3 = Process(target=video_recorder, args=(exit_event, frame_ring, save_video,),
+                 kwargs={"record": record, "prefix": video_prefix, "trace": trace})
+    # the tracker holds the critical path (drone handshake, detector load), start it first
+    p1.start()
+    p2.start()
+    p3.start()
+
+    p1.join()
+    # let the recorder encode what is queued and close the last segment
+    exit_event.set()
+    p3.join(timeout=10)
+    p2.terminate()
+    p3.terminate()
+    p2.join()
+    p3.join()
+
+    print(f"Frame stats: {frame_ring.stats()}")
+    frame_ring.unlink()
     print("Complete...")
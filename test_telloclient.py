@@ -0,0 +1,90 @@
+from pyimagesearch.simulator import TelloSimulator
+from pyimagesearch.telloclient import TelloClient
+import asyncio
+
+"""
+Checks that TelloClient hands every answer to the command that asked for it, against the local simulator.
+
+python -m pytest test_telloclient.py
+python test_telloclient.py
+"""
+
+READS = ("battery?", "speed?", "time?", "height?", "tof?", "sn?")
+
+
+def start_simulator(latency=0.05):
+    # no jitter, the real drone answers in order
+    simulator = TelloSimulator(host="127.0.0.1", command_port=0, state_port=0, latency=latency)
+    return simulator.start()
+
+
+def expected_answers(simulator):
+    return {name: simulator._read(name) for name in READS}
+
+
+def test_pipelined_reads_get_their_own_answers():
+    simulator = start_simulator()
+    port = simulator.sock.getsockname()[1]
+
+    async def run():
+        async with TelloClient(host="127.0.0.1", port=port, local_port=0, timeout=1.0, max_in_flight=len(READS)) as client:
+            assert await client.connect() == "ok"
+            for _ in range(5):
+                answers = await asyncio.gather(*[client.command(name) for name in READS])
+                assert dict(zip(READS, answers)) == expected_answers(simulator)
+            return client.stats()
+
+    try:
+        stats = asyncio.run(run())
+    finally:
+        simulator.stop()
+    assert stats["timeouts"] == 0
+    assert stats["late_responses"] == 0
+    assert stats["pending"] == 0
+
+
+def test_answer_to_a_retry_is_not_handed_to_the_next_command():
+    # every answer comes after the client retried, so both attempts are answered
+    simulator = start_simulator(latency=0.3)
+    port = simulator.sock.getsockname()[1]
+
+    async def run():
+        async with TelloClient(host="127.0.0.1", port=port, local_port=0, timeout=0.2) as client:
+            assert await client.command("speed?", retries=1) == simulator._read("speed?")
+            await asyncio.sleep(0.5)
+            assert await client.command("height?", timeout=1.0, retries=0) == simulator._read("height?")
+            return client.stats()
+
+    try:
+        stats = asyncio.run(run())
+    finally:
+        simulator.stop()
+    assert stats["late_responses"] == 1
+    assert stats["pending"] == 0
+
+
+def test_malformed_commands_are_answered_with_an_error():
+    simulator = start_simulator(latency=0)
+    port = simulator.sock.getsockname()[1]
+
+    async def run():
+        async with TelloClient(host="127.0.0.1", port=port, local_port=0, timeout=1.0) as client:
+            assert await client.connect() == "ok"
+            for command in ("rc 1 2", "rc 1 2 3 4 5", "rc 1 2 x 4", "rc 1.5 0 0 0", "up", "cw x", "hover"):
+                assert await client.command(command) == "error", command
+            # a good rc is still taken silently
+            client.send_rc(10, 0, 0, 0)
+            assert await client.command("speed?") == simulator._read("speed?")
+
+    try:
+        asyncio.run(run())
+        assert simulator.pose.rc == (10, 0, 0, 0)
+    finally:
+        simulator.stop()
+
+
+if __name__ == '__main__':
+    test_pipelined_reads_get_their_own_answers()
+    test_answer_to_a_retry_is_not_handed_to_the_next_command()
+    test_malformed_commands_are_answered_with_an_error()
+    print("ok")
@@ -0,0 +1,270 @@
+from pyimagesearch.pid import PIDBank
+from multiprocessing import Pool
+import numpy as np
+import argparse
+import json
+import time
+import os
+
+"""
+Offline PID gain tuner.  Replays recorded pan / tilt error trajectories through a simple drone response model
+and scores many gain sets at once instead of trying them out in flight.
+
+The errors come from a csv file with t,pan_error,tilt_error columns, a binary flight log, or are measured on a recorded video with the
+same face detector the tracker uses (--save-errors keeps them for the next run).  The recorded error is treated as
+the target motion the drone has to follow.  The drone is modeled as a first order velocity response to the PID
+output (plant gain in pixels per second per unit of output, time constant tau) after a detection / command delay.
+
+Every gain set is one axis of a PIDBank, so a whole chunk of gain sets is simulated with the same vectorized
+update.  The chunks are spread over a process pool.  Each gain set is scored by the settling time and overshoot
+of a step response, the rms tracking error on the recorded trajectories and the command effort.
+
+python tune-pid.py --video video_12-06-2020_08-19-53_PM.mp4 --save-errors errors.csv
+python tune-pid.py --errors errors.csv --random 20000 --top 10 --output tuning.json
+"""
+
+# the gains currently used by the tracking scripts, always scored for comparison
+REFERENCE_GAINS = [(0.7, 0.0001, 0.1), (0.7, 0.0001, 0.09)]
+
+
+def extract_errors(video, cascade, width=400):
+    from pyimagesearch.framesource import FileFrameSource
+    from pyimagesearch.objcenter import ObjCenter
+    import cv2
+
+    frame_source = FileFrameSource(video, realtime=False)
+    obj_center = ObjCenter(cascade, roi_expand=2.5)
+    errors = []
+    while True:
+        frame = frame_source.read()
+        if frame is None:
+            break
+        H, W, _ = frame.shape
+        frame = cv2.resize(frame, (width, int(H * width / W)))
+        H, W, _ = frame.shape
+        centerX, centerY = W // 2, H // 2
+
+        ((objX, objY), rect, d) = obj_center.update(frame, frameCenter=(centerX, centerY))
+        t = (frame_source.frames_read - 1) / frame_source.fps
+        if rect is None:
+            errors.append((t, np.nan, np.nan))
+        else:
+            errors.append((t, centerX - objX, centerY - objY))
+    frame_source.release()
+    return np.array(errors, dtype=np.float64)
+
+
+def load_errors(path):
+    return np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+
+
+def load_flight_log(path):
+    # the errors the tracker saw in flight, NaN while it had no target
+    from pyimagesearch.flightlog import FlightLogReader
+    log = FlightLogReader(path)
+    has_target = log.column("has_target")
+    errors = np.column_stack((log.column("frame_time"), log.column("pan_error"), log.column("tilt_error")))
+    errors[~has_target, 1:] = np.nan
+    return errors
+
+
+def save_errors(path, errors):
+    np.savetxt(path, errors, delimiter=",", header="t,pan_error,tilt_error", comments="", fmt="%.4f")
+
+
+def resample(t, values, dt):
+    # uniform time steps, frames without a detection hold the neighbouring errors
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return None
+    grid = np.arange(t[0], t[-1], dt)
+    return np.interp(grid, t[valid], values[valid])
+
+
+def simulate(gains, target, dt, plant_gain, tau, delay, max_speed):
+    """
+    Closed loop response of every gain set (rows of gains: kP, kI, kD) to the target trajectory.
+    Returns the error and the PID output, one column per gain set.
+    """
+    n = len(gains)
+    pid = PIDBank(kP=gains[:, 0], kI=gains[:, 1], kD=gains[:, 2], axes=n, dt=dt, output_limit=max_speed)
+    pid.initialize()
+
+    delay_steps = max(int(round(delay / dt)), 0)
+    commands = np.zeros((delay_steps + 1, n))
+    position = np.zeros(n)
+    velocity = np.zeros(n)
+    error = np.empty(n)
+    alpha = min(dt / tau, 1.0) if tau > 0 else 1.0
+
+    errors = np.empty((len(target), n))
+    outputs = np.empty((len(target), n))
+    for i, goal in enumerate(target):
+        np.subtract(goal, position, out=error)
+        errors[i] = error
+        output = pid.update(error)
+        outputs[i] = output
+
+        # the command reaches the drone delay_steps later
+        commands[i % len(commands)] = output
+        applied = commands[(i + 1) % len(commands)]
+
+        # first order velocity response, then integrate the position
+        velocity += alpha * (plant_gain * applied - velocity)
+        position += velocity * dt
+    return errors, outputs
+
+
+def score_chunk(job):
+    gains, trajectories, settings = job
+    dt = settings["dt"]
+    step = settings["step"]
+    model = (settings["plant_gain"], settings["tau"], settings["delay"], settings["max_speed"])
+
+    # step response, like test_pid.py's constant error
+    target = np.full(int(settings["step_duration"] / dt), step)
+    errors, _ = simulate(gains, target, dt, *model)
+    outside = np.abs(errors) > settings["band"] * abs(step)
+    # index of the last sample outside the band, the whole step when it never settles
+    last_outside = len(target) - np.argmax(outside[::-1], axis=0)
+    last_outside[~outside.any(axis=0)] = 0
+    settling_time = last_outside * dt
+    overshoot = np.clip(-errors / step, 0, None).max(axis=0)
+
+    rms = np.zeros(len(gains))
+    effort = np.zeros(len(gains))
+    for trajectory in trajectories:
+        errors, outputs = simulate(gains, trajectory, dt, *model)
+        # relative to doing nothing
+        rms += np.sqrt((errors ** 2).mean(axis=0)) / max(np.sqrt((trajectory ** 2).mean()), 1e-9)
+        effort += np.abs(outputs).mean(axis=0) / settings["max_speed"]
+    rms /= max(len(trajectories), 1)
+    effort /= max(len(trajectories), 1)
+
+    weights = settings["weights"]
+    score = (weights["settle"] * settling_time / settings["step_duration"] + weights["overshoot"] * overshoot +
+             weights["rms"] * rms + weights["effort"] * effort)
+    return np.column_stack((gains, score, settling_time, overshoot, rms, effort))
+
+
+def gain_grid(args):
+    kP = np.linspace(args.kp[0], args.kp[1], int(args.kp[2]))
+    kI = np.concatenate(([0.0], np.geomspace(args.ki[0], args.ki[1], int(args.ki[2]))))
+    kD = np.linspace(args.kd[0], args.kd[1], int(args.kd[2]))
+    return np.array(np.meshgrid(kP, kI, kD, indexing="ij")).reshape(3, -1).T
+
+
+def gain_random(args, n):
+    rng = np.random.default_rng(args.seed)
+    kP = rng.uniform(args.kp[0], args.kp[1], n)
+    kI = np.exp(rng.uniform(np.log(args.ki[0]), np.log(args.ki[1]), n))
+    kD = rng.uniform(args.kd[0], args.kd[1], n)
+    return np.column_stack((kP, kI, kD))
+
+
+COLUMNS = ("kP", "kI", "kD", "score", "settling_time", "overshoot", "rms", "effort")
+
+
+def describe(row):
+    return (f"kP={row[0]:.4f} kI={row[1]:.6f} kD={row[2]:.4f}: score {row[3]:.3f} settle {row[4]:.2f}s "
+            f"overshoot {row[5]:.1%} rms {row[6]:.3f} effort {row[7]:.3f}")
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--errors", default=None, help="csv file with t,pan_error,tilt_error columns")
+    ap.add_argument("--flight-log", default=None, help="binary flight log to take the errors from")
+    ap.add_argument("--video", default=None, help="recorded video to measure the errors on")
+    ap.add_argument("--cascade", default="./haarcascade_frontalface_default.xml", help="Haar cascade xml file")
+    ap.add_argument("--save-errors", default=None, help="write the errors measured on --video to this csv file")
+    ap.add_argument("--axis", choices=("pan", "tilt", "both"), default="both")
+    ap.add_argument("--kp", type=float, nargs=3, default=[0.1, 2.0, 20], metavar=("MIN", "MAX", "N"))
+    ap.add_argument("--ki", type=float, nargs=3, default=[1e-5, 1e-1, 9], metavar=("MIN", "MAX", "N"),
+                    help="log spaced, 0 is always included in the grid")
+    ap.add_argument("--kd", type=float, nargs=3, default=[0.0, 0.5, 21], metavar=("MIN", "MAX", "N"))
+    ap.add_argument("--random", type=int, default=None, help="random search with N gain sets instead of the grid")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--dt", type=float, default=1 / 30, help="simulation time step")
+    ap.add_argument("--plant-gain", type=float, default=3.0,
+                    help="drone response in pixels per second per unit of PID output")
+    ap.add_argument("--tau", type=float, default=0.3, help="time constant of the drone velocity response")
+    ap.add_argument("--delay", type=float, default=0.1, help="detection plus command delay in seconds")
+    ap.add_argument("--max-speed", type=float, default=40, help="PID output limit, like max_speed_limit")
+    ap.add_argument("--step", type=float, default=100, help="step response size in pixels")
+    ap.add_argument("--step-duration", type=float, default=5.0)
+    ap.add_argument("--band", type=float, default=0.05, help="settling band relative to the step")
+    ap.add_argument("--w-settle", type=float, default=1.0)
+    ap.add_argument("--w-overshoot", type=float, default=1.0)
+    ap.add_argument("--w-rms", type=float, default=1.0)
+    ap.add_argument("--w-effort", type=float, default=0.1)
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    ap.add_argument("--chunk", type=int, default=500, help="gain sets simulated together in one task")
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--output", default=None, help="json file to write the best gain sets to")
+    args = ap.parse_args()
+
+    trajectories = []
+    errors = None
+    if args.errors:
+        errors = load_errors(args.errors)
+    elif args.flight_log:
+        errors = load_flight_log(args.flight_log)
+    elif args.video:
+        start = time.time()
+        errors = extract_errors(args.video, args.cascade)
+        print(f"Measured errors on {len(errors)} frames in {time.time() - start:.1f}s")
+        if args.save_errors:
+            save_errors(args.save_errors, errors)
+            print(f"Errors written to {args.save_errors}")
+    if errors is not None:
+        columns = {"pan": [1], "tilt": [2], "both": [1, 2]}[args.axis]
+        for column in columns:
+            trajectory = resample(errors[:, 0], errors[:, column], args.dt)
+            if trajectory is not None:
+                trajectories.append(trajectory)
+    if not trajectories:
+        print("No error trajectories, scoring the step response only")
+
+    gains = gain_random(args, args.random) if args.random else gain_grid(args)
+    gains = np.concatenate((np.array(REFERENCE_GAINS), gains))
+    settings = {
+        "dt": args.dt,
+        "plant_gain": args.plant_gain,
+        "tau": args.tau,
+        "delay": args.delay,
+        "max_speed": args.max_speed,
+        "step": args.step,
+        "step_duration": args.step_duration,
+        "band": args.band,
+        "weights": {"settle": args.w_settle, "overshoot": args.w_overshoot, "rms": args.w_rms,
+                    "effort": args.w_effort},
+    }
+    jobs = [(gains[i:i + args.chunk], trajectories, settings) for i in range(0, len(gains), args.chunk)]
+
+    start = time.time()
+    with Pool(args.workers) as pool:
+        results = np.concatenate(pool.map(score_chunk, jobs))
+    elapsed = time.time() - start
+    print(f"Scored {len(gains)} gain sets on {len(trajectories)} trajectories with {args.workers} workers "
+          f"in {elapsed:.1f}s")
+
+    print("Current gains:")
+    for row in results[:len(REFERENCE_GAINS)]:
+        print(f"  {describe(row)}")
+
+    best = results[np.argsort(results[:, 3])[:args.top]]
+    print("Best gains:")
+    for row in best:
+        print(f"  {describe(row)}")
+
+    if args.output:
+        report = {
+            "settings": settings,
+            "trajectories": len(trajectories),
+            "gain_sets": len(gains),
+            "reference": [dict(zip(COLUMNS, map(float, row))) for row in results[:len(REFERENCE_GAINS)]],
+            "best": [dict(zip(COLUMNS, map(float, row))) for row in best],
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")